@@ -1,31 +1,62 @@
 # apps/auth_svc/auth_svc_main.py
+from fastapi import FastAPI
+
 from libs.app.bootstrap import create_service_app
 from libs.messaging.rabbitmq_topology import declare_auth_topology
 
 
-from libs.containers.auth_container import AuthContainer
+from libs.containers.auth_container import AuthContainer, AuthHttpContainer
 from apps.auth_svc.config.settings_auth import AuthServiceSettings
+from apps.auth_svc.rest.jwks import jwks_router
+from apps.auth_svc.rest.health import (
+    auth_health_router,
+    consumers_check,
+    login_capacity_check,
+)
 
 # Фабрики слушателей
 from apps.auth_svc.listeners import (
     create_issue_token_listener_factory,
     create_validate_token_listener_factory,
+    create_validate_many_listener_factory,
     create_register_listener_factory,
     create_refresh_token_listener_factory,
     create_logout_listener_factory,
 )
 
-app = create_service_app(
-    service_name="auth-svc",
-    settings_class=AuthServiceSettings,
-    container_factory=AuthContainer.create,
-    topology_declarator=declare_auth_topology,
-    listener_factories=[
-        create_issue_token_listener_factory(),
-        create_validate_token_listener_factory(),
-        create_register_listener_factory(),
-        # --- ДОБАВЛЯЕМ НОВЫЕ ФАБРИКИ В СПИСОК ---
-        create_refresh_token_listener_factory(),
-        create_logout_listener_factory(),
-    ],
-)
+
+# Те же фабрики запускает в каждом процессе-консьюмере apps.auth_svc.runner
+LISTENER_FACTORIES = [
+    create_issue_token_listener_factory(),
+    create_validate_token_listener_factory(),
+    create_validate_many_listener_factory(),
+    create_register_listener_factory(),
+    # --- ДОБАВЛЯЕМ НОВЫЕ ФАБРИКИ В СПИСОК ---
+    create_refresh_token_listener_factory(),
+    create_logout_listener_factory(),
+]
+
+
+def create_app(*, consumers: bool = True) -> FastAPI:
+    """
+    consumers=False — только HTTP (JWKS, health): очереди слушают процессы
+    раннера, а этот процесс лишь отдаёт REST и сводное здоровье. Контейнер
+    тогда облегчённый (только ключи), а готовность — по отчётам консьюмеров.
+    """
+    return create_service_app(
+        service_name="auth-svc",
+        settings_class=AuthServiceSettings,
+        container_factory=AuthContainer.create
+        if consumers
+        else AuthHttpContainer.create,
+        topology_declarator=declare_auth_topology,
+        listener_factories=LISTENER_FACTORIES if consumers else [],
+        include_rest_routers=[
+            {"router": jwks_router, "tags": ["JWKS"]},
+            {"router": auth_health_router, "tags": ["Health Check"]},
+        ],
+        extra_readiness_checks=[consumers_check, login_capacity_check],
+    )
+
+
+app = create_app()
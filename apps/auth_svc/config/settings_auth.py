@@ -19,9 +19,46 @@ class AuthServiceSettings(BaseSettings):
     AUTH_REFRESH_TTL: int = 1209600
     AUTH_JWT_ISS: str = "core-auth"
     AUTH_JWT_AUD: str = "game-clients"
+    # Асимметричная подпись (EdDSA/ES256): каталог приватных ключей <kid>.pem.
+    # Не задан — подпись общим JWT_SECRET (HS256), как раньше.
+    # Все ключи каталога публикуются в JWKS, подписывает активный (и access,
+    # и refresh). Старый ключ убирать не раньше AUTH_REFRESH_TTL после ротации
+    AUTH_JWT_KEYS_DIR: str | None = None
+    # По умолчанию активен последний по имени kid
+    AUTH_JWT_ACTIVE_KID: str | None = None
+    # Cache-Control: max-age для /.well-known/jwks.json
+    AUTH_JWKS_MAX_AGE_SEC: int = 300
 
     # Настройки безопасности
     AUTH_PASSWORD_BCRYPT_ROUNDS: int = 12
+    # Пул потоков для bcrypt (0 — по числу ядер) и максимум хешей в работе/очереди
+    # (0 — по калибровке, без неё 4 на поток)
+    AUTH_PASSWORD_HASH_WORKERS: int = 0
+    AUTH_PASSWORD_HASH_MAX_PENDING: int = 0
+    # prefetch issue_token/register = max_pending + столько сообщений сверх
+    # ёмкости (0 — ещё max_pending): они доходят до сервиса и сразу получают
+    # auth.overloaded, а не ждут в брокере таймаута RPC
+    AUTH_PASSWORD_REJECT_HEADROOM: int = 0
+    # Калибровка при старте: замер bcrypt на этом железе задаёт бюджет очереди
+    # так, чтобы логин ждал хеширования не дольше AUTH_LOGIN_MAX_WAIT_MS;
+    # сверх бюджета — сразу auth.overloaded с retry_after
+    AUTH_PASSWORD_CALIBRATE: bool = True
+    AUTH_LOGIN_MAX_WAIT_MS: float = 1000.0
+
+    # Отсев подбора паролей до БД и bcrypt: скользящее окно, попыток с IP и с
+    # подсети (/24, /64), неудачных логинов по сервису; под атакой (неудач
+    # больше лимита) лимиты IP/подсети умножаются на AUTH_LOGIN_ATTACK_FACTOR.
+    # 0 — проверка выключена
+    AUTH_LOGIN_WINDOW_SEC: int = 60
+    AUTH_LOGIN_IP_LIMIT: int = 20
+    AUTH_LOGIN_SUBNET_LIMIT: int = 100
+    AUTH_LOGIN_GLOBAL_FAIL_LIMIT: int = 1000
+    AUTH_LOGIN_ATTACK_FACTOR: float = 0.25
+
+    # Режим раннера (python -m apps.auth_svc.runner): процессы-консьюмеры
+    # (0 — по числу ядер) и как часто они отчитываются супервизору
+    AUTH_CONSUMER_PROCESSES: int = 0
+    AUTH_CONSUMER_REPORT_SEC: float = 5.0
 
     # Настройки подключения к зависимостям
     RABBITMQ_DSN: str
@@ -2,7 +2,7 @@
 from __future__ import annotations
 from libs.domain.dto.auth import IssueTokenRequest
 from libs.domain.dto.rpc import RpcResponse
-from ..services.auth_service import AuthService
+from ..services.auth_service import AuthService, overload_retry_after
 
 
 class AuthIssueTokenRpcHandler:
@@ -15,7 +15,10 @@ class AuthIssueTokenRpcHandler:
 
         if error:
             return RpcResponse(
-                success=False, error_code=error, message="Failed to issue token."
+                success=False,
+                error_code=error,
+                message="Failed to issue token.",
+                retry_after=overload_retry_after(self.auth_service, error),
             )
 
         return RpcResponse(success=True, data=token)
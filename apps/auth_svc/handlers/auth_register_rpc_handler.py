@@ -1,7 +1,7 @@
 from __future__ import annotations
 from libs.domain.dto.auth import RegisterRequest, RegisterResponse
 from libs.domain.dto.rpc import RpcResponse
-from ..services.auth_service import AuthService
+from ..services.auth_service import AuthService, overload_retry_after
 
 
 class AuthRegisterRpcHandler:
@@ -14,7 +14,10 @@ class AuthRegisterRpcHandler:
 
         if error:
             return RpcResponse(
-                success=False, error_code=error, message="Registration failed."
+                success=False,
+                error_code=error,
+                message="Registration failed.",
+                retry_after=overload_retry_after(self.auth_service, error),
             )
 
         if account:
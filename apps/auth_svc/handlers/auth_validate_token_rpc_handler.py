@@ -1,82 +1,68 @@
 # apps/auth_svc/handlers/auth_validate_token_rpc_handler.py
 from __future__ import annotations
-import jwt  # PyJWT
+from typing import Optional
 
 from apps.auth_svc.i_auth_handler import IAuthHandler
-from libs.domain.dto.auth import ValidateTokenRequest, ValidateTokenResponse
+from libs.domain.dto.auth import (
+    ValidateTokenRequest,
+    ValidateTokenResponse,
+    ValidateTokensRequest,
+    ValidateTokensResponse,
+)
+from libs.utils.jwt_keys import KeyRing
+from libs.utils.logging_setup import app_logger as logger
+from libs.utils.token_validation import TokenValidator
 from apps.auth_svc.config.settings_auth import AuthServiceSettings
 
 
 class AuthValidateTokenRpcHandler(IAuthHandler):
     """
     Реализует валидацию JWT...
+    Сами проверки — в libs.utils.token_validation: gateway выполняет их же
+    локально, а этот RPC остаётся запасным путём.
     """
 
     def __init__(
-        self, settings: AuthServiceSettings
+        self, settings: AuthServiceSettings, keyring: Optional[KeyRing] = None
     ) -> None:  # <--- Принимаем settings
-        self._secret = settings.JWT_SECRET
-        self._alg = "HS256"  # Алгоритм можно оставить здесь
-        self._aud = settings.AUTH_JWT_AUD
+        self._validator = TokenValidator(
+            settings.JWT_SECRET, audience=settings.AUTH_JWT_AUD, keyring=keyring
+        )
 
     async def process(self, dto: ValidateTokenRequest) -> ValidateTokenResponse:
-        try:
-            # --- ИЗМЕНЕНИЕ 2: Используем нашу аудиторию по умолчанию ---
-            audience_to_check = dto.expected_aud or self._aud
+        return self._validator.validate(
+            dto.access_token,
+            expected_aud=dto.expected_aud,
+            expected_iss=dto.expected_iss,
+        )
 
-            decoded = jwt.decode(
-                dto.access_token,
-                self._secret,
-                algorithms=[self._alg],
-                options={"require": ["exp", "iat"]},
-                audience=audience_to_check,  # <--- ПЕРЕДАЁМ АУДИТОРИЮ
-                issuer=dto.expected_iss,
-            )
-            sub = decoded.get("sub")
-            user_id = str(sub) if sub is not None else None
-            account_id = None
-            try:
-                account_id = int(sub) if sub is not None else None
-            except Exception:
-                account_id = None
-
-            aud = decoded.get("aud")
-            client_id = (
-                aud
-                if isinstance(aud, str)
-                else (aud[0] if isinstance(aud, list) and aud else None)
-            )
 
-            scope_raw = decoded.get("scope") or ""
-            scopes = [s for s in scope_raw.split() if s]
+class AuthValidateManyRpcHandler(IAuthHandler):
+    """
+    Валидация пачки токенов одним RPC: ответ — результаты в порядке запроса.
+    Ошибка одного токена не влияет на остальные.
+    """
 
-            return ValidateTokenResponse(
-                valid=True,
-                user_id=user_id,
-                account_id=account_id,
-                client_id=client_id,
-                scopes=scopes,
-                iat=decoded.get("iat"),
-                exp=decoded.get("exp"),
-            )
+    def __init__(
+        self, settings: AuthServiceSettings, keyring: Optional[KeyRing] = None
+    ) -> None:
+        self._validator = TokenValidator(
+            settings.JWT_SECRET, audience=settings.AUTH_JWT_AUD, keyring=keyring
+        )
 
-        except jwt.ExpiredSignatureError as e:
-            return ValidateTokenResponse(
-                valid=False, error_code="auth.TOKEN_EXPIRED", error_message=str(e)
-            )
-        except jwt.InvalidAudienceError as e:
-            return ValidateTokenResponse(
-                valid=False, error_code="auth.BAD_AUDIENCE", error_message=str(e)
-            )
-        except jwt.InvalidIssuerError as e:
-            return ValidateTokenResponse(
-                valid=False, error_code="auth.BAD_ISSUER", error_message=str(e)
-            )
-        except jwt.InvalidTokenError as e:
-            return ValidateTokenResponse(
-                valid=False, error_code="auth.INVALID_TOKEN", error_message=str(e)
-            )
-        except Exception as e:
-            return ValidateTokenResponse(
-                valid=False, error_code="auth.INTERNAL_ERROR", error_message=str(e)
+    async def process(self, dto: ValidateTokensRequest) -> ValidateTokensResponse:
+        results = [
+            self._validator.validate(
+                token,
+                expected_aud=dto.expected_aud,
+                expected_iss=dto.expected_iss,
             )
+            for token in dto.tokens
+        ]
+        # Отказы — с correlation_id исходного запроса, как у одиночного RPC
+        for result, correlation_id in zip(results, dto.correlation_ids or []):
+            if not result.valid and correlation_id:
+                logger.debug(
+                    f"validate_many: {result.error_code} (correlation_id={correlation_id})"
+                )
+        return ValidateTokensResponse(results=results)
@@ -10,6 +10,7 @@ from libs.messaging.rabbitmq_names import Queues
 # Импортируем конкретные реализации слушателей
 from .auth_issue_token_rpc import AuthIssueTokenRpc
 from .auth_validate_token_rpc import AuthValidateTokenRpc
+from .auth_validate_many_rpc import AuthValidateManyRpc
 from .auth_register_rpc import AuthRegisterRpc
 from .auth_refresh_token_rpc import AuthRefreshTokenRpc
 from .auth_logout_rpc import AuthLogoutRpc
@@ -30,6 +31,8 @@ def create_issue_token_listener_factory() -> ListenerFactory:
             queue_name=Queues.AUTH_ISSUE_TOKEN_RPC,
             message_bus=bus,
             handler=container.issue_token_handler,  # Берем хендлер из DI
+            # Больше, чем вмещает пул bcrypt: лишние логины сразу получают отказ
+            prefetch=container.password_manager.prefetch,
         )
 
     return factory
@@ -50,6 +53,21 @@ def create_validate_token_listener_factory() -> ListenerFactory:
     return factory
 
 
+def create_validate_many_listener_factory() -> ListenerFactory:
+    """Возвращает фабрику для создания AuthValidateManyRpc."""
+
+    async def factory(
+        bus: IMessageBus, container: AuthContainer
+    ) -> BaseMicroserviceListener:
+        return AuthValidateManyRpc(
+            queue_name=Queues.AUTH_VALIDATE_MANY_RPC,
+            message_bus=bus,
+            handler=container.validate_many_handler,
+        )
+
+    return factory
+
+
 def create_register_listener_factory() -> ListenerFactory:
     """Возвращает фабрику для создания AuthRegisterRpc."""
 
@@ -61,6 +79,7 @@ def create_register_listener_factory() -> ListenerFactory:
             queue_name=Queues.AUTH_REGISTER_RPC,
             message_bus=bus,
             handler=container.register_handler,
+            prefetch=container.password_manager.prefetch,
         )
 
     return factory
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from pydantic import ValidationError
+
+from libs.messaging.base_listener import BaseMicroserviceListener
+from libs.messaging.i_message_bus import IMessageBus
+
+from apps.auth_svc.handlers.auth_validate_token_rpc_handler import (
+    AuthValidateManyRpcHandler,
+)
+from libs.domain.dto.auth import ValidateTokensRequest
+
+
+class AuthValidateManyRpc(BaseMicroserviceListener):
+    """
+    RPC-слушатель: валидирует пачку токенов за одно сообщение.
+    Вход: {"tokens": [...], "expected_aud"?, "expected_iss"?} (или envelope с payload).
+    Ответ: {"results": [ValidateTokenResponse, ...]} в порядке tokens.
+    Проверка локальная и дешёвая, поэтому prefetch выше, чем у одиночного RPC.
+    """
+
+    def __init__(
+        self,
+        *,
+        queue_name: str,
+        message_bus: IMessageBus,
+        handler: AuthValidateManyRpcHandler,
+        prefetch: int = 8,
+        consumer_count: int = 1,
+    ) -> None:
+        super().__init__(
+            name="auth.validate_many.rpc",
+            queue_name=queue_name,
+            message_bus=message_bus,
+            prefetch=prefetch,
+            consumer_count=consumer_count,
+            envelope_model=None,
+        )
+        self._handler = handler
+
+    async def process_message(self, data: Dict[str, Any], meta: Dict[str, Any]) -> None:
+        payload: Dict[str, Any]
+        if "payload" in data and isinstance(data["payload"], dict):
+            payload = data["payload"]
+        else:
+            payload = data
+
+        try:
+            req = ValidateTokensRequest.model_validate(payload)
+        except ValidationError as ve:
+            # Пачка целиком некорректна — у клиента нет результатов ни для одного токена
+            await self._reply(
+                reply_to=meta.get("reply_to"),
+                correlation_id=meta.get("correlation_id"),
+                body={
+                    "results": [],
+                    "error_code": "dto.invalid",
+                    "error_message": ve.errors(),
+                },
+            )
+            return
+
+        resp = await self._handler.process(req)
+        await self._reply(
+            reply_to=meta.get("reply_to"),
+            correlation_id=meta.get("correlation_id"),
+            body=resp.model_dump(mode="json"),
+        )
+
+    async def _reply(
+        self,
+        *,
+        reply_to: Optional[str],
+        correlation_id: Optional[str],
+        body: Dict[str, Any],
+    ) -> None:
+        if not reply_to:
+            return
+        await self.bus.publish_rpc_response(
+            reply_to=reply_to, response=body, correlation_id=correlation_id
+        )
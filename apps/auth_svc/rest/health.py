@@ -0,0 +1,54 @@
+# apps/auth_svc/rest/health.py
+from fastapi import APIRouter, FastAPI, Request, Response, status
+
+router = APIRouter(tags=["Health Check"])
+
+
+@router.get("/health/auth", summary="Нагрузка на хеширование паролей")
+async def auth_stats(request: Request):
+    """
+    Пул bcrypt: занятость, очередь и времена (ожидание слота/потока и сам хеш).
+    Растущий queue_time при полном in_flight — сигнал добавить ядра или инстансы.
+    """
+    runner = getattr(request.app.state, "runner", None)
+    if runner is not None:
+        # bcrypt считают процессы раннера — отдаём их сводку
+        return {"password_hashing": runner.health()["password_hashing"]}
+    password_manager = request.app.state.container.password_manager
+    return {"password_hashing": password_manager.stats()}
+
+
+@router.get("/health/consumers", summary="Процессы-консьюмеры раннера")
+async def consumers_health(request: Request, response: Response):
+    """
+    Сводка супервизора apps.auth_svc.runner: живые/готовые процессы, рестарты
+    и суммарная нагрузка на bcrypt. 503 — ни один консьюмер не готов.
+    Без раннера слушатели работают в этом же процессе.
+    """
+    runner = getattr(request.app.state, "runner", None)
+    if runner is None:
+        return {"mode": "in_process"}
+    health = runner.health()
+    if health["ready"] == 0:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"mode": "runner", **health}
+
+
+async def consumers_check(app: FastAPI):
+    """Readiness в режиме раннера: хотя бы один консьюмер готов слушать очереди."""
+    runner = getattr(app.state, "runner", None)
+    if runner is None:
+        return None
+    return "consumers", runner.health()["ready"] > 0
+
+
+async def login_capacity_check(app: FastAPI):
+    """Очередь на bcrypt полна — новые логины сейчас получат auth.overloaded."""
+    runner = getattr(app.state, "runner", None)
+    if runner is not None:
+        # Слушают процессы раннера: хватит одного неперегруженного
+        return "login_capacity", runner.health()["login_capacity"] > 0
+    return "login_capacity", not app.state.container.password_manager.overloaded
+
+
+auth_health_router = router
@@ -0,0 +1,29 @@
+# apps/auth_svc/rest/jwks.py
+from typing import Optional
+
+from fastapi import APIRouter, Header, Request, Response
+from fastapi.responses import JSONResponse
+
+from libs.utils.jwt_keys import jwks_etag
+
+router = APIRouter(tags=["JWKS"])
+
+
+@router.get("/.well-known/jwks.json", summary="Публичные ключи подписи токенов")
+async def jwks(request: Request, if_none_match: Optional[str] = Header(None)):
+    """
+    Набор публичных ключей (JWKS) для локальной проверки токенов.
+    Отдаётся с Cache-Control/ETag: верификаторы кэшируют его и перезапрашивают
+    не чаще max-age, а повторный запрос без изменений стоит 304.
+    """
+    keyring = request.app.state.container.keyring
+    body = keyring.to_jwks() if keyring is not None else {"keys": []}
+    etag = jwks_etag(body)
+    max_age = request.app.state.settings.AUTH_JWKS_MAX_AGE_SEC
+    headers = {"Cache-Control": f"public, max-age={max_age}", "ETag": etag}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(body, headers=headers)
+
+
+jwks_router = router
@@ -0,0 +1,278 @@
+# apps/auth_svc/runner.py
+# Запуск: python -m apps.auth_svc.runner [--processes N] [--host 0.0.0.0] [--port 8001]
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from libs.utils.logging_setup import app_logger as logger
+
+# Процесс, проживший меньше этого, считается упавшим на старте: рестарт с растущей паузой
+_STABLE_AFTER_SEC = 10.0
+
+
+def consumer_main(index: int, reports: Any, report_sec: float) -> None:
+    """Точка входа процесса-консьюмера (запускается через spawn)."""
+    asyncio.run(_consume(index, reports, report_sec))
+
+
+async def _consume(index: int, reports: Any, report_sec: float) -> None:
+    # Импорты здесь: в spawn-процессе им всё равно грузиться, а супервизору они не нужны
+    from apps.auth_svc.auth_svc_main import LISTENER_FACTORIES
+    from apps.auth_svc.config.settings_auth import AuthServiceSettings
+    from libs.containers.auth_container import AuthContainer
+    from libs.messaging.rabbitmq_topology import declare_auth_topology
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    settings = AuthServiceSettings()
+    # Ядра делятся процессами: по умолчанию один поток bcrypt на процесс
+    if not settings.AUTH_PASSWORD_HASH_WORKERS:
+        settings = settings.model_copy(update={"AUTH_PASSWORD_HASH_WORKERS": 1})
+    # Свои шина, пул БД и Redis у каждого процесса
+    container = await AuthContainer.create(settings)
+    listeners = []
+    try:
+        await declare_auth_topology(container.bus)
+        listeners = [
+            await factory(container.bus, container) for factory in LISTENER_FACTORIES
+        ]
+        for listener in listeners:
+            await listener.start()
+        logger.info(f"🧵 Консьюмер auth_svc #{index} (pid={os.getpid()}) запущен")
+        while not stop.is_set():
+            reports.put(
+                {
+                    "index": index,
+                    "pid": os.getpid(),
+                    "at": time.time(),
+                    "ready": await container.bus.is_connected(),
+                    "password_hashing": container.password_manager.stats(),
+                }
+            )
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=report_sec)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        for listener in reversed(listeners):
+            try:
+                await listener.stop()
+            except Exception:
+                logger.exception(f"Ошибка при остановке слушателя {listener.name}")
+        await container.shutdown()
+        logger.info(f"🧵 Консьюмер auth_svc #{index} остановлен")
+
+
+@dataclass
+class _Child:
+    index: int
+    process: Any = None
+    started_at: float = 0.0
+    restarts: int = 0
+    backoff_sec: float = 0.0
+    restart_at: float = 0.0
+    report: Dict[str, Any] = field(default_factory=dict)
+
+
+class ConsumerSupervisor:
+    """
+    Держит N процессов-консьюмеров auth_svc (по умолчанию по числу ядер):
+    каждый со своим event loop, шиной, пулом БД и Redis и со всеми слушателями
+    auth_svc_main. RabbitMQ раздаёт сообщения между ними, поэтому логины
+    (bcrypt) масштабируются по ядрам.
+
+    Упавший процесс перезапускается; если он не прожил и _STABLE_AFTER_SEC,
+    пауза перед рестартом растёт вдвое (до max_backoff_sec). Процессы раз в
+    report_sec присылают отчёт, из которого собирается health().
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        *,
+        target: Callable[..., None] = consumer_main,
+        report_sec: float = 5.0,
+        max_backoff_sec: float = 30.0,
+    ):
+        self.processes = max(1, int(processes))
+        self.target = target
+        self.report_sec = float(report_sec)
+        self.max_backoff_sec = float(max_backoff_sec)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._reports = self._ctx.Queue()
+        self._children: List[_Child] = [_Child(index=i) for i in range(self.processes)]
+        self._stopping = False
+
+    def start(self) -> None:
+        for child in self._children:
+            self._spawn(child)
+        logger.info(f"🧵 ConsumerSupervisor: запущено {self.processes} консьюмеров")
+
+    def _spawn(self, child: _Child) -> None:
+        child.process = self._ctx.Process(
+            target=self.target,
+            args=(child.index, self._reports, self.report_sec),
+            name=f"auth-consumer-{child.index}",
+            daemon=False,
+        )
+        child.process.start()
+        child.started_at = time.monotonic()
+        child.report = {}
+
+    def poll(self, now: Optional[float] = None) -> None:
+        """Забирает отчёты и перезапускает упавшие процессы."""
+        now = time.monotonic() if now is None else now
+        while True:
+            try:
+                report = self._reports.get_nowait()
+            except queue.Empty:
+                break
+            index = report.get("index")
+            if isinstance(index, int) and 0 <= index < len(self._children):
+                self._children[index].report = report
+
+        if self._stopping:
+            return
+        for child in self._children:
+            if child.process is None or child.process.is_alive():
+                continue
+            if child.restart_at == 0.0:
+                lived = now - child.started_at
+                if lived < _STABLE_AFTER_SEC:
+                    child.backoff_sec = min(
+                        self.max_backoff_sec, max(1.0, child.backoff_sec * 2)
+                    )
+                else:
+                    child.backoff_sec = 0.0
+                child.restart_at = now + child.backoff_sec
+                logger.error(
+                    f"💥 Консьюмер #{child.index} (pid={child.process.pid}) завершился "
+                    f"с кодом {child.process.exitcode}; рестарт через {child.backoff_sec:.0f} с"
+                )
+            if now >= child.restart_at:
+                child.restart_at = 0.0
+                child.restarts += 1
+                self._spawn(child)
+
+    async def run(self, interval_sec: float = 0.5) -> None:
+        while True:
+            self.poll()
+            await asyncio.sleep(interval_sec)
+
+    async def stop(self, timeout_sec: float = 30.0) -> None:
+        """SIGTERM всем, ждём штатной остановки, оставшихся добиваем."""
+        self._stopping = True
+        alive = [
+            c.process for c in self._children if c.process and c.process.is_alive()
+        ]
+        for process in alive:
+            process.terminate()
+        deadline = time.monotonic() + timeout_sec
+        while any(p.is_alive() for p in alive) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        for process in alive:
+            if process.is_alive():
+                logger.warning(f"⚠️ Консьюмер pid={process.pid} не остановился, kill")
+                process.kill()
+            process.join(timeout=1.0)
+        logger.info("🧵 ConsumerSupervisor остановлен")
+
+    def health(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Сводка по процессам: живые, готовые (свежий отчёт и связь с брокером), рестарты."""
+        now = time.time() if now is None else now
+        stale_after = self.report_sec * 3
+        children = []
+        # Готовых процессов, чей пул bcrypt ещё принимает логины
+        login_capacity = 0
+        hashing = {"in_flight": 0, "waiting": 0, "hashes": 0, "rejected": 0}
+        for child in self._children:
+            alive = bool(child.process and child.process.is_alive())
+            report = child.report
+            age = now - report["at"] if report else None
+            ready = (
+                alive
+                and bool(report.get("ready"))
+                and age is not None
+                and age <= stale_after
+            )
+            stats = report.get("password_hashing") or {}
+            if ready and not stats.get("overloaded", False):
+                login_capacity += 1
+            hashing["in_flight"] += stats.get("in_flight", 0)
+            hashing["waiting"] += stats.get("waiting", 0)
+            hashing["hashes"] += (stats.get("hash_time") or {}).get("count", 0)
+            hashing["rejected"] += stats.get("rejected", 0)
+            children.append(
+                {
+                    "index": child.index,
+                    "pid": child.process.pid if child.process else None,
+                    "alive": alive,
+                    "ready": ready,
+                    "restarts": child.restarts,
+                    "report_age_sec": round(age, 1) if age is not None else None,
+                    "password_hashing": stats,
+                }
+            )
+        return {
+            "processes": self.processes,
+            "alive": sum(c["alive"] for c in children),
+            "ready": sum(c["ready"] for c in children),
+            "restarts": sum(c.restarts for c in self._children),
+            "login_capacity": login_capacity,
+            "password_hashing": hashing,
+            "children": children,
+        }
+
+
+async def _serve(processes: int, host: str, port: int) -> None:
+    import uvicorn
+
+    from apps.auth_svc.auth_svc_main import create_app
+
+    app = create_app(consumers=False)
+    settings = app.state.settings
+    processes = processes or settings.AUTH_CONSUMER_PROCESSES or os.cpu_count() or 1
+    supervisor = ConsumerSupervisor(
+        processes, report_sec=settings.AUTH_CONSUMER_REPORT_SEC
+    )
+    app.state.runner = supervisor
+    supervisor.start()
+    watcher = asyncio.create_task(supervisor.run())
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, access_log=False))
+    try:
+        # uvicorn сам ловит SIGTERM/SIGINT и выходит из serve()
+        await server.serve()
+    finally:
+        watcher.cancel()
+        await supervisor.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="auth_svc: N процессов-консьюмеров + HTTP"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="число процессов-консьюмеров (0 — AUTH_CONSUMER_PROCESSES)",
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+    asyncio.run(_serve(args.processes, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
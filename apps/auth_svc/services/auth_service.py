@@ -3,7 +3,9 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 import logging
 import os
+import time
 import uuid
+from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.exc import IntegrityError
@@ -13,12 +15,15 @@ from libs.domain.orm.auth import Account
 from libs.domain.dto.auth import RegisterRequest, IssueTokenRequest
 from libs.app.errors import ErrorCode
 from libs.infra.central_redis_client import CentralRedisClient
+from libs.infra.revocation import RevocationPublisher
 from ..db.auth_repository import AuthRepository, revoke_token
-from ..utils.password_manager import PasswordManager
+from ..utils.password_manager import PasswordHasherOverloaded, PasswordManager
 from ..utils.jwt_manager import JwtManager
+from ..utils.login_attempts import LoginAttempts
+from ..utils.login_throttle import LoginThrottle
 
 # --- ИСПРАВЛЕННЫЙ ИМПОРТ ---
-from libs.utils.redis_keys import key_auth_failed_attempts, key_auth_ban
+from libs.utils.redis_keys import key_auth_ban
 from apps.auth_svc.config.settings_auth import AuthServiceSettings
 
 log = logging.getLogger(__name__)
@@ -31,6 +36,15 @@ BRUTEFORCE_WINDOW_TTL_SEC = int(
 )  # 5 минут
 
 
+def overload_retry_after(service: "AuthService", error: Optional[str]) -> Optional[int]:
+    """retry_after для ответа RPC, если отказ — из-за перегрузки или лимита попыток."""
+    if error == ErrorCode.AUTH_OVERLOADED:
+        return service.password_manager.retry_after()
+    if error == ErrorCode.AUTH_RATE_LIMITED and service.login_throttle is not None:
+        return service.login_throttle.window_sec
+    return None
+
+
 class AuthService:
     """
     Сервисный слой, содержащий бизнес-логику аутентификации.
@@ -43,11 +57,24 @@ class AuthService:
         password_manager: PasswordManager,
         redis: CentralRedisClient,
         settings: AuthServiceSettings,  # <--- Добавляем settings
+        revocations: Optional[RevocationPublisher] = None,
+        login_throttle: Optional[LoginThrottle] = None,
     ):
         self.session_factory = session_factory
         self.jwt_manager = jwt_manager
         self.password_manager = password_manager
         self.redis = redis
+        # Отзыв access-токенов на узлах, проверяющих их локально (gateway)
+        self.revocations = revocations
+        # Лимиты на подбор паролей по IP/подсети/потоку неудач
+        self.login_throttle = login_throttle
+        # Счётчик неудач по пользователю — атомарный Lua-скрипт
+        self.login_attempts = LoginAttempts(
+            redis,
+            max_attempts=BRUTEFORCE_MAX_ATTEMPTS,
+            window_sec=BRUTEFORCE_WINDOW_TTL_SEC,
+            ban_sec=BRUTEFORCE_LOCK_TTL_SEC,
+        )
         # Используем значения из settings вместо os.getenv()
         self.access_token_expires = timedelta(seconds=settings.AUTH_ACCESS_TTL)
         self.refresh_token_expires = timedelta(seconds=settings.AUTH_REFRESH_TTL)
@@ -55,6 +82,8 @@ class AuthService:
     async def register(
         self, dto: RegisterRequest
     ) -> tuple[Account | None, ErrorCode | None]:
+        if self.password_manager.overloaded:
+            return None, ErrorCode.AUTH_OVERLOADED
         async with self.session_factory() as session:
             repo = AuthRepository(session)
             try:
@@ -64,7 +93,7 @@ class AuthService:
                 ):
                     return None, ErrorCode.AUTH_USER_EXISTS
 
-                hashed_password = self.password_manager.hash_password(dto.password)
+                hashed_password = await self.password_manager.hash(dto.password)
                 new_account = await repo.create_account(dto, hashed_password)
                 await session.commit()
 
@@ -78,6 +107,9 @@ class AuthService:
                 )
 
                 return new_account, None
+            except PasswordHasherOverloaded:
+                await session.rollback()
+                return None, ErrorCode.AUTH_OVERLOADED
             except IntegrityError as e:
                 await session.rollback()
                 if isinstance(e.orig, UniqueViolationError):
@@ -112,7 +144,20 @@ class AuthService:
             log.warning(f"Bruteforce attempt rejected for banned user: {dto.username}")
             return None, ErrorCode.AUTH_FORBIDDEN
 
-        attempts_key = key_auth_failed_attempts(dto.username)
+        # Очередь на bcrypt полна — отказываем до похода в БД и хеширования,
+        # чтобы перегрузка не копилась до таймаутов RPC
+        if self.password_manager.overloaded:
+            return None, ErrorCode.AUTH_OVERLOADED
+
+        # Подбор с одного IP/подсети отсекаем тоже до БД и bcrypt
+        if self.login_throttle is not None:
+            decision = await self.login_throttle.check(dto.client_ip)
+            if not decision.allowed:
+                log.warning(
+                    f"Login throttled: ip={dto.client_ip} by {decision.reason}"
+                    f"{' (under attack)' if decision.under_attack else ''}"
+                )
+                return None, ErrorCode.AUTH_RATE_LIMITED
 
         # --- Шаг 2: Идем в базу данных ---
         async with self.session_factory() as session:
@@ -120,29 +165,24 @@ class AuthService:
             account = await repo.get_by_username(dto.username)
 
             # --- Шаг 3: Проверяем пароль ---
-            if (
-                not account
-                or not account.credentials
-                or not self.password_manager.verify_password(
-                    dto.password, account.credentials.password_hash
+            try:
+                password_ok = bool(
+                    account
+                    and account.credentials
+                    and await self.password_manager.verify(
+                        dto.password, account.credentials.password_hash
+                    )
                 )
-            ):
+            except PasswordHasherOverloaded:
+                return None, ErrorCode.AUTH_OVERLOADED
+            if not password_ok:
                 # --- ЛОГИКА ПРИ НЕУДАЧЕ ---
-                # Увеличиваем счетчик неудачных попыток
+                if self.login_throttle is not None:
+                    await self.login_throttle.record_failure()
+                # Учитываем неудачу и при превышении лимита баним — одним вызовом
                 if self.redis.redis is not None:
-                    attempts = await self.redis.redis.incr(attempts_key)  # type: ignore
-                    # Если это первая неудачная попытка, ставим TTL на "окно"
-                    if attempts == 1:
-                        await self.redis.redis.expire(
-                            attempts_key, BRUTEFORCE_WINDOW_TTL_SEC
-                        )
-
-                    # Если превысили лимит, баним пользователя
-                    if attempts >= BRUTEFORCE_MAX_ATTEMPTS:
-                        await self.redis.set(ban_key, "1", ex=BRUTEFORCE_LOCK_TTL_SEC)
-                        await self.redis.delete(
-                            attempts_key
-                        )  # Удаляем счетчик, т.к. есть бан
+                    failure = await self.login_attempts.record_failure(dto.username)
+                    if failure.banned and failure.attempts:
                         log.warning(
                             f"User {dto.username} has been banned for {BRUTEFORCE_LOCK_TTL_SEC}s due to bruteforce."
                         )
@@ -152,7 +192,7 @@ class AuthService:
             # --- ЛОГИКА ПРИ УСПЕХЕ ---
             # Сбрасываем счетчик неудачных попыток
             if self.redis is not None:
-                await self.redis.delete(attempts_key)
+                await self.login_attempts.reset(dto.username)
 
             # Выдаем пару токенов
             _access_token, response_data = await self.issue_token_pair(repo, account)
@@ -183,6 +223,8 @@ class AuthService:
             if old_token.token_hash != expected_hash:
                 return None, ErrorCode.AUTH_REFRESH_INVALID
 
+            # После commit атрибуты ORM-объекта истекают — читаем заранее
+            account_id = old_token.account_id
             await revoke_token(old_token)
 
             _access_token, response_data = await self.issue_token_pair(
@@ -190,7 +232,9 @@ class AuthService:
             )
 
             await session.commit()
-            return response_data, None
+        # Ротация: access-токены прежней пары больше не действуют
+        await self._revoke_session(str(jti), account_id)
+        return response_data, None
 
     async def logout(self, refresh_token_str: str) -> ErrorCode | None:
         """Отзывает refresh-токен."""
@@ -202,10 +246,35 @@ class AuthService:
             repo = AuthRepository(session)
             jti = uuid.UUID(payload["jti"])
             token_to_revoke = await repo.get_refresh_token_by_jti(jti)
-            if token_to_revoke:
-                await revoke_token(token_to_revoke)
-                await session.commit()
-            return None
+            if not token_to_revoke:
+                return None
+            account_id = token_to_revoke.account_id
+            await revoke_token(token_to_revoke)
+            await session.commit()
+        await self._revoke_session(str(jti), account_id)
+        return None
+
+    async def revoke_account_tokens(self, account_id: int) -> None:
+        """Отзывает все выданные аккаунту access-токены (например, при бане)."""
+        if self.revocations is not None:
+            await self.revocations.revoke_account(account_id)
+            log.info(
+                "Account tokens revoked",
+                extra={"audit": True, "event": "revoke_all", "account_id": account_id},
+            )
+
+    async def _revoke_session(self, sid: str, account_id: int) -> None:
+        if self.revocations is None:
+            return
+        try:
+            await self.revocations.revoke_session(
+                sid,
+                account_id,
+                exp=time.time() + self.access_token_expires.total_seconds(),
+            )
+        except Exception:
+            # Refresh-токен уже отозван в БД; access-токен доживёт до exp
+            log.exception(f"Failed to publish session revocation sid={sid}")
 
     async def issue_token_pair(
         self, repo: AuthRepository, account: Account
@@ -214,16 +283,17 @@ class AuthService:
         Вспомогательный метод для создания и сохранения пары токенов.
         Возвращает (access_token, dict_для_ответа_клиенту).
         """
-        # 1. Создаем access-токен
+        # 1. Создаем refresh-токен: его jti — идентификатор сессии (sid)
+        refresh_token_str, jti = self.jwt_manager.create_refresh_token(
+            account_id=account.id, expires_delta=self.refresh_token_expires
+        )
+
+        # 2. Создаем access-токен, привязанный к сессии
         access_token = self.jwt_manager.create_access_token(
             account_id=account.id,
             username=account.username,
             expires_delta=self.access_token_expires,
-        )
-
-        # 2. Создаем refresh-токен
-        refresh_token_str, jti = self.jwt_manager.create_refresh_token(
-            account_id=account.id, expires_delta=self.refresh_token_expires
+            session_id=str(jti),
         )
 
         # 3. Сохраняем хеш refresh-токена в БД
@@ -3,11 +3,18 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 import jwt
 
+from libs.utils.jwt_keys import KeyRing, resolve_verification_key
+
 
 class JwtManager:
-    """Утилита для создания и валидации JWT."""
+    """
+    Утилита для создания и валидации JWT.
+    С keyring токены подписываются активным ключом (EdDSA/ES256) с kid в заголовке,
+    без него — общим секретом.
+    """
 
     def __init__(
         self,
@@ -15,16 +22,30 @@ class JwtManager:
         algorithm: str = "HS256",
         issuer: str = "auth_svc",
         audience: str = "game-clients",
+        keyring: Optional[KeyRing] = None,
     ):
         self.secret = secret
         self.algorithm = algorithm
         self.issuer = issuer
         self.audience = audience
+        self.keyring = keyring
+
+    def _encode(self, payload: dict) -> str:
+        if self.keyring is not None:
+            key = self.keyring.active
+            return jwt.encode(
+                payload, key.sign_key, algorithm=key.algorithm, headers={"kid": key.kid}
+            )
+        return jwt.encode(payload, self.secret, algorithm=self.algorithm)
 
     def create_access_token(
-        self, account_id: int, username: str, expires_delta: timedelta
+        self,
+        account_id: int,
+        username: str,
+        expires_delta: timedelta,
+        session_id: Optional[str] = None,
     ) -> str:
-        """Создает новый access-токен."""
+        """Создает новый access-токен (sid — сессия для отзыва)."""
         now = datetime.now(timezone.utc)
         expire = now + expires_delta
 
@@ -36,7 +57,9 @@ class JwtManager:
             "iss": self.issuer,
             "aud": self.audience,
         }
-        return jwt.encode(payload, self.secret, algorithm=self.algorithm)
+        if session_id is not None:
+            payload["sid"] = session_id
+        return self._encode(payload)
 
     def create_refresh_token(
         self, account_id: int, expires_delta: timedelta
@@ -54,15 +77,18 @@ class JwtManager:
             "aud": "game_clients_refresh",  # Другая аудитория для refresh
             "jti": str(jti),  # Уникальный ID токена
         }
-        return jwt.encode(payload, self.secret, algorithm=self.algorithm), jti
+        return self._encode(payload), jti
 
     def decode_token(self, token: str) -> dict | None:
         """Декодирует токен, возвращая payload при успехе."""
         try:
+            key, algorithms = resolve_verification_key(
+                token, self.keyring, self.secret, [self.algorithm]
+            )
             return jwt.decode(
                 token,
-                self.secret,
-                algorithms=[self.algorithm],
+                key,
+                algorithms=algorithms,
                 audience=["game_clients", "game_clients_refresh"],
             )
         except jwt.PyJWTError:
@@ -0,0 +1,73 @@
+# apps/auth_svc/utils/login_attempts.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from libs.infra.central_redis_client import CentralRedisClient, RedisScript
+from libs.utils.redis_keys import key_auth_ban, key_auth_failed_attempts
+
+# KEYS[1] — счётчик неудач, KEYS[2] — флаг бана
+# ARGV[1] — лимит попыток, ARGV[2] — окно счётчика (сек), ARGV[3] — срок бана (сек)
+# Возвращает {попыток, забанен (0/1)}
+RECORD_FAILURE_SCRIPT = RedisScript(
+    name="auth_login_record_failure",
+    source="""
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return {0, 1}
+end
+local attempts = redis.call('INCR', KEYS[1])
+if attempts == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+if attempts >= tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[2], '1', 'EX', ARGV[3])
+    redis.call('DEL', KEYS[1])
+    return {attempts, 1}
+end
+return {attempts, 0}
+""",
+)
+
+
+@dataclass(slots=True)
+class FailureResult:
+    attempts: int
+    banned: bool
+
+
+class LoginAttempts:
+    """
+    Счётчик неудачных логинов по пользователю с баном при превышении лимита.
+
+    Проверка бана, INCR, TTL окна и выставление бана — один Lua-скрипт, то есть
+    один round trip и никаких гонок между параллельными неудачами: раньше это
+    были до пяти отдельных команд, и две одновременные попытки могли обе
+    пройти мимо порога или перезаписать бан.
+    """
+
+    def __init__(
+        self,
+        redis: CentralRedisClient,
+        *,
+        max_attempts: int,
+        window_sec: int,
+        ban_sec: int,
+    ):
+        self.redis = redis
+        self.max_attempts = int(max_attempts)
+        self.window_sec = int(window_sec)
+        self.ban_sec = int(ban_sec)
+        redis.register_script(RECORD_FAILURE_SCRIPT)
+
+    async def record_failure(self, username: str) -> FailureResult:
+        """Учитывает неудачу; banned=True — пользователь (уже) забанен."""
+        attempts, banned = await self.redis.run_script(
+            RECORD_FAILURE_SCRIPT,
+            keys=[key_auth_failed_attempts(username), key_auth_ban(username)],
+            args=[self.max_attempts, self.window_sec, self.ban_sec],
+        )
+        return FailureResult(attempts=int(attempts), banned=bool(int(banned)))
+
+    async def reset(self, username: str) -> None:
+        """Успешный вход — счётчик неудач сбрасывается."""
+        await self.redis.delete(key_auth_failed_attempts(username))
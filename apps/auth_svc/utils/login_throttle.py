@@ -0,0 +1,153 @@
+# apps/auth_svc/utils/login_throttle.py
+from __future__ import annotations
+
+import ipaddress
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from libs.infra.central_redis_client import CentralRedisClient
+from libs.utils.logging_setup import app_logger as logger
+from libs.utils.redis_keys import (
+    key_auth_login_global_failures,
+    key_auth_login_ip,
+    key_auth_login_subnet,
+)
+
+# Причины отказа (в логи)
+REASON_IP = "ip"
+REASON_SUBNET = "subnet"
+
+# Команд pipeline на одно окно IP/подсети в check()
+_OPS_PER_KEY = 5
+
+
+@dataclass(slots=True)
+class ThrottleDecision:
+    allowed: bool
+    reason: Optional[str] = None
+    retry_after: int = 0
+    # Глобальный поток неудачных логинов выше порога: лимиты ужесточены
+    under_attack: bool = False
+
+
+def subnet_of(ip: str) -> Optional[str]:
+    """Подсеть адреса: /24 для IPv4, /64 для IPv6 (None — не IP)."""
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return None
+    prefix = 24 if addr.version == 4 else 64
+    return str(ipaddress.ip_network(f"{addr}/{prefix}", strict=False))
+
+
+class LoginThrottle:
+    """
+    Отсев подбора паролей до похода в БД и bcrypt: скользящие окна в Redis
+    (zset с отметками времени) на попытки с IP и с его подсети и на неудачные
+    логины по всему сервису.
+
+    check() — один pipeline: чистит окна, записывает попытку и считает всё
+    сразу. Пока неудач в окне не меньше global_fail_limit (распределённый
+    credential stuffing), лимиты на IP/подсеть умножаются на attack_factor.
+    Лимит 0 — проверка выключена. Недоступный Redis не блокирует логины.
+    """
+
+    def __init__(
+        self,
+        redis: CentralRedisClient,
+        *,
+        window_sec: int = 60,
+        ip_limit: int = 20,
+        subnet_limit: int = 100,
+        global_fail_limit: int = 1000,
+        attack_factor: float = 0.25,
+    ):
+        self.redis = redis
+        self.window_sec = max(1, int(window_sec))
+        self.ip_limit = int(ip_limit)
+        self.subnet_limit = int(subnet_limit)
+        self.global_fail_limit = int(global_fail_limit)
+        self.attack_factor = min(1.0, max(0.0, float(attack_factor)))
+        self.rejected = 0
+
+    def _limits(self, under_attack: bool) -> Tuple[int, int]:
+        if not under_attack:
+            return self.ip_limit, self.subnet_limit
+        return (
+            max(1, int(self.ip_limit * self.attack_factor)) if self.ip_limit else 0,
+            max(1, int(self.subnet_limit * self.attack_factor))
+            if self.subnet_limit
+            else 0,
+        )
+
+    async def check(
+        self, client_ip: Optional[str], now: Optional[float] = None
+    ) -> ThrottleDecision:
+        """Учитывает попытку логина и решает, пускать ли её к bcrypt."""
+        if not client_ip:
+            return ThrottleDecision(allowed=True)
+        now = time.time() if now is None else now
+        since = now - self.window_sec
+        member = f"{now:.6f}:{uuid.uuid4().hex[:8]}"
+
+        keys: List[Tuple[str, str]] = []
+        if self.ip_limit:
+            keys.append((REASON_IP, key_auth_login_ip(client_ip)))
+        subnet = subnet_of(client_ip)
+        if self.subnet_limit and subnet:
+            keys.append((REASON_SUBNET, key_auth_login_subnet(subnet)))
+
+        pipe = self.redis.pipeline()
+        for reason, key in keys:
+            pipe.zremrangebyscore(key, 0, since)
+            pipe.zadd(key, {member: now})
+            pipe.zcard(key)
+            pipe.expire(key, self.window_sec)
+            # Для решения хватает limit+1 последних отметок — память не растёт под атакой
+            base = self.ip_limit if reason == REASON_IP else self.subnet_limit
+            pipe.zremrangebyrank(key, 0, -(base + 2))
+        if self.global_fail_limit:
+            fail_key = key_auth_login_global_failures()
+            pipe.zremrangebyscore(fail_key, 0, since)
+            pipe.zcard(fail_key)
+        try:
+            results: List[Any] = await pipe.execute()
+        except Exception as e:
+            logger.warning(
+                f"⚠️ LoginThrottle: Redis недоступен, пропускаем проверку: {e}"
+            )
+            return ThrottleDecision(allowed=True)
+
+        under_attack = bool(
+            self.global_fail_limit and int(results[-1]) >= self.global_fail_limit
+        )
+        ip_limit, subnet_limit = self._limits(under_attack)
+        limit_by_reason = {REASON_IP: ip_limit, REASON_SUBNET: subnet_limit}
+        for i, (reason, _) in enumerate(keys):
+            count = int(results[i * _OPS_PER_KEY + 2])
+            if count > limit_by_reason[reason]:
+                self.rejected += 1
+                return ThrottleDecision(
+                    allowed=False,
+                    reason=reason,
+                    retry_after=self.window_sec,
+                    under_attack=under_attack,
+                )
+        return ThrottleDecision(allowed=True, under_attack=under_attack)
+
+    async def record_failure(self, now: Optional[float] = None) -> None:
+        """Неудачный логин — в глобальное окно неудач."""
+        if not self.global_fail_limit:
+            return
+        now = time.time() if now is None else now
+        key = key_auth_login_global_failures()
+        pipe = self.redis.pipeline()
+        pipe.zadd(key, {f"{now:.6f}:{uuid.uuid4().hex[:8]}": now})
+        pipe.zremrangebyrank(key, 0, -(self.global_fail_limit + 2))
+        pipe.expire(key, self.window_sec)
+        try:
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ LoginThrottle: не удалось записать неудачу: {e}")
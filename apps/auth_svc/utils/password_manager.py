@@ -1,30 +1,235 @@
 # apps/auth_svc/utils/password_manager.py
+import asyncio
 import hashlib
+import math
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, TypeVar
 
 import bcrypt
 
+from libs.utils.logging_setup import app_logger as logger
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class _Timing:
+    """Сводка по длительностям: число замеров, сумма и максимум (секунды)."""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.average * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class PasswordHasherOverloaded(Exception):
+    """Очередь на bcrypt заполнена: запрос отклонён до начала работы."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Password hashing overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
 
 class PasswordManager:
-    """Утилита для работы с паролями."""
+    """
+    Утилита для работы с паролями.
 
-    @staticmethod
-    def hash_password(password: str) -> str:
-        """Hash пароль с использованием bcrypt."""
-        # Получаем rounds из ENV, по умолчанию 12
-        rounds = int(os.getenv("AUTH_PASSWORD_BCRYPT_ROUNDS", "12"))
+    bcrypt на rounds=12 — это ~250 мс CPU, поэтому async-методы hash/verify
+    считают его в пуле потоков (bcrypt отпускает GIL, потоки грузят все ядра),
+    а event loop тем временем обслуживает остальных консьюмеров, health и Redis.
+
+    Одновременно считается не больше workers хешей; ещё queue_budget вызовов
+    ждут слот, остальные сразу получают PasswordHasherOverloaded с retry_after.
+    calibrate() замеряет хеш на этом железе и подбирает queue_budget так, чтобы
+    ожидание в очереди не превышало max_wait_ms. Слушатели ставят prefetch
+    больше max_pending (на reject_headroom): иначе брокер никогда не отдал бы
+    сообщение, которое пора отклонить, и лишние логины ждали бы в очереди
+    до таймаута RPC.
+    """
+
+    def __init__(
+        self,
+        rounds: Optional[int] = None,
+        *,
+        workers: int = 0,
+        max_pending: int = 0,
+        max_wait_ms: float = 1000.0,
+        reject_headroom: int = 0,
+    ):
+        self.rounds = (
+            int(rounds)
+            if rounds is not None
+            else int(os.getenv("AUTH_PASSWORD_BCRYPT_ROUNDS", "12"))
+        )
+        # 0 — по числу ядер
+        self.workers = int(workers) or (os.cpu_count() or 1)
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        # Явный max_pending важнее калибровки
+        self._explicit_pending = int(max_pending)
+        # Сообщений сверх ёмкости, которые берём из брокера ради быстрого отказа
+        # (0 — ещё max_pending)
+        self._reject_headroom = max(0, int(reject_headroom))
+        # Медианное время одного хеша (сек); None — калибровки не было
+        self.hash_latency: Optional[float] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = asyncio.Semaphore(self.workers)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        # queue — от вызова до старта в потоке, hash — сам bcrypt
+        self.queue_time = _Timing()
+        self.hash_time = _Timing()
+        self._apply_budget()
+
+    def _apply_budget(self) -> None:
+        if self._explicit_pending:
+            self.max_pending = max(self.workers, self._explicit_pending)
+        elif self.hash_latency:
+            # Сколько "волн" пула успеет пройти за max_wait
+            waves = int(self.max_wait / self.hash_latency)
+            self.max_pending = self.workers * (1 + waves)
+        else:
+            # Без калибровки — очередь на пару "волн" пула
+            self.max_pending = self.workers * 4
+        self.queue_budget = self.max_pending - self.workers
+
+    def calibrate(self, samples: int = 3) -> float:
+        """
+        Замеряет bcrypt с текущими rounds в вызывающем потоке (блокирует —
+        вызывать при старте через asyncio.to_thread) и пересчитывает бюджет очереди.
+        """
+        timings = []
+        for _ in range(max(1, int(samples))):
+            started = time.perf_counter()
+            self.hash_password("calibration")
+            timings.append(time.perf_counter() - started)
+        self.hash_latency = sorted(timings)[len(timings) // 2]
+        self._apply_budget()
+        logger.info(
+            f"🔐 Калибровка bcrypt rounds={self.rounds}: "
+            f"{self.hash_latency * 1000:.0f} мс/хеш, параллельно {self.workers}, "
+            f"очередь {self.queue_budget} (ожидание ≤{self.max_wait * 1000:.0f} мс)"
+        )
+        return self.hash_latency
+
+    @property
+    def prefetch(self) -> int:
+        """prefetch для слушателей, которые хешируют пароли."""
+        return self.max_pending + (self._reject_headroom or self.max_pending)
+
+    @property
+    def overloaded(self) -> bool:
+        """Новый хеш сейчас был бы отклонён: все потоки заняты и очередь полна."""
+        return self.in_flight >= self.workers and self.waiting >= self.queue_budget
+
+    def retry_after(self) -> int:
+        """Оценка (сек), когда очередь продвинется настолько, что вызов примут."""
+        latency = self.hash_latency or self.hash_time.average or 0.25
+        waves = (self.waiting + 1) / self.workers + 1
+        return max(1, math.ceil(waves * latency))
+
+    def hash_password(self, password: str) -> str:
+        """Hash пароль с использованием bcrypt (синхронно, блокирует поток)."""
         pwd_bytes = password.encode("utf-8")
-        salt = bcrypt.gensalt(rounds=rounds)
+        salt = bcrypt.gensalt(rounds=self.rounds)
         hashed_password = bcrypt.hashpw(pwd_bytes, salt)
         return hashed_password.decode("utf-8")
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Проверяет, соответствует ли plain-пароль хешу."""
+        """Проверяет, соответствует ли plain-пароль хешу (синхронно)."""
         password_bytes = plain_password.encode("utf-8")
         hashed_password_bytes = hashed_password.encode("utf-8")
         return bcrypt.checkpw(password_bytes, hashed_password_bytes)
 
+    async def hash(self, password: str) -> str:
+        """hash_password в пуле, не блокируя event loop."""
+        return await self._run(self.hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password в пуле, не блокируя event loop."""
+        return await self._run(self.verify_password, plain_password, hashed_password)
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.overloaded:
+            self.rejected += 1
+            raise PasswordHasherOverloaded(self.retry_after())
+        submitted = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool(), self._timed, submitted, fn, *args
+            )
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def _timed(self, submitted: float, fn: Callable[..., T], *args: Any) -> T:
+        # Выполняется в потоке пула; += на float под GIL здесь достаточно для метрик
+        started = time.monotonic()
+        self.queue_time.observe(started - submitted)
+        try:
+            return fn(*args)
+        finally:
+            self.hash_time.observe(time.monotonic() - started)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+            logger.info(
+                f"🔐 PasswordManager: bcrypt rounds={self.rounds}, "
+                f"потоков={self.workers}, очередь≤{self.max_pending}"
+            )
+        return self._executor
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queue_budget": self.queue_budget,
+            "prefetch": self.prefetch,
+            "calibrated_hash_ms": (
+                round(self.hash_latency * 1000, 2) if self.hash_latency else None
+            ),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "overloaded": self.overloaded,
+            "queue_time": self.queue_time.to_dict(),
+            "hash_time": self.hash_time.to_dict(),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
     @staticmethod
     def hash_refresh_token(token: str) -> str:
         """Создает SHA-256 хеш от refresh-токена для хранения в БД."""
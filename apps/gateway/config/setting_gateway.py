@@ -1,7 +1,10 @@
 # apps/gateway/config/setting_gateway.py
-from typing import List
+from typing import List, Optional
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from libs.messaging.rabbitmq_names import is_valid_queue_name_part
+
 
 class GatewaySettings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -13,8 +16,142 @@ class GatewaySettings(BaseSettings):
     GATEWAY_CORS_ALLOWED_ORIGINS: List[str] = ["*"]
     GATEWAY_WS_PING_INTERVAL: int = 30
     GATEWAY_WS_IDLE_TIMEOUT: int = 120
+    # Шаг колеса idle-таймеров (сек): точность срабатывания idle-таймаута
+    GATEWAY_WS_IDLE_TICK_SEC: float = 1.0
+    # Сжатие кадров (субпротоколы "<формат>.deflate" / "<формат>.deflate-ctx")
+    GATEWAY_WS_DEFLATE_ENABLED: bool = True
+    # Кадры меньше порога уходят несжатыми: на мелких кадрах deflate только тратит CPU
+    GATEWAY_WS_DEFLATE_THRESHOLD_BYTES: int = 512
+    GATEWAY_WS_DEFLATE_LEVEL: int = Field(6, ge=1, le=9)
+    # Размер окна 2**bits: меньше — меньше памяти на соединение с context takeover
+    GATEWAY_WS_DEFLATE_WINDOW_BITS: int = Field(15, ge=9, le=15)
+    GATEWAY_WS_DEFLATE_MEM_LEVEL: int = Field(8, ge=1, le=9)
+    # Разрешать ли клиентам вариант с общим контекстом между кадрами
+    GATEWAY_WS_DEFLATE_CONTEXT_TAKEOVER: bool = True
+    # Дельта-кодирование обновлений сущностей (envelope.entity_key + state_version)
+    GATEWAY_WS_DELTA_ENABLED: bool = True
+    # Максимум хранимых снимков (соединение, сущность); сверх — вытеснение по LRU
+    GATEWAY_WS_DELTA_MAX_ENTRIES: int = 100_000
+    # Если версия прыгнула больше чем на столько — шлём полный снимок
+    GATEWAY_WS_DELTA_MAX_GAP: int = 1
+    # Максимум неотправленных кадров в очереди соединения; сверх — отключаем клиента
+    GATEWAY_WS_MAX_OUTBOX: int = 1024
+    # Батчинг кадров в WSBatchFrame для клиентов с ?batch=1
+    GATEWAY_WS_BATCH_WINDOW_MS: float = 5.0
+    GATEWAY_WS_BATCH_MAX_FRAMES: int = 64
+    # Возобновление WS-сессий после обрыва (resume_token в hello)
+    GATEWAY_WS_RESUME_ENABLED: bool = True
+    # Сколько секунд сессия ждёт переподключения, копя кадры
+    GATEWAY_WS_RESUME_GRACE_SEC: float = 30.0
+    # Размер кольцевого буфера последних кадров на сессию
+    GATEWAY_WS_RESUME_BUFFER_FRAMES: int = 256
+    # Mailbox в Redis для аккаунтов без активных сессий
+    GATEWAY_WS_MAILBOX_TTL_SEC: int = 60
+    GATEWAY_WS_MAILBOX_MAX_FRAMES: int = 100
+    # Допуск соединений до accept (0 — ограничение выключено)
+    # Одновременных handshake (валидация токена) на узел
+    GATEWAY_WS_MAX_HANDSHAKES: int = 256
+    # Token bucket на IP: новых соединений в секунду и размер всплеска
+    GATEWAY_WS_CONNECT_RATE_PER_IP: float = 5.0
+    GATEWAY_WS_CONNECT_BURST_PER_IP: int = 20
+    GATEWAY_WS_MAX_CONNECTIONS: int = 0
+    # Бюджет памяти под соединения и оценка памяти на одно соединение
+    GATEWAY_WS_MEMORY_BUDGET_MB: int = 0
+    GATEWAY_WS_CONN_MEMORY_KB: int = 64
+    # Потолок RSS процесса, после которого новые соединения не принимаются
+    GATEWAY_WS_MAX_RSS_MB: int = 0
+    # Базовая подсказка Retry-After при отказе (с джиттером до x2)
+    GATEWAY_WS_ADMISSION_RETRY_AFTER_SEC: float = 5.0
+    # Token bucket на соединение для входящих кадров: скорость (в сек) и всплеск
+    GATEWAY_WS_RATE_LIMIT_ENABLED: bool = True
+    GATEWAY_WS_RATE_COMMANDS_PER_SEC: float = 20.0
+    GATEWAY_WS_RATE_COMMANDS_BURST: int = 40
+    GATEWAY_WS_RATE_PINGS_PER_SEC: float = 1.0
+    GATEWAY_WS_RATE_PINGS_BURST: int = 5
+    GATEWAY_WS_RATE_SUBSCRIPTIONS_PER_SEC: float = 5.0
+    GATEWAY_WS_RATE_SUBSCRIPTIONS_BURST: int = 20
+    # Штрафов за отброшенные кадры до закрытия (1008); один штраф гаснет за DECAY сек
+    GATEWAY_WS_RATE_STRIKE_LIMIT: int = 50
+    GATEWAY_WS_RATE_STRIKE_DECAY_SEC: float = 1.0
     AUTH_HEADER: str = "Authorization"
+    # Локальная валидация access-токенов (без RPC в auth_svc на каждый handshake).
+    # Ключи — публичные из JWKS auth_svc и/или общий JWT_SECRET (токены без kid);
+    # без подходящего ключа проверка идёт через RPC
+    GATEWAY_LOCAL_TOKEN_VALIDATION: bool = True
+    JWT_SECRET: Optional[str] = None
+    AUTH_JWT_AUD: str = "game-clients"
+    # Например http://auth_svc:8001/.well-known/jwks.json
+    GATEWAY_JWKS_URL: Optional[str] = None
+    # Период фонового обновления JWKS, если сервер не прислал max-age
+    GATEWAY_JWKS_REFRESH_SEC: float = 300.0
+    # Не чаще раза в столько секунд перечитываем JWKS из-за незнакомого kid
+    GATEWAY_JWKS_MIN_REFRESH_SEC: float = 10.0
+    # LRU-кэш результатов валидации: TTL положительных записей (но не дольше exp)
+    # и отрицательных (битый/просроченный токен)
+    GATEWAY_TOKEN_CACHE_ENABLED: bool = True
+    GATEWAY_TOKEN_CACHE_MAX_ENTRIES: int = 10_000
+    GATEWAY_TOKEN_CACHE_TTL_SEC: float = 300.0
+    GATEWAY_TOKEN_CACHE_NEGATIVE_TTL_SEC: float = 5.0
+    # Время жизни access-токена: столько держим в памяти отзыв по аккаунту
+    AUTH_ACCESS_TTL: int = 1800
+    # За сколько секунд до exp токена клиент получает token_expiring (ждём reauth);
+    # в exp соединение закрывается
+    GATEWAY_WS_TOKEN_WARN_SEC: float = 60.0
+    # Reauth-кадры проверяются пачками: окно сбора и максимальный размер пачки
+    GATEWAY_WS_REAUTH_BATCH_WINDOW_MS: float = 10.0
+    GATEWAY_WS_REAUTH_BATCH_MAX: int = 256
+    # Запасные RPC-проверки токенов склеиваются в validate_many за окно (0 — без пачек)
+    GATEWAY_AUTH_RPC_BATCH_WINDOW_MS: float = 5.0
+    GATEWAY_AUTH_RPC_BATCH_MAX: int = 128
+
+    # Команды клиентов по WS -> доменные очереди бекэндов
+    # Пустой список — разрешены любые домены (очередь объявляет сам бекэнд)
+    GATEWAY_WS_COMMAND_DOMAINS: List[str] = []
+    GATEWAY_WS_MAX_INFLIGHT_COMMANDS: int = 32
+    # Через сколько секунд команда без final/error считается зависшей
+    GATEWAY_WS_COMMAND_TIMEOUT_SEC: float = 30.0
+    # Микро-батчинг публикации команд в RabbitMQ
+    GATEWAY_COMMAND_BATCH_SIZE: int = 64
+    GATEWAY_COMMAND_BATCH_WINDOW_MS: float = 2.0
+    # Шарды доменных очередей команд (core.<domain>.queue.commands.<shard>.v1).
+    # Команды с ActorHint распределяются по ним консистентным хешированием;
+    # пустой список — шардирование выключено, всё идёт в общую очередь домена.
+    # Набор читается при старте: все воркеры должны видеть один и тот же, поэтому
+    # меняется только перезапуском (rolling deploy), а не на лету в одном воркере
+    GATEWAY_COMMAND_SHARDS: List[str] = []
+    # Виртуальных узлов на шард: больше — ровнее распределение
+    GATEWAY_COMMAND_SHARD_VNODES: int = 64
+
+    # Несколько воркеров gateway: имя узла (по умолчанию hostname) + pid процесса
+    GATEWAY_NODE_NAME: Optional[str] = None
+    # Реестр соединений и присутствие аккаунтов в Redis: окно пакетной записи
+    # изменений, период heartbeat (продление всех записей одним pipeline) и TTL,
+    # после которого записи упавшего воркера исчезают
+    GATEWAY_NODE_REGISTRY_FLUSH_MS: float = 50.0
+    GATEWAY_PRESENCE_HEARTBEAT_SEC: float = 10.0
+    GATEWAY_NODE_REGISTRY_TTL_SEC: int = 30
+
+    # Drain при SIGTERM или POST /admin/drain: соединения закрываются волнами за окно.
+    # Окно должно укладываться в graceful_timeout gunicorn
+    GATEWAY_DRAIN_WINDOW_SEC: float = 10.0
+    GATEWAY_DRAIN_WAVES: int = 5
+    # Диапазон случайной задержки переподключения, которую получает клиент
+    GATEWAY_DRAIN_RECONNECT_MIN_SEC: float = 1.0
+    GATEWAY_DRAIN_RECONNECT_MAX_SEC: float = 30.0
+    GATEWAY_DRAIN_FLUSH_TIMEOUT_SEC: float = 2.0
+    # Токен для /admin/* (заголовок X-Admin-Token); не задан — эндпоинты выключены
+    GATEWAY_ADMIN_TOKEN: Optional[str] = None
 
     # Настройки подключений
     RABBITMQ_DSN: str
     REDIS_URL: str
+    REDIS_PASSWORD: Optional[str] = None
+
+    @field_validator("GATEWAY_WS_COMMAND_DOMAINS", "GATEWAY_COMMAND_SHARDS")
+    @classmethod
+    def _validate_queue_name_parts(cls, v: List[str]) -> List[str]:
+        # Домен и шард попадают в имя очереди, поэтому допускаем только безопасные символы
+        for part in v:
+            if not is_valid_queue_name_part(part):
+                raise ValueError(f"Недопустимая часть имени очереди команд: {part!r}")
+        return v
@@ -2,6 +2,12 @@
 from fastapi import Request
 from libs.messaging.i_message_bus import IMessageBus
 from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from apps.gateway.gateway.inbound_command_publisher import InboundCommandPublisher
+from apps.gateway.gateway.account_mailbox import AccountMailbox
+from apps.gateway.gateway.admission import AdmissionController
+from apps.gateway.gateway.command_router import CommandRouter
+from apps.gateway.gateway.reauth_batcher import ReauthBatcher
+from apps.gateway.gateway.token_verifier import TokenVerifier
 from apps.gateway.config.setting_gateway import GatewaySettings
 from fastapi import WebSocket
 
@@ -18,6 +24,10 @@ def get_settings(request: Request) -> GatewaySettings:
     return request.app.state.settings
 
 
+def get_token_verifier(request: Request) -> TokenVerifier:
+    return request.app.state.container.token_verifier
+
+
 def get_ws_message_bus(websocket: WebSocket) -> IMessageBus:
     return websocket.app.state.container.bus
 
@@ -28,3 +38,27 @@ def get_ws_client_connection_manager(websocket: WebSocket) -> ClientConnectionMa
 
 def get_ws_settings(websocket: WebSocket) -> GatewaySettings:
     return websocket.app.state.settings
+
+
+def get_ws_command_publisher(websocket: WebSocket) -> InboundCommandPublisher:
+    return websocket.app.state.container.command_publisher
+
+
+def get_ws_mailbox(websocket: WebSocket) -> AccountMailbox:
+    return websocket.app.state.container.mailbox
+
+
+def get_ws_admission(websocket: WebSocket) -> AdmissionController:
+    return websocket.app.state.container.admission
+
+
+def get_ws_command_router(websocket: WebSocket) -> CommandRouter:
+    return websocket.app.state.container.command_router
+
+
+def get_ws_token_verifier(websocket: WebSocket) -> TokenVerifier:
+    return websocket.app.state.container.token_verifier
+
+
+def get_ws_reauth_batcher(websocket: WebSocket) -> ReauthBatcher:
+    return websocket.app.state.container.reauth_batcher
@@ -0,0 +1,53 @@
+# apps/gateway/gateway/account_mailbox.py
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, cast
+
+from pydantic import BaseModel
+
+from libs.infra.central_redis_client import CentralRedisClient
+from libs.utils.logging_setup import app_logger as logger
+from libs.utils.redis_keys import key_ws_mailbox
+
+
+class AccountMailbox:
+    """
+    Короткоживущий почтовый ящик в Redis для кадров аккаунтам без активных
+    WS-сессий. Хранятся последние max_frames кадров не дольше ttl_sec;
+    при новом подключении ящик вычитывается и очищается одним pipeline.
+    """
+
+    def __init__(self, redis: CentralRedisClient, *, ttl_sec: int, max_frames: int):
+        self.redis = redis
+        self.ttl_sec = int(ttl_sec)
+        self.max_frames = int(max_frames)
+
+    async def push(self, account_id: int, frame: BaseModel) -> None:
+        key = key_ws_mailbox(account_id)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.rpush(key, frame.model_dump_json())
+            pipe.ltrim(key, -self.max_frames, -1)
+            pipe.expire(key, self.ttl_sec)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось положить кадр в mailbox {key}: {e}")
+
+    async def drain(self, account_id: int) -> List[Dict[str, Any]]:
+        key = key_ws_mailbox(account_id)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.lrange(key, 0, -1)
+            pipe.delete(key)
+            raw_frames, _ = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось прочитать mailbox {key}: {e}")
+            return []
+        frames: List[Dict[str, Any]] = []
+        for raw in cast(List[str], raw_frames):
+            try:
+                frames.append(json.loads(raw))
+            except json.JSONDecodeError:
+                logger.warning(f"Битый кадр в mailbox {key}, пропускаю.")
+        return frames
@@ -0,0 +1,159 @@
+# apps/gateway/gateway/admission.py
+from __future__ import annotations
+
+import math
+import os
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from libs.utils.logging_setup import app_logger as logger
+
+# Причины отказа (уходят клиенту в details.reason и в логи)
+REASON_CAPACITY = "capacity"
+REASON_MEMORY = "memory"
+REASON_HANDSHAKES = "handshakes"
+REASON_IP_RATE = "ip_rate"
+REASON_DRAINING = "draining"
+
+
+@dataclass(slots=True)
+class AdmissionDecision:
+    admitted: bool
+    reason: Optional[str] = None
+    # Через сколько секунд клиенту имеет смысл повторить попытку (Retry-After)
+    retry_after: int = 0
+
+
+@dataclass(slots=True)
+class _Bucket:
+    tokens: float
+    updated: float
+
+
+def _read_rss_bytes() -> Optional[int]:
+    """Текущий RSS процесса из /proc (Linux); None, если узнать нельзя."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class AdmissionController:
+    """
+    Допуск новых WS-соединений до websocket.accept().
+
+    Проверки идут от дешёвых к дорогим и ничего не ждут — лишнее отбивается сразу:
+      0. воркер в режиме drain — отказ всем;
+      1. бюджет соединений: max_connections и оценка memory_budget_mb / conn_memory_kb;
+      2. живой RSS процесса (max_rss_mb), замер кэшируется на rss_sample_sec;
+      3. число одновременных handshake (валидация токена и т.п.) на узле;
+      4. token bucket на IP клиента.
+    Отказ несёт retry_after с джиттером, чтобы волна переподключений
+    не вернулась одним фронтом.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_handshakes: int = 256,
+        per_ip_rate: float = 5.0,
+        per_ip_burst: int = 20,
+        max_connections: int = 0,
+        memory_budget_mb: int = 0,
+        conn_memory_kb: int = 64,
+        max_rss_mb: int = 0,
+        rss_sample_sec: float = 1.0,
+        retry_after_sec: float = 5.0,
+        max_tracked_ips: int = 100_000,
+    ):
+        self.max_handshakes = max(1, int(max_handshakes))
+        self.per_ip_rate = float(per_ip_rate)
+        self.per_ip_burst = max(1, int(per_ip_burst))
+        # 0 — ограничение выключено
+        limits = [int(max_connections)]
+        if memory_budget_mb > 0:
+            limits.append(int(memory_budget_mb) * 1024 // max(1, int(conn_memory_kb)))
+        limits = [limit for limit in limits if limit > 0]
+        self.max_connections = min(limits) if limits else 0
+        self.max_rss_bytes = int(max_rss_mb) * 1024 * 1024
+        self.rss_sample_sec = float(rss_sample_sec)
+        self.retry_after_sec = max(1.0, float(retry_after_sec))
+        self.max_tracked_ips = max(1, int(max_tracked_ips))
+
+        self.handshakes = 0
+        # Воркер выводится из работы (DrainController): новых соединений не берём
+        self.draining = False
+        self.rejected = 0
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+        self._rss: Optional[int] = None
+        self._rss_sampled_at = -math.inf
+        logger.info(
+            f"🚦 AdmissionController: handshakes≤{self.max_handshakes}, "
+            f"connections≤{self.max_connections or '∞'}, ip_rate={self.per_ip_rate}/s"
+        )
+
+    def try_admit(
+        self, client_ip: str, connection_load: int, now: Optional[float] = None
+    ) -> AdmissionDecision:
+        """
+        Решение по очередному handshake. При допуске занимает слот handshake,
+        который нужно вернуть через release() после accept (или отказа в нём).
+        """
+        now = time.monotonic() if now is None else now
+        if self.draining:
+            return self._reject(REASON_DRAINING, self.retry_after_sec)
+        if self.max_connections and connection_load >= self.max_connections:
+            return self._reject(REASON_CAPACITY, self.retry_after_sec)
+        if self.max_rss_bytes and self._rss_exceeded(now):
+            return self._reject(REASON_MEMORY, self.retry_after_sec)
+        if self.handshakes >= self.max_handshakes:
+            return self._reject(REASON_HANDSHAKES, self.retry_after_sec)
+
+        if self.per_ip_rate > 0:
+            bucket = self._bucket(client_ip, now)
+            if bucket.tokens < 1.0:
+                return self._reject(
+                    REASON_IP_RATE, (1.0 - bucket.tokens) / self.per_ip_rate
+                )
+            bucket.tokens -= 1.0
+
+        self.handshakes += 1
+        return AdmissionDecision(admitted=True)
+
+    def release(self) -> None:
+        self.handshakes = max(0, self.handshakes - 1)
+
+    def _bucket(self, client_ip: str, now: float) -> _Bucket:
+        bucket = self._buckets.get(client_ip)
+        if bucket is None:
+            bucket = _Bucket(tokens=float(self.per_ip_burst), updated=now)
+            self._buckets[client_ip] = bucket
+            # Давно не виденные IP вытесняем: их корзины всё равно были бы полными
+            while len(self._buckets) > self.max_tracked_ips:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_ip)
+            bucket.tokens = min(
+                float(self.per_ip_burst),
+                bucket.tokens + (now - bucket.updated) * self.per_ip_rate,
+            )
+            bucket.updated = now
+        return bucket
+
+    def _rss_exceeded(self, now: float) -> bool:
+        if now - self._rss_sampled_at >= self.rss_sample_sec:
+            self._rss = _read_rss_bytes()
+            self._rss_sampled_at = now
+        return self._rss is not None and self._rss >= self.max_rss_bytes
+
+    def _reject(self, reason: str, base_delay: float) -> AdmissionDecision:
+        self.rejected += 1
+        delay = max(base_delay, 1.0) * random.uniform(1.0, 2.0)
+        return AdmissionDecision(
+            admitted=False, reason=reason, retry_after=math.ceil(delay)
+        )
@@ -1,28 +1,161 @@
 # apps/gateway/gateway/client_connection_manager.py
+from __future__ import annotations
+
+import asyncio
 import time
-from typing import Dict, Optional, Tuple
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Optional, Set, Tuple, Union, cast
 
 from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.websockets import WebSocketState
+from pydantic import BaseModel
+from libs.infra.revocation import RevocationList
 from libs.utils.logging_setup import app_logger as logger
 
+from apps.gateway.gateway.connection_outbox import ConnectionOutbox
+from apps.gateway.gateway.delta_state import DeltaStateCache
+from apps.gateway.gateway.inbound_rate_limit import (
+    FrameClass,
+    InboundRateLimiter,
+    Verdict,
+)
+from apps.gateway.gateway.node_registry import NodeRegistry
+from apps.gateway.gateway.session_resume import ResumableSession, SessionRegistry
+from apps.gateway.gateway.timing_wheel import HashedTimingWheel
+from apps.gateway.gateway.ws_codec import (
+    JSON_CODEC,
+    EncodedFrame,
+    WSCodec,
+    send_frame,
+    send_frames,
+)
+
+
+def _frame_attr(frame: EncodedFrame, name: str):
+    inner = frame.frame
+    if isinstance(inner, dict):
+        return inner.get(name)
+    return getattr(inner, name, None)
+
+
+def _frame_tick(frame: EncodedFrame) -> Optional[int]:
+    return _frame_attr(frame, "tick")
+
+
+def _is_urgent(frame: EncodedFrame) -> bool:
+    """final/error не ждут окна батчинга."""
+    return (
+        _frame_attr(frame, "type") == "error" or _frame_attr(frame, "status") == "final"
+    )
+
+
+@dataclass(slots=True)
+class ConnectionRecord:
+    """Состояние одного WS-соединения. Держим компактно: объектов может быть 100k+."""
+
+    websocket: WebSocket
+    client_type: str
+    last_activity: float
+    account_id: Optional[int] = None
+    # request_id команд, ушедших в бекэнд и ещё не получивших final/error -> время отправки
+    inflight: Dict[str, float] = field(default_factory=dict)
+    # Формат кадров, согласованный при handshake (JSON или бинарный)
+    codec: WSCodec = JSON_CODEC
+    # Сессия для возобновления после обрыва (кольцо последних кадров)
+    session: Optional[ResumableSession] = None
+    # Очередь исходящих кадров и задача, которая её отправляет в сокет
+    outbox: Optional[ConnectionOutbox] = None
+    writer: Optional[asyncio.Task] = None
+    # Клиент согласился принимать WSBatchFrame (?batch=1)
+    batch: bool = False
+    # Корзины лимитов входящих кадров (см. InboundRateLimiter)
+    rate_state: Optional[array] = None
+    # exp access-токена (unix сек) и отправлено ли уже предупреждение token_expiring
+    token_exp: Optional[int] = None
+    token_warned: bool = False
+    # sid и iat того же токена: по ним соединение закрывается при отзыве
+    sid: Optional[str] = None
+    iat: Optional[int] = None
+
 
 class ClientConnectionManager:
     """
     Управляет активными WebSocket-соединениями и временем их последней активности.
-    """
 
-    active_connections: Dict[str, Tuple[WebSocket, float]] = {}
-    client_types: Dict[str, str] = {}
+    Idle-дедлайны хранятся в хешированном колесе таймеров: update_activity — это
+    одна запись float в ConnectionRecord, а колесо лениво переставляет таймер
+    только когда до него дошла очередь (O(истёкших) за тик вместо O(n)).
+    Второе колесо (по unix-времени) следит за exp access-токенов: за
+    token_warn_sec до exp клиент получает token_expiring, в exp соединение закрывается.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        idle_timeout: float = 120.0,
+        idle_tick_sec: float = 1.0,
+        max_inflight_commands: int = 32,
+        command_timeout: float = 30.0,
+        delta_enabled: bool = True,
+        delta_max_entries: int = 100_000,
+        delta_max_version_gap: int = 1,
+        sessions: Optional[SessionRegistry] = None,
+        max_outbox: int = 1024,
+        batch_window_ms: float = 5.0,
+        batch_max_frames: int = 64,
+        inbound_limiter: Optional[InboundRateLimiter] = None,
+        registry: Optional[NodeRegistry] = None,
+        token_warn_sec: float = 60.0,
+        token_wheel_span_sec: float = 3600.0,
+    ):
+        self.active_connections: Dict[str, ConnectionRecord] = {}
+        # account_id -> client_id всех соединений аккаунта (доставка по recipient.account_id)
+        self._account_connections: Dict[int, Set[str]] = {}
+        self.idle_timeout = float(idle_timeout)
+        self.max_inflight_commands = int(max_inflight_commands)
+        self.command_timeout = float(command_timeout)
+        # Последние доставленные снимки сущностей для дельта-кодирования WSEventFrame
+        self.delta_state: Optional[DeltaStateCache] = (
+            DeltaStateCache(delta_max_entries, delta_max_version_gap)
+            if delta_enabled
+            else None
+        )
+        # None — возобновление сессий выключено
+        self.sessions = sessions
+        self.max_outbox = int(max_outbox)
+        self.batch_window = max(0.0, float(batch_window_ms)) / 1000.0
+        self.batch_max_frames = max(1, int(batch_max_frames))
+        # None — входящие кадры не ограничиваются
+        self.inbound_limiter = inbound_limiter
+        # Реестр соединений в Redis для маршрутизации между воркерами (None — один процесс)
+        self.registry = registry
+        self._idle_wheel = HashedTimingWheel(
+            tick_sec=idle_tick_sec, span_sec=self.idle_timeout, now=time.monotonic()
+        )
+        self.token_warn_sec = max(0.0, float(token_warn_sec))
+        # exp — unix-время, поэтому колесо тоже на time.time(); дедлайны дальше
+        # span ждут в слоте лишний оборот
+        self._expiry_wheel = HashedTimingWheel(
+            tick_sec=idle_tick_sec, span_sec=token_wheel_span_sec, now=time.time()
+        )
         logger.info("✨ ClientConnectionManager инициализирован.")
 
     async def connect(
-        self, websocket: WebSocket, client_id: str, client_type: str
-    ) -> None:
-        if client_id in self.active_connections:
-            old_websocket, _ = self.active_connections[client_id]
+        self,
+        websocket: WebSocket,
+        client_id: str,
+        client_type: str,
+        account_id: Optional[int] = None,
+        codec: WSCodec = JSON_CODEC,
+        session: Optional[ResumableSession] = None,
+        batch: bool = False,
+        token_exp: Optional[int] = None,
+        sid: Optional[str] = None,
+        iat: Optional[int] = None,
+    ) -> ConnectionRecord:
+        old_record = self.active_connections.get(client_id)
+        if old_record is not None:
+            old_websocket = old_record.websocket
             logger.warning(
                 f"Существующее соединение для client_id {client_id} будет закрыто."
             )
@@ -35,33 +168,458 @@ class ClientConnectionManager:
                 except RuntimeError:
                     pass
 
-        self.active_connections[client_id] = (websocket, time.monotonic())
-        self.client_types[client_id] = client_type
+        record = ConnectionRecord(
+            websocket=websocket,
+            client_type=client_type,
+            last_activity=time.monotonic(),
+            account_id=account_id,
+            codec=codec,
+            session=session,
+            batch=batch,
+            token_exp=token_exp,
+            sid=sid,
+            iat=iat,
+        )
+        if session is not None:
+            session.token_exp, session.sid, session.iat = token_exp, sid, iat
+        self._register(client_id, record)
+        if old_record is None and self.registry is not None:
+            self.registry.track(client_id, account_id)
         logger.info(
             f"✅ Client ID {client_id} ({client_type}) подключен. Всего: {len(self.active_connections)}"
         )
+        return record
+
+    def _register(self, client_id: str, record: ConnectionRecord) -> None:
+        record.outbox = ConnectionOutbox(self.max_outbox)
+        record.writer = asyncio.create_task(self._write_loop(client_id, record))
+        if self.inbound_limiter is not None:
+            record.rate_state = self.inbound_limiter.new_state(time.monotonic())
+        self.active_connections[client_id] = record
+        if record.account_id is not None:
+            self._account_connections.setdefault(record.account_id, set()).add(
+                client_id
+            )
+        if record.session is not None and self.sessions is not None:
+            self.sessions.attach(client_id)
+        self._idle_wheel.schedule(client_id, record.last_activity + self.idle_timeout)
+        if record.token_exp is not None:
+            self._schedule_expiry(client_id, record)
+
+    async def resume(
+        self,
+        websocket: WebSocket,
+        session: ResumableSession,
+        last_seq: int,
+        client_type: str,
+        codec: WSCodec = JSON_CODEC,
+        batch: bool = False,
+    ) -> Optional[ConnectionRecord]:
+        """
+        Возобновляет сессию на новом сокете: досылает кадры с seq > last_seq и
+        регистрирует соединение под прежним client_id. None — часть кадров уже
+        вытеснена из кольца, клиенту нужна полная повторная синхронизация.
+        """
+        client_id = session.conn_id
+        old_record = self.active_connections.get(client_id)
+        if old_record is not None:
+            # Старый сокет ещё не заметил обрыв: отключаем его, копя кадры в буфер
+            self.active_connections.pop(client_id)
+            self._idle_wheel.cancel(client_id)
+            self._expiry_wheel.cancel(client_id)
+            self._stop_writer(old_record)
+            if self.sessions is not None:
+                self.sessions.detach(client_id, time.monotonic())
+            try:
+                await old_record.websocket.close(code=1000, reason="Session resumed")
+            except RuntimeError:
+                pass
+
+        sent = last_seq
+        while True:
+            pending = session.frames_after(sent)
+            if pending is None:
+                return None
+            if not pending:
+                break
+            for frame in pending:
+                await send_frame(websocket, codec, frame)
+            sent += len(pending)
+
+        # Между последней проверкой буфера и регистрацией нет await: новые кадры
+        # либо уже досланы, либо пойдут напрямую в новый сокет
+        record = ConnectionRecord(
+            websocket=websocket,
+            client_type=client_type,
+            last_activity=time.monotonic(),
+            account_id=session.account_id,
+            codec=codec,
+            session=session,
+            batch=batch,
+            token_exp=session.token_exp,
+            sid=session.sid,
+            iat=session.iat,
+        )
+        self._register(client_id, record)
+        logger.info(
+            f"🔁 Client ID {client_id} возобновил сессию (дослано {sent - last_seq} кадров)."
+        )
+        return record
 
     def disconnect(self, client_id: str) -> None:
+        record = self.active_connections.pop(client_id, None)
+        if record is not None:
+            self._idle_wheel.cancel(client_id)
+            self._expiry_wheel.cancel(client_id)
+            self._stop_writer(record)
+            if record.outbox is not None:
+                record.outbox.drain()
+        session = self.sessions.remove(client_id) if self.sessions else None
+        if record is None and session is None:
+            return
+        account_id = record.account_id if record is not None else None
+        if account_id is None and session is not None:
+            account_id = session.account_id
+        self._forget_client(client_id, account_id)
+        logger.info(
+            f"❌ Client ID {client_id} отключен. Всего: {len(self.active_connections)}"
+        )
+
+    def release(self, client_id: str, websocket: WebSocket, resumable: bool) -> None:
+        """
+        Сокет закрылся. Если сессию можно возобновить, держим её grace-период
+        (кадры копятся в буфер), иначе отключаем полностью. Сокет, уже
+        заменённый новым соединением с тем же client_id, ничего не трогает.
+        """
+        record = self.active_connections.get(client_id)
+        if record is None:
+            # Обрыв между созданием сессии и connect(): сессию никто не
+            # зарегистрировал и не поставил на таймер grace-периода
+            session = self.sessions.get(client_id) if self.sessions else None
+            if session is not None and not session.detached:
+                self.sessions.remove(client_id)
+            return
+        if record.websocket is not websocket:
+            return
+        if not resumable or record.session is None or self.sessions is None:
+            self.disconnect(client_id)
+            return
+        del self.active_connections[client_id]
+        self._idle_wheel.cancel(client_id)
+        self._expiry_wheel.cancel(client_id)
+        self._stop_writer(record)
+        self.sessions.detach(client_id, time.monotonic())
+        logger.info(
+            f"⏸️ Client ID {client_id} оборвался, сессия ждёт resume {self.sessions.grace_sec:.0f}s."
+        )
+
+    def expire_sessions(self, now: float) -> int:
+        """Забывает сессии, не возобновлённые за grace-период."""
+        if self.sessions is None:
+            return 0
+        expired = 0
+        for session in self.sessions.collect_expired(now):
+            if session.conn_id not in self.active_connections:
+                self._forget_client(session.conn_id, session.account_id)
+                expired += 1
+        return expired
+
+    def _stop_writer(self, record: ConnectionRecord) -> None:
+        """
+        Останавливает writer. Неотправленные кадры сессии уходят в её буфер:
+        они будут досланы при resume в том же порядке.
+        """
+        writer = record.writer
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+        record.writer = None
+        if record.outbox is not None and record.session is not None:
+            for frame in record.outbox.drain():
+                record.session.push(frame)
+
+    async def _write_loop(self, client_id: str, record: ConnectionRecord) -> None:
+        outbox = cast(ConnectionOutbox, record.outbox)
+        websocket = record.websocket
+        while True:
+            first = await outbox.get()
+            frames = [first]
+            if record.batch and not _is_urgent(first):
+                await self._collect_batch(outbox, frames)
+            # В буфер сессии кадр попадает в момент отправки: после слияния
+            # апдейтов нумерация совпадает с тем, что реально ушло клиенту
+            if record.session is not None:
+                for frame in frames:
+                    record.session.push(frame)
+            try:
+                await send_frames(websocket, record.codec, frames)
+            except (WebSocketDisconnect, RuntimeError, OSError):
+                self.release(client_id, websocket, resumable=True)
+                return
+            finally:
+                outbox.task_done()
+
+    async def _collect_batch(
+        self, outbox: ConnectionOutbox, frames: List[EncodedFrame]
+    ) -> None:
+        """
+        Добирает кадры в пачку до конца окна, границы тика (кадр с другим tick)
+        или первого final/error — их клиент получает без задержки.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        tick = _frame_tick(frames[0])
+        while len(frames) < self.batch_max_frames:
+            nxt = outbox.peek()
+            if nxt is None:
+                remaining = deadline - loop.time()
+                if remaining <= 0 or not await outbox.wait_ready(remaining):
+                    return
+                continue
+            nxt_tick = _frame_tick(nxt)
+            if tick is None:
+                tick = nxt_tick
+            elif nxt_tick is not None and nxt_tick != tick:
+                return
+            frames.append(outbox.get_nowait())
+            if _is_urgent(nxt):
+                return
+
+    async def flush(self, client_id: str) -> None:
+        """Ждёт, пока writer отправит всё из очереди соединения."""
+        record = self.active_connections.get(client_id)
+        if record is not None and record.outbox is not None:
+            await record.outbox.wait_idle()
+
+    def has_queued(self, client_id: str, coalesce_key: Hashable) -> bool:
+        """Есть ли в очереди соединения ещё не отправленный кадр с этим ключом."""
+        record = self.active_connections.get(client_id)
+        return bool(record and record.outbox and record.outbox.has_queued(coalesce_key))
+
+    def _forget_client(self, client_id: str, account_id: Optional[int]) -> None:
+        if self.registry is not None:
+            self.registry.forget(client_id, account_id)
+        if self.delta_state is not None:
+            self.delta_state.drop_client(client_id)
+        if account_id is not None:
+            account_conns = self._account_connections.get(account_id)
+            if account_conns is not None:
+                account_conns.discard(client_id)
+                if not account_conns:
+                    del self._account_connections[account_id]
+
+    def is_local(self, client_id: str) -> bool:
+        """Соединение (живое или ждущее resume) принадлежит этому воркеру."""
         if client_id in self.active_connections:
-            del self.active_connections[client_id]
-            if client_id in self.client_types:
-                del self.client_types[client_id]
-            logger.info(
-                f"❌ Client ID {client_id} отключен. Всего: {len(self.active_connections)}"
+            return True
+        return self.sessions is not None and self.sessions.get(client_id) is not None
+
+    @property
+    def connection_load(self) -> int:
+        """Сколько соединений держат память узла: живые плюс сессии в grace-периоде."""
+        if self.sessions is None:
+            return len(self.active_connections)
+        return max(len(self.active_connections), len(self.sessions))
+
+    def update_activity(self, client_id: str) -> None:
+        record = self.active_connections.get(client_id)
+        if record is not None:
+            record.last_activity = time.monotonic()
+
+    def collect_idle(self, now: float) -> List[Tuple[str, ConnectionRecord]]:
+        """
+        Прокручивает колесо до now и возвращает соединения, у которых истёк idle-таймаут.
+        Соединения с более свежей активностью перепланируются на новый дедлайн.
+        """
+        idle: List[Tuple[str, ConnectionRecord]] = []
+        for key in self._idle_wheel.advance(now):
+            client_id = str(key)
+            record = self.active_connections.get(client_id)
+            if record is None:
+                continue
+            deadline = record.last_activity + self.idle_timeout
+            if deadline > now:
+                self._idle_wheel.schedule(client_id, deadline)
+            else:
+                idle.append((client_id, record))
+        return idle
+
+    def set_token_expiry(
+        self,
+        client_id: str,
+        token_exp: Optional[int],
+        sid: Optional[str] = None,
+        iat: Optional[int] = None,
+    ) -> None:
+        """Новые exp, sid и iat после повторной авторизации по сокету (reauth)."""
+        record = self.active_connections.get(client_id)
+        if record is None:
+            return
+        record.token_exp, record.sid, record.iat = token_exp, sid, iat
+        record.token_warned = False
+        if record.session is not None:
+            session = record.session
+            session.token_exp, session.sid, session.iat = token_exp, sid, iat
+        if token_exp is None:
+            self._expiry_wheel.cancel(client_id)
+        else:
+            self._schedule_expiry(client_id, record)
+
+    def _schedule_expiry(self, client_id: str, record: ConnectionRecord) -> None:
+        assert record.token_exp is not None  # Для mypy
+        deadline = float(record.token_exp)
+        if not record.token_warned:
+            deadline -= self.token_warn_sec
+        self._expiry_wheel.schedule(client_id, deadline)
+
+    def collect_token_expiry(
+        self, now: float
+    ) -> Tuple[List[Tuple[str, ConnectionRecord]], List[Tuple[str, ConnectionRecord]]]:
+        """
+        Прокручивает колесо exp до now (unix-время). Возвращает соединения,
+        которым пора предупредить клиента (expiring), и соединения с истёкшим
+        токеном (expired). Предупреждённые перепланируются на сам exp.
+        """
+        expiring: List[Tuple[str, ConnectionRecord]] = []
+        expired: List[Tuple[str, ConnectionRecord]] = []
+        for key in self._expiry_wheel.advance(now):
+            client_id = str(key)
+            record = self.active_connections.get(client_id)
+            if record is None or record.token_exp is None:
+                continue
+            if record.token_exp <= now:
+                expired.append((client_id, record))
+            elif not record.token_warned:
+                record.token_warned = True
+                expiring.append((client_id, record))
+                self._schedule_expiry(client_id, record)
+            else:
+                self._schedule_expiry(client_id, record)
+        return expiring, expired
+
+    async def close_revoked(
+        self, denylist: RevocationList, account_id: Optional[int] = None
+    ) -> int:
+        """
+        Закрывает (1008) соединения, чей токен отозван в denylist, и забывает
+        такие же сессии в grace-периоде. account_id — затронутый аккаунт;
+        None — проверяются все соединения узла.
+        """
+        if account_id is not None:
+            client_ids = self.get_account_connections(account_id)
+        else:
+            client_ids = [
+                cid for ids in self._account_connections.values() for cid in ids
+            ]
+        closing: List[WebSocket] = []
+        for client_id in client_ids:
+            record = self.active_connections.get(client_id)
+            if record is not None:
+                if denylist.is_revoked(record.sid, record.account_id, record.iat):
+                    self.disconnect(client_id)
+                    closing.append(record.websocket)
+                continue
+            session = self.sessions.get(client_id) if self.sessions else None
+            if session is not None and denylist.is_revoked(
+                session.sid, session.account_id, session.iat
+            ):
+                self.disconnect(client_id)
+        if closing:
+            logger.warning(f"🛑 Токен отозван: закрываем {len(closing)} WS-соединений")
+            await asyncio.gather(
+                *(self._close_quietly(ws, "Token revoked") for ws in closing)
             )
+        return len(closing)
 
-    def update_activity(self, client_id: str):
-        if client_id in self.active_connections:
-            websocket, _ = self.active_connections[client_id]
-            self.active_connections[client_id] = (websocket, time.monotonic())
+    def get_account_connections(self, account_id: int) -> List[str]:
+        """Возвращает client_id всех активных соединений аккаунта."""
+        return list(self._account_connections.get(account_id, ()))
+
+    def check_inbound(
+        self, record: ConnectionRecord, frame_class: FrameClass
+    ) -> Verdict:
+        """Списывает токен за входящий кадр клиента."""
+        if self.inbound_limiter is None or record.rate_state is None:
+            return Verdict.ALLOW
+        return self.inbound_limiter.check(
+            record.rate_state, frame_class, record.client_type, time.monotonic()
+        )
+
+    def begin_command(self, record: ConnectionRecord, request_id: str) -> bool:
+        """
+        Регистрирует команду как in-flight. False — превышен лимит на соединение
+        или такой request_id уже выполняется.
+        """
+        if request_id in record.inflight:
+            return False
+        now = time.monotonic()
+        if len(record.inflight) >= self.max_inflight_commands:
+            # Бекэнд мог не прислать final: забываем зависшие команды
+            cutoff = now - self.command_timeout
+            for stale_id in [r for r, ts in record.inflight.items() if ts < cutoff]:
+                del record.inflight[stale_id]
+            if len(record.inflight) >= self.max_inflight_commands:
+                return False
+        record.inflight[request_id] = now
+        return True
+
+    def complete_command(self, client_id: str, request_id: str) -> None:
+        """Снимает команду из in-flight (пришёл final/error или публикация не удалась)."""
+        record = self.active_connections.get(client_id)
+        if record is not None:
+            record.inflight.pop(request_id, None)
+
+    async def send_frame(
+        self,
+        client_id: str,
+        frame: Union[BaseModel, EncodedFrame],
+        coalesce_key: Optional[Hashable] = None,
+    ) -> bool:
+        """
+        Ставит кадр в очередь соединения; отправляет его writer-задача в формате
+        соединения. Для рассылки нескольким адресатам передавайте один
+        EncodedFrame — он кодируется один раз на формат. С coalesce_key кадр
+        заменяет ещё не отправленный кадр с тем же ключом.
+        Кадр сессии в grace-периоде только попадает в её буфер (True).
+        """
+        if not isinstance(frame, EncodedFrame):
+            frame = EncodedFrame(frame)
+
+        record = self.active_connections.get(client_id)
+        if not record or record.outbox is None:
+            session = self.sessions.get(client_id) if self.sessions else None
+            if session is not None and session.detached:
+                session.push(frame)
+                return True
+            logger.warning(f"Соединение для Client ID {client_id} не найдено.")
+            return False
+
+        if record.outbox.put(frame, coalesce_key):
+            return True
+
+        # Клиент не успевает разбирать даже слитые апдейты: отключаем его
+        logger.warning(
+            f"🐢 Очередь Client ID {client_id} переполнена ({len(record.outbox)}), закрываем соединение."
+        )
+        self.disconnect(client_id)
+        asyncio.create_task(
+            self._close_quietly(record.websocket, "Outbound queue overflow")
+        )
+        return False
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket, reason: str) -> None:
+        try:
+            await websocket.close(code=1008, reason=reason)
+        except (RuntimeError, WebSocketDisconnect):
+            pass
 
     async def send_message_to_client(self, client_id: str, message: str) -> bool:
-        connection_data = self.active_connections.get(client_id)
-        if not connection_data:
+        record = self.active_connections.get(client_id)
+        if not record:
             logger.warning(f"Соединение для Client ID {client_id} не найдено.")
             return False
 
-        websocket, _ = connection_data
+        websocket = record.websocket
         if websocket.client_state != WebSocketState.DISCONNECTED:
             try:
                 await websocket.send_text(message)
@@ -82,8 +640,9 @@ class ClientConnectionManager:
         sent_count = 0
         disconnected_clients = []
         # Итерируем по копии, чтобы безопасно удалять элементы
-        for client_id, (ws, _) in list(self.active_connections.items()):
-            if self.client_types.get(client_id) == client_type:
+        for client_id, record in list(self.active_connections.items()):
+            if record.client_type == client_type:
+                ws = record.websocket
                 if ws.client_state != WebSocketState.DISCONNECTED:
                     try:
                         await ws.send_text(message)
@@ -104,10 +663,11 @@ class ClientConnectionManager:
     # --- КОНЕЦ ВОССТАНОВЛЕННОГО МЕТОДА ---
 
     def get_client_id_by_websocket(self, websocket: WebSocket) -> Optional[str]:
-        for client_id, (ws, _) in self.active_connections.items():
-            if ws == websocket:
+        for client_id, record in self.active_connections.items():
+            if record.websocket == websocket:
                 return client_id
         return None
 
     def get_client_type(self, client_id: str) -> Optional[str]:
-        return self.client_types.get(client_id)
+        record = self.active_connections.get(client_id)
+        return record.client_type if record else None
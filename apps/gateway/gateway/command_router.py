@@ -0,0 +1,56 @@
+# apps/gateway/gateway/command_router.py
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from libs.domain.dto.backend import ActorHint
+from libs.messaging.rabbitmq_names import get_domain_commands_queue_name
+from libs.utils.consistent_hash import ConsistentHashRing
+
+
+def actor_affinity_key(actor: ActorHint) -> Optional[str]:
+    """
+    Ключ, по которому команды одной сущности попадают на один шард:
+    сущность (kind + entity_id), а без неё — пространственный шард из подсказки.
+    """
+    if actor.entity_id:
+        key = f"{actor.kind or ''}:{actor.entity_id}"
+    elif actor.shard:
+        key = f"shard:{actor.shard}"
+    else:
+        return None
+    return f"{actor.region_id}/{key}" if actor.region_id else key
+
+
+class CommandRouter:
+    """
+    Выбирает очередь доменных команд по ActorHint.
+
+    Шарды домена — очереди core.<domain>.queue.commands.<shard>.v1, их слушают
+    воркеры бекэнда. Сущность закрепляется за шардом консистентным хешированием,
+    поэтому её команды всегда обрабатывает один воркер. Команды без подсказки
+    (или при пустом наборе шардов) идут в общую очередь домена.
+
+    Набор шардов задаётся при старте (GATEWAY_COMMAND_SHARDS) и не меняется:
+    смена шардов в одном воркере разошлась бы с остальными, и команды одной
+    сущности попали бы на разные шарды.
+    """
+
+    def __init__(self, shards: Iterable[str] = (), vnodes: int = 64):
+        self._ring = ConsistentHashRing(shards, vnodes=vnodes)
+
+    @property
+    def shards(self) -> list[str]:
+        return self._ring.nodes
+
+    def shard_for(self, actor: Optional[ActorHint]) -> Optional[str]:
+        if actor is None or not len(self._ring):
+            return None
+        # Явно указанный узел из набора шардов — без хеширования
+        if actor.node_id and actor.node_id in self._ring:
+            return actor.node_id
+        key = actor_affinity_key(actor)
+        return self._ring.node_for(key) if key is not None else None
+
+    def routing_key(self, domain: str, actor: Optional[ActorHint]) -> str:
+        return get_domain_commands_queue_name(domain, self.shard_for(actor))
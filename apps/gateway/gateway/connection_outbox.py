@@ -0,0 +1,104 @@
+# apps/gateway/gateway/connection_outbox.py
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Hashable, List, Optional
+
+from apps.gateway.gateway.ws_codec import EncodedFrame
+
+
+@dataclass(slots=True)
+class _Slot:
+    frame: EncodedFrame
+    key: Optional[Hashable] = None
+
+
+class ConnectionOutbox:
+    """
+    Очередь исходящих кадров одного соединения (её разбирает writer-задача).
+
+    Кадр с coalesce-ключом, пока он ещё в очереди, заменяется более новым кадром
+    с тем же ключом прямо на своём месте: медленный клиент получает только
+    последнее состояние, а очередь не растёт от промежуточных апдейтов.
+    """
+
+    __slots__ = ("max_frames", "coalesced", "_queue", "_by_key", "_ready", "_idle")
+
+    def __init__(self, max_frames: int = 1024):
+        self.max_frames = max(1, int(max_frames))
+        # Сколько кадров заменено на более свежие (для метрик/логов)
+        self.coalesced = 0
+        self._queue: Deque[_Slot] = deque()
+        self._by_key: Dict[Hashable, _Slot] = {}
+        self._ready = asyncio.Event()
+        # Установлен, когда очередь пуста и writer ничего не отправляет
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def put(self, frame: EncodedFrame, key: Optional[Hashable] = None) -> bool:
+        """Ставит кадр в очередь. False — очередь переполнена (клиент не успевает)."""
+        if key is not None:
+            slot = self._by_key.get(key)
+            if slot is not None:
+                slot.frame = frame
+                self.coalesced += 1
+                return True
+        if len(self._queue) >= self.max_frames:
+            return False
+        slot = _Slot(frame, key)
+        self._queue.append(slot)
+        if key is not None:
+            self._by_key[key] = slot
+        self._idle.clear()
+        self._ready.set()
+        return True
+
+    def has_queued(self, key: Hashable) -> bool:
+        return key in self._by_key
+
+    async def get(self) -> EncodedFrame:
+        """Следующий кадр; после отправки writer вызывает task_done()."""
+        while not self._queue:
+            self._ready.clear()
+            await self._ready.wait()
+        return self.get_nowait()
+
+    def peek(self) -> Optional[EncodedFrame]:
+        return self._queue[0].frame if self._queue else None
+
+    def get_nowait(self) -> EncodedFrame:
+        slot = self._queue.popleft()
+        if slot.key is not None and self._by_key.get(slot.key) is slot:
+            del self._by_key[slot.key]
+        return slot.frame
+
+    async def wait_ready(self, timeout: float) -> bool:
+        """Ждёт появления кадра не дольше timeout. False — окно истекло."""
+        if self._queue:
+            return True
+        self._ready.clear()
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def task_done(self) -> None:
+        if not self._queue:
+            self._idle.set()
+
+    def drain(self) -> List[EncodedFrame]:
+        """Забирает все неотправленные кадры (например, в буфер сессии при обрыве)."""
+        frames = [slot.frame for slot in self._queue]
+        self._queue.clear()
+        self._by_key.clear()
+        self._idle.set()
+        return frames
+
+    async def wait_idle(self) -> None:
+        await self._idle.wait()
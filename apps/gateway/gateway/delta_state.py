@@ -0,0 +1,112 @@
+# apps/gateway/gateway/delta_state.py
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+JsonPatch = List[Dict[str, Any]]
+
+_MISSING = object()
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def json_diff(old: Any, new: Any, path: str = "") -> JsonPatch:
+    """
+    Минимальный JSON Patch (RFC 6902) из old в new.
+    Словари сравниваются рекурсивно, остальные значения (включая списки) заменяются целиком.
+    """
+    if old is new or old == new:
+        return []
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return [{"op": "replace", "path": path, "value": new}]
+
+    ops: JsonPatch = []
+    for key, old_value in old.items():
+        new_value = new.get(key, _MISSING)
+        child = f"{path}/{_escape(str(key))}"
+        if new_value is _MISSING:
+            ops.append({"op": "remove", "path": child})
+        else:
+            ops.extend(json_diff(old_value, new_value, child))
+    for key, new_value in new.items():
+        if key not in old:
+            ops.append(
+                {"op": "add", "path": f"{path}/{_escape(str(key))}", "value": new_value}
+            )
+    return ops
+
+
+@dataclass(slots=True)
+class _Base:
+    version: int
+    payload: Dict[str, Any]
+
+
+class DeltaStateCache:
+    """
+    Последний доставленный снимок состояния по (client_id, entity_key).
+
+    Объём ограничен max_entries с вытеснением по LRU: вытесненный ключ просто
+    получит полный снимок при следующем обновлении. payload хранится по ссылке
+    и общий для всех соединений, получивших одно и то же событие.
+    """
+
+    def __init__(self, max_entries: int = 100_000, max_version_gap: int = 1):
+        self.max_entries = max(1, int(max_entries))
+        self.max_version_gap = max(1, int(max_version_gap))
+        self._bases: OrderedDict[Tuple[str, str], _Base] = OrderedDict()
+        # client_id -> entity_key: чтобы при отключении не сканировать весь кэш
+        self._by_client: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._bases)
+
+    def base_for(self, client_id: str, key: str, version: int) -> Optional[_Base]:
+        """
+        База для дельты к version или None, если нужен полный снимок:
+        базы нет (новое/переподключённое соединение, вытеснение), версия
+        откатилась или разрыв больше max_version_gap.
+        """
+        base = self._bases.get((client_id, key))
+        if base is None:
+            return None
+        gap = version - base.version
+        if gap <= 0 or gap > self.max_version_gap:
+            return None
+        return base
+
+    def remember(
+        self, client_id: str, key: str, version: int, payload: Dict[str, Any]
+    ) -> None:
+        """Фиксирует снимок, который клиент получил (полностью или через дельту)."""
+        cache_key = (client_id, key)
+        base = self._bases.get(cache_key)
+        if base is not None:
+            base.version = version
+            base.payload = payload
+            self._bases.move_to_end(cache_key)
+            return
+        self._bases[cache_key] = _Base(version, payload)
+        self._by_client.setdefault(client_id, set()).add(key)
+        while len(self._bases) > self.max_entries:
+            (old_client, old_key), _ = self._bases.popitem(last=False)
+            self._discard_index(old_client, old_key)
+
+    def forget(self, client_id: str, key: str) -> None:
+        if self._bases.pop((client_id, key), None) is not None:
+            self._discard_index(client_id, key)
+
+    def drop_client(self, client_id: str) -> None:
+        for key in self._by_client.pop(client_id, ()):
+            self._bases.pop((client_id, key), None)
+
+    def _discard_index(self, client_id: str, key: str) -> None:
+        keys = self._by_client.get(client_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_client[client_id]
@@ -0,0 +1,139 @@
+# apps/gateway/gateway/drain.py
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import random
+import signal
+from typing import Any, List, Optional
+
+from fastapi import status
+
+from apps.gateway.gateway.admission import AdmissionController
+from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from libs.utils.logging_setup import app_logger as logger
+
+
+class DrainController:
+    """
+    Плавный вывод воркера из работы (rolling deploy).
+
+    После start(): новые handshake отклоняются (admission), readiness падает,
+    а живые соединения закрываются волнами в течение window_sec. Перед закрытием
+    у соединения дописывается очередь исходящих кадров, затем уходит close 1012
+    (Service Restart) с reason "draining; reconnect_after=<мс>" — случайной
+    задержкой, чтобы клиенты не переподключались одним фронтом.
+    """
+
+    def __init__(
+        self,
+        manager: ClientConnectionManager,
+        admission: AdmissionController,
+        *,
+        window_sec: float = 10.0,
+        waves: int = 5,
+        reconnect_min_sec: float = 1.0,
+        reconnect_max_sec: float = 30.0,
+        flush_timeout_sec: float = 2.0,
+    ):
+        self.manager = manager
+        self.admission = admission
+        self.window_sec = max(0.0, float(window_sec))
+        self.waves = max(1, int(waves))
+        self.reconnect_min_sec = max(0.0, float(reconnect_min_sec))
+        self.reconnect_max_sec = max(self.reconnect_min_sec, float(reconnect_max_sec))
+        self.flush_timeout_sec = float(flush_timeout_sec)
+        self._task: Optional[asyncio.Task] = None
+        self._previous_sigterm: Any = None
+
+    @property
+    def draining(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> asyncio.Task:
+        """Запускает дренаж (повторный вызов возвращает уже идущий)."""
+        if self._task is None:
+            self.admission.draining = True
+            logger.warning(
+                f"🚧 Drain: {len(self.manager.active_connections)} WS-соединений "
+                f"закроются за {self.window_sec:.0f}s волнами по {self.waves}"
+            )
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def _run(self) -> None:
+        conn_ids = list(self.manager.active_connections)
+        random.shuffle(conn_ids)
+        waves = self._split(conn_ids)
+        interval = self.window_sec / len(waves) if waves else 0.0
+        loop = asyncio.get_running_loop()
+        for i, wave in enumerate(waves):
+            started = loop.time()
+            await asyncio.gather(*(self._close(conn_id) for conn_id in wave))
+            if i < len(waves) - 1:
+                await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+        # Успевшие проскочить handshake до начала дренажа
+        await asyncio.gather(
+            *(self._close(conn_id) for conn_id in list(self.manager.active_connections))
+        )
+        logger.warning("🚧 Drain завершён: WS-соединений не осталось.")
+
+    def _split(self, conn_ids: List[str]) -> List[List[str]]:
+        count = min(self.waves, len(conn_ids))
+        return [conn_ids[i::count] for i in range(count)] if count else []
+
+    async def _close(self, conn_id: str) -> None:
+        record = self.manager.active_connections.get(conn_id)
+        if record is None:
+            return
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self.manager.flush(conn_id), self.flush_timeout_sec)
+        reconnect_ms = int(
+            random.uniform(self.reconnect_min_sec, self.reconnect_max_sec) * 1000
+        )
+        # Сессию не оставляем: resume на останавливаемом воркере невозможен
+        self.manager.disconnect(conn_id)
+        try:
+            await record.websocket.close(
+                code=status.WS_1012_SERVICE_RESTART,
+                reason=f"draining; reconnect_after={reconnect_ms}",
+            )
+        except Exception:
+            pass  # Сокет уже оборван
+
+    def install_signal_handler(self) -> None:
+        """
+        Перехватывает SIGTERM раньше ASGI-сервера: сначала дренаж, затем
+        прежний обработчик (uvicorn/gunicorn), который и завершит процесс.
+        Повторный SIGTERM во время дренажа завершает процесс сразу.
+        """
+        loop = asyncio.get_running_loop()
+        self._previous_sigterm = signal.getsignal(signal.SIGTERM)
+
+        def _on_sigterm() -> None:
+            if self.draining:
+                self._chain_sigterm()
+                return
+            self.start().add_done_callback(lambda _: self._chain_sigterm())
+
+        loop.add_signal_handler(signal.SIGTERM, _on_sigterm)
+
+    def remove_signal_handler(self) -> None:
+        with contextlib.suppress(RuntimeError, ValueError):
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGTERM)
+        if self._previous_sigterm is not None:
+            with contextlib.suppress(ValueError):
+                signal.signal(signal.SIGTERM, self._previous_sigterm)
+
+    def _chain_sigterm(self) -> None:
+        previous = self._previous_sigterm
+        self.remove_signal_handler()
+        if callable(previous):
+            previous(signal.SIGTERM, None)
+        else:
+            os.kill(os.getpid(), signal.SIGTERM)
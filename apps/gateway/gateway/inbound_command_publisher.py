@@ -0,0 +1,125 @@
+# apps/gateway/gateway/inbound_command_publisher.py
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+from libs.domain.dto.backend import BackendInboundCommandEnvelope
+from libs.messaging.i_message_bus import IMessageBus
+from libs.messaging.rabbitmq_names import Exchanges
+from libs.utils.logging_setup import app_logger as logger
+
+# Вызывается, если команду не удалось опубликовать: (envelope, exc)
+PublishFailedCallback = Callable[
+    [BackendInboundCommandEnvelope, BaseException], Awaitable[None]
+]
+
+
+@dataclass(slots=True)
+class _PendingCommand:
+    envelope: BackendInboundCommandEnvelope
+    routing_key: str
+
+
+class InboundCommandPublisher:
+    """
+    Публикует команды клиентов в доменные очереди микро-батчами.
+
+    Команды копятся до batch_size штук или до истечения окна flush_window_ms,
+    после чего вся пачка публикуется конкурентно: подтверждения брокера
+    (publisher confirms) ожидаются параллельно, а не по одному на команду.
+    """
+
+    def __init__(
+        self,
+        message_bus: IMessageBus,
+        *,
+        batch_size: int = 64,
+        flush_window_ms: float = 2.0,
+        max_pending: int = 10_000,
+        on_publish_failed: Optional[PublishFailedCallback] = None,
+    ) -> None:
+        self.bus = message_bus
+        self.batch_size = max(1, int(batch_size))
+        self.flush_window = max(0.0, float(flush_window_ms)) / 1000.0
+        self.on_publish_failed = on_publish_failed
+        self._queue: asyncio.Queue[_PendingCommand] = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"🚀 InboundCommandPublisher запущен (batch={self.batch_size}, window={self.flush_window * 1000:.1f}ms)."
+            )
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        # Дотправляем то, что успели принять от клиентов
+        while not self._queue.empty():
+            await self._publish_batch(self._drain(self.batch_size))
+
+    def submit(self, envelope: BackendInboundCommandEnvelope, routing_key: str) -> bool:
+        """Ставит команду в очередь на публикацию. False — буфер переполнен."""
+        try:
+            self._queue.put_nowait(_PendingCommand(envelope, routing_key))
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def _drain(self, limit: int) -> List[_PendingCommand]:
+        batch: List[_PendingCommand] = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_window
+            while len(batch) < self.batch_size:
+                batch.extend(self._drain(self.batch_size - len(batch)))
+                timeout = deadline - loop.time()
+                if len(batch) >= self.batch_size or timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._publish_batch(batch)
+
+    async def _publish_batch(self, batch: List[_PendingCommand]) -> None:
+        if not batch:
+            return
+        results = await asyncio.gather(
+            *(self._publish_one(item) for item in batch), return_exceptions=True
+        )
+        for item, result in zip(batch, results):
+            if not isinstance(result, BaseException):
+                continue
+            logger.error(
+                f"❌ Не удалось опубликовать команду {item.envelope.routing.domain}."
+                f"{item.envelope.routing.command} (request_id={item.envelope.request_id}): {result}"
+            )
+            if self.on_publish_failed is not None:
+                try:
+                    await self.on_publish_failed(item.envelope, result)
+                except Exception:
+                    logger.exception("Ошибка в обработчике on_publish_failed")
+
+    async def _publish_one(self, item: _PendingCommand) -> None:
+        await self.bus.publish(
+            exchange_name=Exchanges.COMMANDS,
+            routing_key=item.routing_key,
+            message=item.envelope.model_dump(mode="json"),
+            message_id=item.envelope.request_id,
+            correlation_id=item.envelope.request_id,
+            # Команда живёт в рамках WS-сессии: диск брокера здесь не нужен
+            persistent=False,
+        )
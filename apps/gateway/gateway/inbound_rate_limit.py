@@ -0,0 +1,93 @@
+# apps/gateway/gateway/inbound_rate_limit.py
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from enum import IntEnum
+
+
+class FrameClass(IntEnum):
+    """Классы входящих кадров с раздельными бюджетами."""
+
+    COMMAND = 0
+    PING = 1
+    SUBSCRIPTION = 2
+
+
+class Verdict(IntEnum):
+    ALLOW = 0
+    # Кадр отбрасывается, клиент получает ошибку
+    THROTTLE = 1
+    # Клиент систематически превышает лимиты — закрываем соединение
+    CLOSE = 2
+
+
+@dataclass(frozen=True, slots=True)
+class BucketSpec:
+    rate: float  # токенов в секунду
+    burst: float  # ёмкость корзины
+
+
+# Раскладка состояния в array('d'): токены по классам, время пополнения, штрафы
+_UPDATED = len(FrameClass)
+_STRIKES = _UPDATED + 1
+
+
+class InboundRateLimiter:
+    """
+    Token bucket на соединение для кадров клиента.
+
+    Состояние соединения — один array('d') из пяти чисел в ConnectionRecord,
+    без отдельных объектов на корзину. Каждый отброшенный кадр добавляет штраф;
+    штрафы списываются по одному за strike_decay_sec, и при strike_limit
+    соединение закрывается: короткий всплеск только притормаживается,
+    а непрерывный флуд отключается.
+    """
+
+    def __init__(
+        self,
+        *,
+        commands: BucketSpec,
+        pings: BucketSpec,
+        subscriptions: BucketSpec,
+        strike_limit: int = 50,
+        strike_decay_sec: float = 1.0,
+    ):
+        self.specs = (commands, pings, subscriptions)
+        self.strike_limit = max(1, int(strike_limit))
+        self.strike_decay_sec = max(1e-3, float(strike_decay_sec))
+        # "<client_type>.<класс кадра>" -> число отброшенных кадров
+        self.throttled: Counter[str] = Counter()
+
+    def new_state(self, now: float) -> array:
+        return array("d", [*(spec.burst for spec in self.specs), now, 0.0])
+
+    def check(
+        self, state: array, frame_class: FrameClass, client_type: str, now: float
+    ) -> Verdict:
+        elapsed = max(0.0, now - state[_UPDATED])
+        state[_UPDATED] = now
+        if elapsed:
+            for i, spec in enumerate(self.specs):
+                state[i] = min(spec.burst, state[i] + elapsed * spec.rate)
+            state[_STRIKES] = max(
+                0.0, state[_STRIKES] - elapsed / self.strike_decay_sec
+            )
+
+        if state[frame_class] >= 1.0:
+            state[frame_class] -= 1.0
+            return Verdict.ALLOW
+
+        self.throttled[f"{client_type}.{frame_class.name.lower()}"] += 1
+        state[_STRIKES] += 1.0
+        if state[_STRIKES] >= self.strike_limit:
+            return Verdict.CLOSE
+        return Verdict.THROTTLE
+
+    def retry_after_ms(self, state: array, frame_class: FrameClass) -> int:
+        """Через сколько миллисекунд в корзине появится токен."""
+        rate = self.specs[frame_class].rate
+        if rate <= 0:
+            return 0
+        return int(max(0.0, 1.0 - state[frame_class]) / rate * 1000) + 1
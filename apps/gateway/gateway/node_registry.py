@@ -0,0 +1,174 @@
+# apps/gateway/gateway/node_registry.py
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+from libs.infra.central_redis_client import CentralRedisClient
+from libs.infra.presence import PresenceReader, stage_presence
+from libs.utils.logging_setup import app_logger as logger
+from libs.utils.redis_keys import key_ws_conn_node
+
+
+class NodeRegistry:
+    """
+    Реестр "соединение -> узел gateway" и присутствие аккаунтов в Redis.
+
+    Узел — это процесс-воркер gateway со своей outbound-очередью. По реестру
+    воркер, получивший сообщение для чужого соединения или аккаунта, пересылает
+    его владельцу, а бекэнды через PresenceReader узнают, кто онлайн.
+
+    ClientConnectionManager вызывает track/forget синхронно; состояние узла
+    держится локально, а в Redis уходит пачками:
+      - изменения — одним pipeline раз в flush_interval_ms;
+      - heartbeat — одним pipeline раз в heartbeat_sec продлевает TTL всех
+        локальных соединений и дедлайны присутствия всех локальных аккаунтов.
+    Изменения, не записанные из-за ошибки Redis, остаются грязными и уходят со
+    следующим flush или heartbeat: EXPIRE не создаёт ключ, которого нет.
+    Записи упавшего воркера истекают сами через ttl_sec.
+    """
+
+    def __init__(
+        self,
+        redis: CentralRedisClient,
+        node_id: str,
+        *,
+        ttl_sec: int = 30,
+        heartbeat_sec: float = 10.0,
+        flush_interval_ms: float = 50.0,
+    ):
+        self.redis = redis
+        self.node_id = node_id
+        self.heartbeat_sec = max(0.1, float(heartbeat_sec))
+        # TTL должен пережить хотя бы один пропущенный heartbeat
+        self.ttl_sec = max(int(ttl_sec), int(self.heartbeat_sec * 2) + 1)
+        self.flush_interval = max(0.001, float(flush_interval_ms) / 1000.0)
+        self.presence = PresenceReader(redis)
+        # Локальное состояние узла: conn_id -> account_id, account_id -> число соединений
+        self._conns: Dict[str, Optional[int]] = {}
+        self._accounts: Counter[int] = Counter()
+        # Что изменилось с последнего flush
+        self._dirty_conns: Set[str] = set()
+        self._dirty_accounts: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._flush_loop()),
+                asyncio.create_task(self._heartbeat_loop()),
+            ]
+            logger.info(f"🗺️ NodeRegistry запущен: node_id={self.node_id}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        await self.flush()
+
+    def track(self, conn_id: str, account_id: Optional[int]) -> None:
+        if conn_id in self._conns:
+            return
+        self._conns[conn_id] = account_id
+        self._dirty_conns.add(conn_id)
+        if account_id is not None:
+            self._accounts[account_id] += 1
+            self._dirty_accounts.add(account_id)
+        self._wakeup.set()
+
+    def forget(self, conn_id: str, account_id: Optional[int]) -> None:
+        if conn_id not in self._conns:
+            return
+        account_id = self._conns.pop(conn_id)
+        self._dirty_conns.add(conn_id)
+        if account_id is not None:
+            self._accounts[account_id] -= 1
+            if self._accounts[account_id] <= 0:
+                del self._accounts[account_id]
+            self._dirty_accounts.add(account_id)
+        self._wakeup.set()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Копим изменения за окно, чтобы шторм подключений дал один round trip
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_sec)
+            await self.heartbeat()
+
+    async def flush(self) -> None:
+        """Пишет накопленные подключения/отключения одним pipeline."""
+        self._wakeup.clear()
+        if not self._dirty_conns and not self._dirty_accounts:
+            return
+        conns, self._dirty_conns = self._dirty_conns, set()
+        accounts, self._dirty_accounts = self._dirty_accounts, set()
+        pipe = self.redis.pipeline()
+        for conn_id in conns:
+            if conn_id in self._conns:
+                pipe.set(key_ws_conn_node(conn_id), self.node_id, ex=self.ttl_sec)
+            else:
+                pipe.delete(key_ws_conn_node(conn_id))
+        deadline = time.time() + self.ttl_sec
+        for account_id in accounts:
+            stage_presence(
+                pipe,
+                account_id,
+                self.node_id,
+                self._accounts.get(account_id, 0),
+                deadline=deadline,
+                ttl_sec=self.ttl_sec,
+            )
+        if not await self._execute(
+            pipe, f"{len(conns)} соединений, {len(accounts)} аккаунтов"
+        ):
+            # Вернём в грязные, не затирая то, что изменилось за время execute
+            self._dirty_conns |= conns
+            self._dirty_accounts |= accounts
+
+    async def heartbeat(self) -> None:
+        """Продлевает TTL всех локальных записей одним pipeline."""
+        await self.flush()
+        if not self._conns:
+            return
+        pipe = self.redis.pipeline()
+        for conn_id in self._conns:
+            pipe.expire(key_ws_conn_node(conn_id), self.ttl_sec)
+        deadline = time.time() + self.ttl_sec
+        for account_id, count in self._accounts.items():
+            stage_presence(
+                pipe,
+                account_id,
+                self.node_id,
+                count,
+                deadline=deadline,
+                ttl_sec=self.ttl_sec,
+            )
+        await self._execute(pipe, f"heartbeat {len(self._conns)} соединений")
+
+    async def _execute(self, pipe, what: str) -> bool:
+        try:
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ NodeRegistry: не удалось записать {what}: {e}")
+            return False
+
+    async def node_of(self, conn_id: str) -> Optional[str]:
+        """Узел, которому принадлежит соединение (None — неизвестно/отключено)."""
+        return await self.redis.get(key_ws_conn_node(conn_id))
+
+    async def nodes_of_account(self, account_id: int) -> List[str]:
+        """Узлы, на которых у аккаунта есть соединения или сессии в grace-периоде."""
+        return list(await self.presence.nodes_of(account_id))
@@ -0,0 +1,24 @@
+# apps/gateway/gateway/reauth_batcher.py
+from __future__ import annotations
+
+from apps.gateway.gateway.token_verifier import TokenVerifier
+from libs.domain.dto.auth import ValidateTokenResponse
+from libs.utils.micro_batch import MicroBatcher
+
+
+class ReauthBatcher(MicroBatcher[str, ValidateTokenResponse]):
+    """
+    Собирает reauth-запросы соединений за окно window_ms и проверяет их
+    одной пачкой (TokenVerifier.verify_many). Волна продлений токенов,
+    выданных в одну минуту, превращается в несколько пачек вместо тысяч
+    отдельных проверок.
+    """
+
+    def __init__(
+        self, verifier: TokenVerifier, *, window_ms: float = 10.0, max_batch: int = 256
+    ):
+        super().__init__(verifier.verify_many, window_ms=window_ms, max_batch=max_batch)
+        self.verifier = verifier
+
+    async def validate(self, token: str) -> ValidateTokenResponse:
+        return await self.submit(token)
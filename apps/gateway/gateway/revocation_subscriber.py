@@ -0,0 +1,120 @@
+# apps/gateway/gateway/revocation_subscriber.py
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from apps.gateway.gateway.token_cache import TokenValidationCache
+from libs.infra.central_redis_client import CentralRedisClient
+from libs.infra.revocation import RevocationList
+from libs.utils.logging_setup import app_logger as logger
+from libs.utils.redis_keys import key_auth_revocations_channel
+
+
+class RevocationSubscriber:
+    """
+    Держит RevocationList узла в актуальном состоянии.
+
+    Сначала подписка на канал отзыва, затем загрузка списка из Redis целиком —
+    событие, пришедшее между ними, не теряется. После обрыва подписки список
+    перечитывается заново. Затронутые аккаунты вычищаются из кэша валидации,
+    а уже открытые соединения с отозванным токеном закрываются (1008).
+    """
+
+    def __init__(
+        self,
+        redis: CentralRedisClient,
+        denylist: RevocationList,
+        cache: Optional[TokenValidationCache] = None,
+        connections: Optional[ClientConnectionManager] = None,
+        *,
+        prune_interval_sec: float = 60.0,
+        retry_delay_sec: float = 1.0,
+    ):
+        self.redis = redis
+        self.denylist = denylist
+        self.cache = cache
+        self.connections = connections
+        self.prune_interval_sec = float(prune_interval_sec)
+        self.retry_delay_sec = float(retry_delay_sec)
+        self._pubsub: Any = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        try:
+            await self._connect()
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось загрузить список отзыва токенов: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self._disconnect()
+
+    async def _connect(self) -> None:
+        self._pubsub = self.redis.pubsub()
+        await self._pubsub.subscribe(key_auth_revocations_channel())
+        await self.denylist.load(self.redis)
+        if self.cache is not None:
+            # Пока подписки не было, отзывы могли пройти мимо кэша
+            self.cache.clear()
+        logger.info(f"🛑 Список отзыва токенов загружен: {len(self.denylist)} записей")
+        if self.connections is not None:
+            # ...и мимо открытых соединений: сверяем их все
+            await self.connections.close_revoked(self.denylist)
+
+    async def _disconnect(self) -> None:
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            with contextlib.suppress(Exception):
+                await pubsub.aclose()
+
+    async def _run(self) -> None:
+        pruned_at = time.monotonic()
+        while True:
+            try:
+                if self._pubsub is None:
+                    await self._connect()
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is not None:
+                    await self.on_message(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Подписка на отзыв токенов оборвалась: {e}")
+                await self._disconnect()
+                await asyncio.sleep(self.retry_delay_sec)
+                continue
+            if time.monotonic() - pruned_at >= self.prune_interval_sec:
+                self.denylist.prune()
+                pruned_at = time.monotonic()
+
+    async def on_message(self, data: Any) -> None:
+        event = self.handle(data)
+        if event is not None and self.connections is not None:
+            account_id = event.get("account_id")
+            await self.connections.close_revoked(
+                self.denylist, int(account_id) if account_id is not None else None
+            )
+
+    def handle(self, data: Any) -> Optional[Dict[str, Any]]:
+        """Применяет событие к denylist и кэшу; None — событие не разобрано."""
+        try:
+            event = json.loads(data)
+        except (TypeError, ValueError):
+            return None
+        account_id = self.denylist.apply(event)
+        if account_id is not None and self.cache is not None:
+            self.cache.invalidate_account(account_id)
+        return event
@@ -0,0 +1,131 @@
+# apps/gateway/gateway/session_resume.py
+from __future__ import annotations
+
+import hmac
+import secrets
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from apps.gateway.gateway.timing_wheel import HashedTimingWheel
+from apps.gateway.gateway.ws_codec import EncodedFrame
+
+
+@dataclass(slots=True)
+class ResumableSession:
+    """
+    Состояние WS-сессии, переживающее обрыв соединения.
+
+    seq — номер последнего кадра, отправленного клиенту. Нумеруются все кадры
+    сервера, кроме hello и pong; клиент считает их сам и при переподключении
+    сообщает last_seq, поэтому сам кадр seq не несёт и его байты остаются
+    общими для всех адресатов.
+    """
+
+    conn_id: str
+    account_id: int
+    token: str
+    seq: int = 0
+    buffer: Deque[Tuple[int, EncodedFrame]] = field(default_factory=deque)
+    # monotonic-время окончания grace-периода; None — соединение живое
+    expires_at: Optional[float] = None
+    # exp access-токена сессии (unix сек): resume не продлевает авторизацию
+    token_exp: Optional[int] = None
+    # sid и iat того же токена: перед resume сессия сверяется с denylist
+    sid: Optional[str] = None
+    iat: Optional[int] = None
+
+    @property
+    def detached(self) -> bool:
+        return self.expires_at is not None
+
+    def push(self, frame: EncodedFrame) -> int:
+        self.seq += 1
+        self.buffer.append((self.seq, frame))
+        return self.seq
+
+    def frames_after(self, last_seq: int) -> Optional[List[EncodedFrame]]:
+        """Кадры с seq > last_seq или None, если часть из них уже вытеснена из кольца."""
+        if last_seq > self.seq or last_seq < 0:
+            return None
+        oldest = self.buffer[0][0] if self.buffer else self.seq + 1
+        if last_seq + 1 < oldest:
+            return None
+        return [frame for seq, frame in self.buffer if seq > last_seq]
+
+
+class SessionRegistry:
+    """
+    Сессии для возобновления WS: кольцевой буфер последних кадров на сессию
+    и grace-период после обрыва, по истечении которого сессия забывается.
+
+    Реестр локален для процесса: resume удаётся, только если переподключение
+    попало в тот же воркер gateway. Поэтому gateway по умолчанию запускается
+    одним воркером (см. apps/gateway/gunicorn.conf.py).
+    """
+
+    def __init__(
+        self, *, buffer_frames: int = 256, grace_sec: float = 30.0, now: float = 0.0
+    ):
+        self.buffer_frames = max(1, int(buffer_frames))
+        self.grace_sec = float(grace_sec)
+        self._sessions: Dict[str, ResumableSession] = {}
+        self._expiry_wheel = HashedTimingWheel(
+            tick_sec=1.0, span_sec=max(self.grace_sec, 1.0), now=now
+        )
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self, conn_id: str, account_id: int) -> ResumableSession:
+        session = ResumableSession(
+            conn_id=conn_id,
+            account_id=account_id,
+            token=f"{conn_id}.{secrets.token_urlsafe(24)}",
+            buffer=deque(maxlen=self.buffer_frames),
+        )
+        self._sessions[conn_id] = session
+        return session
+
+    def get(self, conn_id: str) -> Optional[ResumableSession]:
+        return self._sessions.get(conn_id)
+
+    def find(self, resume_token: str) -> Optional[ResumableSession]:
+        """Сессия по resume-токену (живая или в grace-периоде)."""
+        conn_id = resume_token.rsplit(".", 1)[0]
+        session = self._sessions.get(conn_id)
+        if session is None or not hmac.compare_digest(session.token, resume_token):
+            return None
+        return session
+
+    def detach(self, conn_id: str, now: float) -> Optional[ResumableSession]:
+        """Соединение оборвалось: держим сессию grace_sec, копя кадры в буфер."""
+        session = self._sessions.get(conn_id)
+        if session is None:
+            return None
+        session.expires_at = now + self.grace_sec
+        self._expiry_wheel.schedule(conn_id, session.expires_at)
+        return session
+
+    def attach(self, conn_id: str) -> None:
+        session = self._sessions.get(conn_id)
+        if session is not None:
+            session.expires_at = None
+            self._expiry_wheel.cancel(conn_id)
+
+    def remove(self, conn_id: str) -> Optional[ResumableSession]:
+        self._expiry_wheel.cancel(conn_id)
+        return self._sessions.pop(conn_id, None)
+
+    def collect_expired(self, now: float) -> List[ResumableSession]:
+        expired: List[ResumableSession] = []
+        for key in self._expiry_wheel.advance(now):
+            session = self._sessions.get(str(key))
+            if session is None or session.expires_at is None:
+                continue
+            if session.expires_at > now:
+                self._expiry_wheel.schedule(session.conn_id, session.expires_at)
+                continue
+            del self._sessions[session.conn_id]
+            expired.append(session)
+        return expired
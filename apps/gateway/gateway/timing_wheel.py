@@ -0,0 +1,85 @@
+# apps/gateway/gateway/timing_wheel.py
+from __future__ import annotations
+
+import math
+from typing import Dict, Hashable, List, Optional
+
+
+class HashedTimingWheel:
+    """
+    Хешированное колесо таймеров для дедлайнов соединений.
+
+    - schedule/cancel — O(1);
+    - advance(now) — O(истёкших + записей в пройденных слотах с "лишними оборотами").
+    Дедлайны дальше одного оборота колеса остаются в своём слоте и проверяются
+    на следующем обороте (классический вариант с rounds через сравнение дедлайна).
+    """
+
+    __slots__ = ("_tick", "_slots", "_index", "_cursor", "_cursor_tick")
+
+    def __init__(self, tick_sec: float, span_sec: float, now: float) -> None:
+        if tick_sec <= 0:
+            raise ValueError("tick_sec must be positive")
+        self._tick = float(tick_sec)
+        slot_count = max(1, math.ceil(span_sec / self._tick) + 1)
+        self._slots: List[Dict[Hashable, float]] = [{} for _ in range(slot_count)]
+        # key -> номер слота, нужен для O(1) cancel/reschedule
+        self._index: Dict[Hashable, int] = {}
+        self._cursor_tick = self._tick_of(now)
+        self._cursor = self._cursor_tick % slot_count
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._index
+
+    def _tick_of(self, ts: float) -> int:
+        return int(ts // self._tick)
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Ставит (или переставляет) таймер key на момент deadline."""
+        self.cancel(key)
+        # Слот первого тика не раньше дедлайна: к его обходу дедлайн уже наступил,
+        # иначе дробный дедлайн ждал бы в пройденном слоте целый оборот.
+        # Просроченные дедлайны кладём в ближайший необработанный слот
+        target_tick = max(math.ceil(deadline / self._tick), self._cursor_tick + 1)
+        slot = target_tick % len(self._slots)
+        self._slots[slot][key] = deadline
+        self._index[key] = slot
+
+    def cancel(self, key: Hashable) -> Optional[float]:
+        """Снимает таймер. Возвращает его дедлайн, если он был."""
+        slot = self._index.pop(key, None)
+        if slot is None:
+            return None
+        return self._slots[slot].pop(key, None)
+
+    def advance(self, now: float) -> List[Hashable]:
+        """
+        Прокручивает колесо до момента now и возвращает ключи с истёкшим дедлайном.
+        Истёкшие таймеры снимаются с колеса.
+        """
+        expired: List[Hashable] = []
+        target_tick = self._tick_of(now)
+        slot_count = len(self._slots)
+        # За один вызов нет смысла проходить больше одного оборота
+        steps = min(target_tick - self._cursor_tick, slot_count)
+        for _ in range(steps):
+            self._cursor_tick += 1
+            self._cursor = self._cursor_tick % slot_count
+            self._collect(self._slots[self._cursor], now, expired)
+        self._cursor_tick = max(self._cursor_tick, target_tick)
+        self._cursor = self._cursor_tick % slot_count
+        return expired
+
+    def _collect(
+        self, bucket: Dict[Hashable, float], now: float, expired: List[Hashable]
+    ) -> None:
+        if not bucket:
+            return
+        due = [key for key, deadline in bucket.items() if deadline <= now]
+        for key in due:
+            del bucket[key]
+            del self._index[key]
+            expired.append(key)
@@ -0,0 +1,154 @@
+# apps/gateway/gateway/token_cache.py
+from __future__ import annotations
+
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+from libs.domain.dto.auth import ValidateTokenResponse
+from libs.utils.token_validation import (
+    BAD_AUDIENCE,
+    BAD_ISSUER,
+    INVALID_TOKEN,
+    TOKEN_EXPIRED,
+)
+
+# Отрицательные вердикты, которые не изменятся при повторной проверке.
+# Таймауты RPC и внутренние ошибки не кэшируем — следующая попытка может пройти
+_CACHEABLE_ERRORS = frozenset({TOKEN_EXPIRED, BAD_AUDIENCE, BAD_ISSUER, INVALID_TOKEN})
+
+# Оценка накладных расходов на запись: ключ-дайджест, узел OrderedDict, кортеж
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+@dataclass(slots=True)
+class _Entry:
+    result: ValidateTokenResponse
+    expires_at: float
+    size: int
+
+
+def token_digest(token: str) -> bytes:
+    """Ключ кэша: сам токен в памяти не храним."""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class TokenValidationCache:
+    """
+    LRU-кэш результатов валидации access-токенов (ключ — sha256 токена).
+
+    Положительный результат живёт не дольше ttl_sec и не дольше exp токена,
+    отрицательный — negative_ttl_sec. Отзыв (invalidate_account) удаляет все
+    записи аккаунта, чтобы отозванный токен не проходил из кэша.
+    Повторная проверка того же токена не стоит ни RPC, ни декодирования JWT.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10_000,
+        ttl_sec: float = 300.0,
+        negative_ttl_sec: float = 5.0,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_sec = float(ttl_sec)
+        self.negative_ttl_sec = float(negative_ttl_sec)
+        self._entries: "OrderedDict[bytes, _Entry]" = OrderedDict()
+        # account_id -> ключи его записей (для отзыва)
+        self._by_account: Dict[int, Set[bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, token: str, now: Optional[float] = None
+    ) -> Optional[ValidateTokenResponse]:
+        key = token_digest(token)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > (time.time() if now is None else now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.result
+            self._drop(key)
+        self.misses += 1
+        return None
+
+    def put(
+        self, token: str, result: ValidateTokenResponse, now: Optional[float] = None
+    ) -> None:
+        now = time.time() if now is None else now
+        if result.valid:
+            expires_at = now + self.ttl_sec
+            if result.exp is not None:
+                expires_at = min(expires_at, float(result.exp))
+        elif result.error_code in _CACHEABLE_ERRORS:
+            expires_at = now + self.negative_ttl_sec
+        else:
+            return
+        if expires_at <= now:
+            return
+
+        key = token_digest(token)
+        self._drop(key)
+        size = _ENTRY_OVERHEAD_BYTES + sys.getsizeof(key) + _result_size(result)
+        self._entries[key] = _Entry(result=result, expires_at=expires_at, size=size)
+        self.bytes += size
+        if result.valid and result.account_id is not None:
+            self._by_account.setdefault(result.account_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, token: str) -> None:
+        self._drop(token_digest(token))
+
+    def invalidate_account(self, account_id: int) -> int:
+        """Удаляет все закэшированные токены аккаунта; возвращает их число."""
+        keys = self._by_account.pop(account_id, set())
+        for key in keys:
+            self._drop(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_account.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "approx_bytes": self.bytes,
+        }
+
+    def _drop(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        account_id = entry.result.account_id
+        if account_id is not None:
+            keys = self._by_account.get(account_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_account[account_id]
+
+
+def _result_size(result: ValidateTokenResponse) -> int:
+    size = sys.getsizeof(result) + sys.getsizeof(result.__dict__)
+    for value in result.__dict__.values():
+        size += sys.getsizeof(value)
+    return size
@@ -0,0 +1,136 @@
+# apps/gateway/gateway/token_verifier.py
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from typing import List, Optional
+
+from pydantic import ValidationError
+
+from apps.gateway.gateway.token_cache import TokenValidationCache
+from apps.gateway.gateway.validate_rpc_batcher import ValidateRpcBatcher
+from libs.app.errors import ErrorCode
+from libs.domain.dto.auth import ValidateTokenResponse
+from libs.messaging.i_message_bus import IMessageBus
+from libs.messaging.rabbitmq_names import Exchanges, Queues
+from libs.utils.logging_setup import app_logger as logger
+from libs.infra.jwks_client import JwksClient
+from libs.utils.jwt_keys import unverified_kid
+from libs.infra.revocation import RevocationList
+from libs.utils.token_validation import INTERNAL_ERROR, TOKEN_REVOKED, TokenValidator
+
+
+class TokenVerifier:
+    """
+    Валидация access-токенов для handshake и /v1/auth/validate.
+
+    Повторные проверки того же токена отвечает кэш (если задан); отзыв
+    (logout, ротация refresh) сверяется с denylist в памяти узла.
+    Основной путь — локальный TokenValidator (те же проверки и коды ошибок,
+    что в auth_svc) без RPC через брокер. Публичные ключи приходят из JWKS
+    auth_svc; токен с незнакомым kid сначала обновляет набор ключей.
+    RPC в auth_svc остаётся запасным: когда подходящего ключа нет или локальная
+    проверка упала внутренней ошибкой. С rpc_batcher одновременные запасные
+    проверки (волна переподключений, ротация ключей) идут пачками validate_many.
+    """
+
+    def __init__(
+        self,
+        bus: IMessageBus,
+        local: Optional[TokenValidator] = None,
+        jwks: Optional[JwksClient] = None,
+        cache: Optional[TokenValidationCache] = None,
+        denylist: Optional[RevocationList] = None,
+        rpc_batcher: Optional[ValidateRpcBatcher] = None,
+    ):
+        self.bus = bus
+        self.local = local
+        self.jwks = jwks
+        self.cache = cache
+        self.denylist = denylist
+        self.rpc_batcher = rpc_batcher
+        # Сколько проверок прошло каждым путём: "local" / "rpc"
+        self.stats: Counter[str] = Counter()
+
+    async def verify(
+        self, token: str, *, correlation_id: Optional[str] = None
+    ) -> ValidateTokenResponse:
+        result = self.cache.get(token) if self.cache is not None else None
+        if result is None:
+            result = await self._verify(token, correlation_id)
+            if self.cache is not None:
+                self.cache.put(token, result)
+        # Отзыв проверяется на каждом запросе, в том числе для ответа из кэша
+        if result.valid and self.is_revoked(result.sid, result.account_id, result.iat):
+            self.stats["revoked"] += 1
+            return ValidateTokenResponse(
+                valid=False, error_code=TOKEN_REVOKED, error_message="Token revoked"
+            )
+        return result
+
+    def is_revoked(
+        self, sid: Optional[str], account_id: Optional[int], iat: Optional[int]
+    ) -> bool:
+        """Отозван ли токен с такими sid/account_id/iat (без denylist — нет)."""
+        return self.denylist is not None and self.denylist.is_revoked(
+            sid, account_id, iat
+        )
+
+    async def verify_many(self, tokens: List[str]) -> List[ValidateTokenResponse]:
+        """
+        Проверка пачки токенов (reauth); одинаковые токены проверяются один раз,
+        промахи локальной проверки уходят в auth_svc через rpc_batcher.
+        """
+        unique = list(dict.fromkeys(tokens))
+        results = await asyncio.gather(*(self.verify(token) for token in unique))
+        by_token = dict(zip(unique, results))
+        return [by_token[token] for token in tokens]
+
+    async def _verify(
+        self, token: str, correlation_id: Optional[str]
+    ) -> ValidateTokenResponse:
+        if self.local is not None and await self._has_key(token):
+            result = self.local.validate(token)
+            if result.error_code != INTERNAL_ERROR:
+                self.stats["local"] += 1
+                return result
+            logger.warning(
+                f"⚠️ Локальная валидация токена не удалась, идём в auth_svc: {result.error_message}"
+            )
+        self.stats["rpc"] += 1
+        return await self._verify_rpc(token, correlation_id)
+
+    async def _has_key(self, token: str) -> bool:
+        assert self.local is not None  # Для mypy
+        if self.local.can_verify(token):
+            return True
+        kid = unverified_kid(token)
+        if self.jwks is None or kid is None:
+            return False
+        return await self.jwks.ensure_kid(kid)
+
+    async def _verify_rpc(
+        self, token: str, correlation_id: Optional[str]
+    ) -> ValidateTokenResponse:
+        if self.rpc_batcher is not None:
+            return await self.rpc_batcher.validate(token, correlation_id)
+        rpc_resp = await self.bus.call_rpc(
+            exchange_name=Exchanges.RPC,
+            routing_key=Queues.AUTH_VALIDATE_TOKEN_RPC,
+            payload={"access_token": token},
+            correlation_id=correlation_id,
+        )
+        if not rpc_resp:
+            return ValidateTokenResponse(
+                valid=False,
+                error_code=ErrorCode.RPC_TIMEOUT.value,
+                error_message="Auth service timeout.",
+            )
+        try:
+            return ValidateTokenResponse.model_validate(rpc_resp)
+        except ValidationError as e:
+            return ValidateTokenResponse(
+                valid=False,
+                error_code=ErrorCode.RPC_BAD_RESPONSE.value,
+                error_message=str(e),
+            )
@@ -0,0 +1,105 @@
+# apps/gateway/gateway/validate_rpc_batcher.py
+from __future__ import annotations
+
+import uuid
+from typing import List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from libs.app.errors import ErrorCode
+from libs.domain.dto.auth import (
+    VALIDATE_MANY_MAX_TOKENS,
+    ValidateTokenResponse,
+    ValidateTokensResponse,
+)
+from libs.messaging.i_message_bus import IMessageBus
+from libs.messaging.rabbitmq_names import Exchanges, Queues
+from libs.utils.logging_setup import app_logger as logger
+from libs.utils.micro_batch import MicroBatcher
+
+# (токен, correlation_id запроса, который его проверяет)
+_Item = Tuple[str, Optional[str]]
+
+
+class ValidateRpcBatcher(MicroBatcher[_Item, ValidateTokenResponse]):
+    """
+    Клиент RPC-валидации токенов в auth_svc: одновременные проверки за окно
+    window_ms уходят одним сообщением validate_many. Одиночный токен идёт
+    обычным validate_token со своим correlation_id; у пачки — свой, а
+    correlation_id запросов передаются в ней поэлементно и пишутся в лог.
+    """
+
+    def __init__(
+        self, bus: IMessageBus, *, window_ms: float = 5.0, max_batch: int = 128
+    ):
+        super().__init__(
+            self._call,
+            window_ms=window_ms,
+            max_batch=min(int(max_batch), VALIDATE_MANY_MAX_TOKENS),
+        )
+        self.bus = bus
+
+    async def validate(
+        self, token: str, correlation_id: Optional[str] = None
+    ) -> ValidateTokenResponse:
+        return await self.submit((token, correlation_id))
+
+    async def _call(self, items: List[_Item]) -> List[ValidateTokenResponse]:
+        if len(items) == 1:
+            token, correlation_id = items[0]
+            rpc_resp = await self.bus.call_rpc(
+                exchange_name=Exchanges.RPC,
+                routing_key=Queues.AUTH_VALIDATE_TOKEN_RPC,
+                payload={"access_token": token},
+                correlation_id=correlation_id,
+            )
+            return [_parse_one(rpc_resp)]
+
+        tokens = [token for token, _ in items]
+        correlation_ids = [correlation_id for _, correlation_id in items]
+        batch_id = str(uuid.uuid4())
+        if any(correlation_ids):
+            logger.debug(
+                f"validate_many {batch_id}: {len(items)} токенов, "
+                f"correlation_id={correlation_ids}"
+            )
+        rpc_resp = await self.bus.call_rpc(
+            exchange_name=Exchanges.RPC,
+            routing_key=Queues.AUTH_VALIDATE_MANY_RPC,
+            payload={"tokens": tokens, "correlation_ids": correlation_ids},
+            correlation_id=batch_id,
+        )
+        if not rpc_resp:
+            return [_timeout()] * len(tokens)
+        try:
+            results = ValidateTokensResponse.model_validate(rpc_resp).results
+        except ValidationError as e:
+            return [_bad_response(str(e))] * len(tokens)
+        if len(results) != len(tokens):
+            return [
+                _bad_response(f"{len(results)} results for {len(tokens)} tokens")
+            ] * len(tokens)
+        return results
+
+
+def _parse_one(rpc_resp) -> ValidateTokenResponse:
+    if not rpc_resp:
+        return _timeout()
+    try:
+        return ValidateTokenResponse.model_validate(rpc_resp)
+    except ValidationError as e:
+        return _bad_response(str(e))
+
+
+def _timeout() -> ValidateTokenResponse:
+    return ValidateTokenResponse(
+        valid=False,
+        error_code=ErrorCode.RPC_TIMEOUT.value,
+        error_message="Auth service timeout.",
+    )
+
+
+def _bad_response(message: str) -> ValidateTokenResponse:
+    return ValidateTokenResponse(
+        valid=False, error_code=ErrorCode.RPC_BAD_RESPONSE.value, error_message=message
+    )
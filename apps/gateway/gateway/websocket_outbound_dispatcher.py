@@ -1,85 +1,99 @@
 # apps/gateway/gateway/websocket_outbound_dispatcher.py
 from __future__ import annotations
 
-import asyncio
-from typing import Optional, Dict, Any, cast
+import json
+from typing import Dict, Any, Optional, Set, Tuple, cast
 from libs.utils.logging_setup import app_logger as logger
 
-from libs.messaging.i_message_bus import IMessageBus
-from libs.messaging.rabbitmq_names import Queues
+from libs.messaging.base_listener import BaseMicroserviceListener
 from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from apps.gateway.gateway.account_mailbox import AccountMailbox
+from apps.gateway.gateway.node_registry import NodeRegistry
+from apps.gateway.gateway.delta_state import json_diff
+from apps.gateway.gateway.ws_codec import EncodedFrame
 
 # Новые DTO
 from libs.domain.dto.backend import BackendOutboundEnvelope
 from libs.domain.dto.ws import (
+    WSDeltaFrame,
     WSEventFrame,
     WSErrorFrame,
     ServerWSFrame,
     ServerEventStatus,
 )
 from libs.domain.dto.errors import ErrorDTO
+from libs.messaging.rabbitmq_names import Exchanges
 
+# Заголовок пересланного между воркерами сообщения (значение — node_id отправителя).
+# Пересланное доставляется только локально и дальше не пересылается
+FORWARDED_HEADER = "x-gateway-forwarded-by"
 
-class OutboundWebSocketDispatcher:
+
+class OutboundWebSocketDispatcher(BaseMicroserviceListener):
     """
     Консьюмер исходящих сообщений из бекэндов и доставка их в WebSocket.
     Ждём новый envelope: BackendOutboundEnvelope.
+    По final/error снимает команду из in-flight соединения (по request_id).
+
+    При нескольких воркерах адресаты на других узлах находятся по NodeRegistry,
+    и сообщение пересылается в их очереди (Exchanges.GATEWAY_OUTBOUND).
     """
 
     def __init__(
         self,
-        message_bus: IMessageBus,
         client_connection_manager: ClientConnectionManager,
+        mailbox: Optional[AccountMailbox] = None,
+        registry: Optional[NodeRegistry] = None,
+        **kwargs,
     ):
-        self.message_bus = message_bus
+        super().__init__(**kwargs)
         self.client_connection_manager = client_connection_manager
-        self._listen_task: Optional[asyncio.Task] = None
-        self.outbound_queue_name = Queues.GATEWAY_WS_OUTBOUND  # ИЗМЕНЕНИЕ
+        # Кадры аккаунтам без сессий на этом узле откладываются в Redis
+        self.mailbox = mailbox
+        self.registry = registry
         logger.info("✅ OutboundWebSocketDispatcher инициализирован.")
 
-    async def start_listening_for_outbound_messages(self):
+    async def process_message(self, data: Dict[str, Any], meta: Dict[str, Any]) -> None:
         """
-        Подписываемся на общую очередь исходящих сообщений к клиентам.
+        data: dict (JSON), meta: {message_id, correlation_id, routing_key, ...}
+        Формат data соответствует BackendOutboundEnvelope.
+        Невалидный envelope -> ValidationError -> DLQ (см. BaseMicroserviceListener).
         """
-        logger.info(f"📥 Подписка на очередь: {self.outbound_queue_name}")
-        await self.message_bus.consume(
-            queue_name=self.outbound_queue_name,
-            handler=self._handle_outbound_message,
-            prefetch=64,
-        )
+        env = BackendOutboundEnvelope.model_validate(data)
+        manager = self.client_connection_manager
 
-    async def _handle_outbound_message(
-        self, body: Dict[str, Any], meta: Dict[str, Any]
-    ) -> None:
-        """
-        body: dict (JSON), meta: {message_id, correlation_id, routing_key, ...}
-        Формат body соответствует BackendOutboundEnvelope.
-        """
-        try:
-            env = BackendOutboundEnvelope.model_validate(body)
-        except Exception as e:
-            logger.warning(f"❌ Невалидный outbound envelope: {e} | body={body!r}")
-            # бросаем исключение -> сообщение уйдёт в DLQ/отклонится (зависит от реализации bus)
-            raise
+        headers = meta.get("headers") or {}
+        forwarded = bool(headers.get(FORWARDED_HEADER))
+        # Искать адресатов на других воркерах, если сообщение пришло не от соседа
+        route = self.registry is not None and not forwarded
 
         # --- Кому доставлять ---
         targets: list[str] = []
+        remote_nodes: Set[str] = set()
         if env.recipient:
             # приоритетное соединение
             if env.recipient.connection_id:
-                targets.append(env.recipient.connection_id)
-            elif env.recipient.account_id:
-                targets.append(
-                    str(env.recipient.account_id)
-                )  # ИЗМЕНЕНИЕ: приводим к str
-
-        # TODO: групповые рассылки подключим позже (delivery.mode == "group")
-
-        if not targets:
-            logger.info(
-                f"⚠️ Нет адресата в envelope (recipient/delivery пустые). Пропускаю. request_id={env.request_id}"
-            )
-            return
+                conn_id = env.recipient.connection_id
+                if manager.is_local(conn_id):
+                    targets.append(conn_id)
+                elif route:
+                    node = await cast(NodeRegistry, self.registry).node_of(conn_id)
+                    if node:
+                        remote_nodes.add(node)
+            elif env.recipient.account_id is not None:
+                targets.extend(
+                    manager.get_account_connections(env.recipient.account_id)
+                )
+                if route:
+                    remote_nodes.update(
+                        await cast(NodeRegistry, self.registry).nodes_of_account(
+                            env.recipient.account_id
+                        )
+                    )
+        if self.registry is not None:
+            remote_nodes.discard(self.registry.node_id)
+        for node in remote_nodes:
+            await self._forward(node, data, meta)
 
         # --- Сформировать кадр ответа ---
         frame: ServerWSFrame  # ДОБАВЛЕНО: явное указание типа
@@ -90,7 +104,6 @@ class OutboundWebSocketDispatcher:
                 details={},  # ИЗМЕНЕНИЕ
             )
             frame = WSErrorFrame(error=err, request_id=env.request_id, v=1)  # ИЗМЕНЕНИЕ
-            payload_json = frame.model_dump_json()
         else:
             server_status = (
                 "final" if env.final else ("update" if env.status == "update" else "ok")
@@ -102,16 +115,101 @@ class OutboundWebSocketDispatcher:
                 request_id=env.request_id,
                 tick=env.tick,
                 state_version=env.state_version,
+                key=env.entity_key,
                 v=1,  # ИЗМЕНЕНИЕ
             )
-            payload_json = frame.model_dump_json()
+
+        # TODO: групповые рассылки подключим позже (delivery.mode == "group")
+
+        if not targets:
+            if remote_nodes or forwarded:
+                # Доставят соседние воркеры; пересланное же адресат успел покинуть
+                return
+            if (
+                self.mailbox is not None
+                and env.recipient is not None
+                and not env.recipient.connection_id
+                and env.recipient.account_id is not None
+            ):
+                # Аккаунт офлайн: отложим кадр до его следующего подключения
+                await self.mailbox.push(env.recipient.account_id, frame)
+                logger.debug(
+                    f"📬 Кадр для офлайн-аккаунта {env.recipient.account_id} отложен в mailbox (event={env.event})"
+                )
+                return
+            logger.info(
+                f"⚠️ Нет активного адресата для envelope (recipient={env.recipient}). Пропускаю. request_id={env.request_id}"
+            )
+            return
+
+        # Кодируем один раз на формат (JSON/msgpack), а не на каждого адресата
+        encoded = EncodedFrame(frame)
+        completes_request = env.request_id is not None and (
+            env.final or env.status == "error"
+        )
+
+        # Latest-wins: промежуточный update, ещё не ушедший клиенту, заменяется новым
+        # update той же сущности. final/error никогда не сливаются; без entity_key
+        # сущности не различить — такие кадры тоже не сливаем
+        coalesce_key = (
+            (env.event, env.entity_key)
+            if env.coalesce
+            and env.entity_key is not None
+            and env.status == "update"
+            and not env.final
+            else None
+        )
+
+        delta = manager.delta_state
+        use_delta = (
+            delta is not None
+            and env.status != "error"
+            and env.entity_key is not None
+            and env.state_version is not None
+        )
+        # Дельты к одной и той же базе одинаковы для всех адресатов: id(payload базы) ->
+        # (payload, кадр или None, если дельта не меньше снимка). Ссылка на payload
+        # в значении не даёт id переиспользоваться, пока идёт рассылка.
+        deltas: Dict[int, Tuple[Dict[str, Any], Optional[EncodedFrame]]] = {}
+        snapshot_size: Optional[int] = None
 
         # --- Доставить всем таргетам ---
         delivered = 0
         for target_id in targets:
-            ok = await self.client_connection_manager.send_message_to_client(
-                target_id, payload_json
-            )
+            if completes_request:
+                manager.complete_command(target_id, cast(str, env.request_id))
+
+            to_send = encoded
+            if use_delta:
+                key, version = cast(str, env.entity_key), cast(int, env.state_version)
+                base = delta.base_for(target_id, key, version)
+                # Заменяемый в очереди кадр клиент не увидит, поэтому дельта к
+                # нему невалидна: на его место ставим полный снимок
+                if base is not None and not (
+                    coalesce_key is not None
+                    and manager.has_queued(target_id, coalesce_key)
+                ):
+                    cached = deltas.get(id(base.payload))
+                    if cached is None or cached[0] is not base.payload:
+                        if snapshot_size is None:
+                            snapshot_size = len(json.dumps(env.payload, default=str))
+                        cached = (
+                            base.payload,
+                            self._build_delta(
+                                env, base.version, snapshot_size, base.payload
+                            ),
+                        )
+                        deltas[id(base.payload)] = cached
+                    if cached[1] is not None:
+                        to_send = cached[1]
+
+            ok = await manager.send_frame(target_id, to_send, coalesce_key)
+            if use_delta:
+                if ok:
+                    # Очередь и TCP доставляют по порядку: отправленное считаем базой клиента
+                    delta.remember(target_id, key, version, env.payload)
+                else:
+                    delta.forget(target_id, key)
             if not ok:
                 logger.debug(
                     f"Нет активного WS для '{target_id}' (corr={meta.get('correlation_id')})"
@@ -129,3 +227,43 @@ class OutboundWebSocketDispatcher:
                 f"✅ Доставлено {delivered}/{len(targets)} адресатам "
                 f"(corr={meta.get('correlation_id')}, event={env.event})"
             )
+
+    async def _forward(
+        self, node: str, data: Dict[str, Any], meta: Dict[str, Any]
+    ) -> None:
+        await self.bus.publish(
+            exchange_name=Exchanges.GATEWAY_OUTBOUND,
+            routing_key=node,
+            message=data,
+            correlation_id=meta.get("correlation_id"),
+            headers={FORWARDED_HEADER: cast(NodeRegistry, self.registry).node_id},
+            persistent=False,
+        )
+        logger.debug(f"↪️ Outbound переслан воркеру {node}")
+
+    @staticmethod
+    def _build_delta(
+        env: BackendOutboundEnvelope,
+        base_version: int,
+        snapshot_size: int,
+        base_payload: Dict[str, Any],
+    ) -> Optional[EncodedFrame]:
+        """Кадр-дельта к базе или None, если патч не меньше полного снимка."""
+        patch = json_diff(base_payload, env.payload)
+        if len(json.dumps(patch, default=str)) >= snapshot_size:
+            return None
+        server_status = (
+            "final" if env.final else ("update" if env.status == "update" else "ok")
+        )
+        return EncodedFrame(
+            WSDeltaFrame(
+                event=env.event,
+                status=cast(ServerEventStatus, server_status),
+                key=cast(str, env.entity_key),
+                base_version=base_version,
+                state_version=cast(int, env.state_version),
+                patch=patch,
+                request_id=env.request_id,
+                tick=env.tick,
+            )
+        )
@@ -0,0 +1,351 @@
+# apps/gateway/gateway/ws_codec.py
+from __future__ import annotations
+
+import asyncio
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Union, cast
+
+import msgpack
+from pydantic import BaseModel
+from starlette.websockets import WebSocket
+
+from libs.domain.dto.ws import CLIENT_WS_FRAME_ADAPTER, ClientWSFrame
+
+WireData = Union[str, bytes]
+
+# Sec-WebSocket-Protocol для бинарного формата
+MSGPACK_SUBPROTOCOL = "gk.msgpack.v1"
+# Базовое имя JSON-формата: нужно только для сжатых вариантов ("gk.json.v1.deflate")
+JSON_SUBPROTOCOL = "gk.json.v1"
+
+# Суффиксы сжатых вариантов протокола
+DEFLATE_SUFFIX = ".deflate"
+DEFLATE_CTX_SUFFIX = ".deflate-ctx"
+
+# Флаг в первом байте сжатого кадра
+_FLAG_RAW = 0x00
+_FLAG_DEFLATE = 0x01
+# Хвост Z_SYNC_FLUSH, который не передаётся (как в RFC 7692)
+_SYNC_TAIL = b"\x00\x00\xff\xff"
+# Защита от zip-бомб во входящих кадрах
+MAX_INFLATED_BYTES = 1 << 20
+
+# Короткие ключи верхнего уровня кадра (payload/error внутри не трогаем).
+# Карта общая для обоих направлений, поэтому короткие ключи уникальны.
+COMPACT_KEYS: Dict[str, str] = {
+    "type": "t",
+    "v": "v",
+    "ts": "ts",
+    "request_id": "rid",
+    "meta": "m",
+    "payload": "p",
+    "event": "e",
+    "status": "s",
+    "tick": "tk",
+    "state_version": "sv",
+    "connection_id": "cid",
+    "heartbeat_sec": "hb",
+    "error": "err",
+    "nonce": "n",
+    "domain": "d",
+    "command": "c",
+    "client_msg_id": "cm",
+    "topic": "tp",
+    "filters": "f",
+    "key": "k",
+    "base_version": "bv",
+    "patch": "pt",
+    "resume_token": "rt",
+    "resumed": "rs",
+    "frames": "fr",
+    "actor": "a",
+    "token": "tok",
+    "exp": "x",
+    "expires_in": "xi",
+}
+EXPANDED_KEYS: Dict[str, str] = {short: full for full, short in COMPACT_KEYS.items()}
+
+
+def _to_epoch_ms(value: datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return _to_epoch_ms(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(exclude_none=True)
+    return str(obj)
+
+
+class WSCodec:
+    """Формат кадров одного WS-соединения. Выбирается один раз при handshake."""
+
+    name: str = "json"
+    subprotocol: Optional[str] = None
+    base_subprotocol: str = JSON_SUBPROTOCOL
+    binary: bool = False
+    # Кодек с состоянием (общий zlib-контекст) требует строгого порядка encode+send
+    send_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def cache_key(self) -> Optional[str]:
+        """Ключ для EncodedFrame; None — результат нельзя переиспользовать между соединениями."""
+        return self.name
+
+    def encode_from(self, encoded: "EncodedFrame") -> WireData:
+        frame = encoded.frame
+        if isinstance(frame, BaseModel):
+            return self.encode(frame)
+        return self.encode_dict(frame)
+
+    def encode(self, frame: BaseModel) -> WireData:
+        # JSON-формат оставляем прежним (включая null-поля) ради старых клиентов
+        return frame.model_dump_json()
+
+    def encode_dict(self, data: Dict[str, Any]) -> WireData:
+        """Для кадров, которые собираются словарём, а не DTO (широковещательные события)."""
+        return json.dumps(data, default=str)
+
+    def encode_batch(self, frames: List["EncodedFrame"]) -> WireData:
+        """
+        WSBatchFrame из уже закодированных кадров: вложенные кадры не
+        сериализуются заново, а склеиваются из кэша EncodedFrame.
+        """
+        parts = ",".join(cast(str, f.for_codec(self)) for f in frames)
+        return f'{{"type":"batch","v":1,"frames":[{parts}]}}'
+
+    def decode(self, raw: WireData) -> ClientWSFrame:
+        return CLIENT_WS_FRAME_ADAPTER.validate_json(raw)
+
+
+class MsgpackCodec(WSCodec):
+    """
+    msgpack с короткими ключами: null-поля не передаются, ts — epoch в миллисекундах.
+    """
+
+    name = "msgpack"
+    subprotocol = MSGPACK_SUBPROTOCOL
+    base_subprotocol = MSGPACK_SUBPROTOCOL
+    binary = True
+
+    def encode(self, frame: BaseModel) -> bytes:
+        return self.encode_dict(frame.model_dump(exclude_none=True))
+
+    def encode_dict(self, data: Dict[str, Any]) -> bytes:
+        compact = {COMPACT_KEYS.get(k, k): v for k, v in data.items()}
+        ts = compact.get("ts")
+        if isinstance(ts, datetime):
+            compact["ts"] = _to_epoch_ms(ts)
+        return msgpack.packb(compact, use_bin_type=True, default=_msgpack_default)
+
+    def encode_batch(self, frames: List["EncodedFrame"]) -> bytes:
+        packer = msgpack.Packer(use_bin_type=True)
+        head = (
+            packer.pack_map_header(2)
+            + packer.pack(COMPACT_KEYS["type"])
+            + packer.pack("batch")
+            + packer.pack(COMPACT_KEYS["frames"])
+            + packer.pack_array_header(len(frames))
+        )
+        return head + b"".join(cast(bytes, f.for_codec(self)) for f in frames)
+
+    def decode(self, raw: WireData) -> ClientWSFrame:
+        if isinstance(raw, str):
+            # Текстовый кадр на бинарном соединении — это JSON (например, отладка)
+            return super().decode(raw)
+        data = msgpack.unpackb(raw, raw=False)
+        if not isinstance(data, dict):
+            # Пусть валидация вернёт клиенту нормальную ошибку
+            return CLIENT_WS_FRAME_ADAPTER.validate_python(data)
+        # pydantic принимает int-время: значения > 2e10 трактуются как миллисекунды
+        return CLIENT_WS_FRAME_ADAPTER.validate_python(
+            {EXPANDED_KEYS.get(k, k): v for k, v in data.items()}
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class DeflateOptions:
+    """Серверные параметры сжатия (см. GATEWAY_WS_DEFLATE_*)."""
+
+    threshold: int = 512
+    level: int = 6
+    # Окно 2**window_bits: меньше — меньше памяти на соединение, хуже степень сжатия
+    window_bits: int = 15
+    mem_level: int = 8
+    allow_context_takeover: bool = True
+
+
+class DeflateCodec(WSCodec):
+    """
+    Сжатие поверх JSON/msgpack на уровне приложения (аналог permessage-deflate).
+
+    Кадр бинарный: 1 байт флага (0 — как есть, 1 — raw deflate) + данные.
+    Кадры меньше threshold не сжимаются. Без context takeover каждый кадр
+    сжимается независимо, поэтому сжатые байты одного события переиспользуются
+    всеми соединениями с теми же параметрами. С context takeover словарь
+    сохраняется между кадрами (лучше степень сжатия, ~2**(window_bits+2) байт
+    памяти на соединение), клиент держит один inflate-контекст на соединение.
+    """
+
+    binary = True
+
+    def __init__(
+        self, inner: WSCodec, options: DeflateOptions, *, context_takeover: bool
+    ) -> None:
+        self.inner = inner
+        self.options = options
+        self.context_takeover = context_takeover
+        suffix = DEFLATE_CTX_SUFFIX if context_takeover else DEFLATE_SUFFIX
+        self.name = f"{inner.name}{suffix}"
+        self.subprotocol = f"{inner.base_subprotocol}{suffix}"
+        self.base_subprotocol = inner.base_subprotocol
+        self._compressor = self._new_compressor() if context_takeover else None
+        self.send_lock = asyncio.Lock() if context_takeover else None
+
+    @property
+    def cache_key(self) -> Optional[str]:
+        if self.context_takeover:
+            return None
+        o = self.options
+        return f"{self.name}:{o.level}:{o.window_bits}:{o.mem_level}:{o.threshold}"
+
+    def _new_compressor(self):
+        o = self.options
+        return zlib.compressobj(o.level, zlib.DEFLATED, -o.window_bits, o.mem_level)
+
+    def _pack(self, data: WireData) -> bytes:
+        raw = data.encode() if isinstance(data, str) else data
+        if len(raw) < self.options.threshold:
+            return bytes((_FLAG_RAW,)) + raw
+        compressor = self._compressor or self._new_compressor()
+        compressed = compressor.compress(raw) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return bytes((_FLAG_DEFLATE,)) + compressed[: -len(_SYNC_TAIL)]
+
+    def encode(self, frame: BaseModel) -> bytes:
+        return self._pack(self.inner.encode(frame))
+
+    def encode_dict(self, data: Dict[str, Any]) -> bytes:
+        return self._pack(self.inner.encode_dict(data))
+
+    def encode_from(self, encoded: "EncodedFrame") -> bytes:
+        # Несжатая сериализация общая с остальными соединениями того же формата
+        return self._pack(encoded.for_codec(self.inner))
+
+    def encode_batch(self, frames: List["EncodedFrame"]) -> bytes:
+        # Сжимаем пачку целиком: повторяющиеся ключи кадров жмутся лучше
+        return self._pack(self.inner.encode_batch(frames))
+
+    def decode(self, raw: WireData) -> ClientWSFrame:
+        if isinstance(raw, str) or not raw:
+            return self.inner.decode(raw)
+        flag, body = raw[0], raw[1:]
+        if flag == _FLAG_DEFLATE:
+            # Клиентские кадры сжимаются независимо (без context takeover)
+            inflater = zlib.decompressobj(-self.options.window_bits)
+            try:
+                body = inflater.decompress(body + _SYNC_TAIL, MAX_INFLATED_BYTES)
+            except zlib.error as e:
+                # Битый кадр от клиента — ошибка протокола, а не внутренняя
+                raise ValueError(f"Malformed deflate frame: {e}") from e
+            if inflater.unconsumed_tail:
+                raise ValueError("Inflated client frame is too large")
+        elif flag != _FLAG_RAW:
+            raise ValueError(f"Unknown frame flag: {flag}")
+        return self.inner.decode(body)
+
+
+JSON_CODEC = WSCodec()
+MSGPACK_CODEC = MsgpackCodec()
+
+_CODECS_BY_SUBPROTOCOL: Dict[str, WSCodec] = {
+    JSON_SUBPROTOCOL: JSON_CODEC,
+    MSGPACK_SUBPROTOCOL: MSGPACK_CODEC,
+}
+
+
+def negotiate_codec(
+    offered: Iterable[str], deflate: Optional[DeflateOptions] = None
+) -> WSCodec:
+    """
+    Первый поддерживаемый протокол из предложенных клиентом; иначе JSON.
+    Сжатые варианты ("<base>.deflate", "<base>.deflate-ctx") доступны, если передан deflate.
+    """
+    for proto in offered:
+        proto = proto.strip()
+        codec = _CODECS_BY_SUBPROTOCOL.get(proto)
+        if codec is not None:
+            return codec
+        if deflate is None:
+            continue
+        for suffix, ctx in ((DEFLATE_SUFFIX, False), (DEFLATE_CTX_SUFFIX, True)):
+            if not proto.endswith(suffix):
+                continue
+            inner = _CODECS_BY_SUBPROTOCOL.get(proto[: -len(suffix)])
+            if inner is not None and (not ctx or deflate.allow_context_takeover):
+                return DeflateCodec(inner, deflate, context_takeover=ctx)
+    return JSON_CODEC
+
+
+class EncodedFrame:
+    """
+    Кадр, закодированный лениво и не более одного раза на формат:
+    при рассылке многим соединениям сериализация (и сжатие) не повторяется.
+    """
+
+    __slots__ = ("frame", "_cache")
+
+    def __init__(self, frame: Union[BaseModel, Dict[str, Any]]):
+        self.frame = frame
+        self._cache: Dict[str, WireData] = {}
+
+    def for_codec(self, codec: WSCodec) -> WireData:
+        key = codec.cache_key
+        if key is None:
+            return codec.encode_from(self)
+        data = self._cache.get(key)
+        if data is None:
+            data = codec.encode_from(self)
+            self._cache[key] = data
+        return data
+
+
+async def send_frame(
+    websocket: WebSocket, codec: WSCodec, frame: Union[BaseModel, EncodedFrame]
+) -> None:
+    """Кодирует и отправляет кадр в формате соединения."""
+    if codec.send_lock is not None:
+        # Общий zlib-контекст: кадры должны уйти в том же порядке, в каком сжаты
+        async with codec.send_lock:
+            await _write(websocket, _encode(codec, frame))
+    else:
+        await _write(websocket, _encode(codec, frame))
+
+
+async def send_frames(
+    websocket: WebSocket, codec: WSCodec, frames: List[EncodedFrame]
+) -> None:
+    """Отправляет кадры одним WS-сообщением (WSBatchFrame); один кадр — как есть."""
+    if len(frames) == 1:
+        await send_frame(websocket, codec, frames[0])
+    elif codec.send_lock is not None:
+        async with codec.send_lock:
+            await _write(websocket, codec.encode_batch(frames))
+    else:
+        await _write(websocket, codec.encode_batch(frames))
+
+
+def _encode(codec: WSCodec, frame: Union[BaseModel, EncodedFrame]) -> WireData:
+    if isinstance(frame, EncodedFrame):
+        return frame.for_codec(codec)
+    return codec.encode(frame)
+
+
+async def _write(websocket: WebSocket, data: WireData) -> None:
+    if isinstance(data, bytes):
+        await websocket.send_bytes(data)
+    else:
+        await websocket.send_text(data)
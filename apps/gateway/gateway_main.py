@@ -1,7 +1,7 @@
 # apps/gateway/gateway_main.py
 import asyncio
 import time
-from fastapi import status
+from fastapi import FastAPI, status
 
 from starlette.middleware.cors import CORSMiddleware
 
@@ -10,7 +10,12 @@ from libs.app.security_middleware import SecurityHeadersMiddleware
 from libs.messaging.rabbitmq_topology import declare_gateway_topology
 from apps.gateway.rest.routers_config import ROUTERS_CONFIG
 from libs.containers.gateway_container import GatewayContainer
-from apps.gateway.listeners import create_event_broadcast_listener_factory
+from libs.domain.dto.ws import WSTokenExpiringFrame
+from apps.gateway.listeners import (
+    create_event_broadcast_listener_factory,
+    create_ws_outbound_listener_factory,
+    create_node_outbound_listener_factory,
+)
 from apps.gateway.config.setting_gateway import GatewaySettings
 from libs.utils.logging_setup import app_logger as logger
 
@@ -19,56 +24,115 @@ from libs.utils.logging_setup import app_logger as logger
 async def idle_connection_checker(
     settings: GatewaySettings, container: GatewayContainer
 ):
-    """Фоновая задача, которая периодически находит и закрывает неактивные WS-соединения."""
+    """
+    Фоновая задача, закрывающая неактивные WS-соединения и соединения
+    с истёкшим access-токеном (за token_warn_sec до exp клиент получает
+    token_expiring и может продлиться кадром reauth).
+    На каждом тике колёса таймеров обрабатывают только наступившие дедлайны.
+    """
     manager = container.client_connection_manager
     logger.info("🚀 Фоновый сторож неактивных WS-соединений запущен.")
     while True:
-        # Проверяем соединения с той же частотой, что и шлём пинги
-        await asyncio.sleep(settings.GATEWAY_WS_PING_INTERVAL)
+        await asyncio.sleep(settings.GATEWAY_WS_IDLE_TICK_SEC)
 
         now = time.monotonic()
-        idle_timeout = settings.GATEWAY_WS_IDLE_TIMEOUT
-        closed_count = 0
-
-        # Создаем копию ключей, чтобы безопасно изменять словарь во время итерации
-        client_ids = list(manager.active_connections.keys())
-
-        for client_id in client_ids:
-            connection_data = manager.active_connections.get(client_id)
-            if not connection_data:
-                continue
-
-            websocket, last_activity = connection_data
-            if now - last_activity > idle_timeout:
-                logger.warning(f"🔌 WS idle timeout: закрываем соединение {client_id}")
-                try:
-                    # Пытаемся корректно закрыть соединение
-                    await websocket.close(
-                        code=status.WS_1008_POLICY_VIOLATION, reason="Idle timeout"
+        # Сессии, не возобновлённые за grace-период, забываем окончательно
+        manager.expire_sessions(now)
+
+        idle = manager.collect_idle(now)
+        wall_now = time.time()
+        expiring, expired = manager.collect_token_expiry(wall_now)
+
+        if expiring:
+            await asyncio.gather(
+                *(
+                    manager.send_frame(
+                        client_id,
+                        WSTokenExpiringFrame(
+                            exp=record.token_exp,
+                            expires_in=max(0, int(record.token_exp - wall_now)),
+                        ),
                     )
-                except Exception:
-                    # Если закрыть не удалось (например, оно уже оборвалось), просто игнорируем
-                    pass
-                finally:
-                    # В любом случае удаляем из нашего менеджера
-                    manager.disconnect(client_id)
-                    closed_count += 1
+                    for client_id, record in expiring
+                )
+            )
+
+        if not idle and not expired:
+            continue
+
+        async def _close(client_id: str, websocket, reason: str) -> None:
+            logger.warning(f"🔌 WS {reason}: закрываем соединение {client_id}")
+            try:
+                # Пытаемся корректно закрыть соединение
+                await websocket.close(
+                    code=status.WS_1008_POLICY_VIOLATION, reason=reason
+                )
+            except Exception:
+                # Если закрыть не удалось (например, оно уже оборвалось), просто игнорируем
+                pass
+            finally:
+                # В любом случае удаляем из нашего менеджера
+                manager.disconnect(client_id)
+
+        # Закрываем пачкой, чтобы один "медленный" сокет не задерживал остальные
+        await asyncio.gather(
+            *(_close(cid, record.websocket, "Idle timeout") for cid, record in idle),
+            *(
+                _close(cid, record.websocket, "Token expired")
+                for cid, record in expired
+            ),
+        )
+        logger.info(
+            f"Сторож закрыл {len(idle)} неактивных WS-соединений "
+            f"и {len(expired)} с истёкшим токеном."
+        )
+
+
+async def drain_on_sigterm(settings: GatewaySettings, container: GatewayContainer):
+    """
+    Держит перехват SIGTERM на время жизни воркера: при остановке сначала
+    отрабатывает DrainController, и только потом сервер завершает процесс.
+    """
+    container.drain.install_signal_handler()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        container.drain.remove_signal_handler()
+
+
+async def finish_drain(settings: GatewaySettings, container: GatewayContainer):
+    """
+    Хук остановки: дренаж, начатый по SIGTERM или /admin/drain, дорабатывает,
+    пока слушатели и шина ещё живы. Новый здесь не начинаем — к этому моменту
+    сервер уже закрыл сокеты и дренировать нечего.
+    """
+    await container.drain.wait()
+
 
-        if closed_count > 0:
-            logger.info(f"Сторож закрыл {closed_count} неактивных WS-соединений.")
+async def accepting_check(app: FastAPI):
+    """Воркер в режиме drain снимается с балансировки до закрытия соединений."""
+    return "accepting", not app.state.container.drain.draining
 
 
 event_listener_factory = create_event_broadcast_listener_factory()
+ws_outbound_listener_factory = create_ws_outbound_listener_factory()
+node_outbound_listener_factory = create_node_outbound_listener_factory()
 
 app = create_service_app(
     service_name="gateway",
     container_factory=GatewayContainer.create,
     settings_class=GatewaySettings,
     topology_declarator=declare_gateway_topology,
-    listener_factories=[event_listener_factory],
+    listener_factories=[
+        event_listener_factory,
+        ws_outbound_listener_factory,
+        node_outbound_listener_factory,
+    ],
     include_rest_routers=ROUTERS_CONFIG,
     # --- ШАГ 2.2: РЕГИСТРИРУЕМ НАШУ ФОНОВУЮ ЗАДАЧУ ---
-    background_tasks=[idle_connection_checker],
+    background_tasks=[idle_connection_checker, drain_on_sigterm],
+    extra_readiness_checks=[accepting_check],
+    shutdown_hooks=[finish_drain],
 )
 
 app.add_middleware(SecurityHeadersMiddleware)
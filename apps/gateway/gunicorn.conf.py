@@ -0,0 +1,31 @@
+# apps/gateway/gunicorn.conf.py
+# Запуск: gunicorn -c apps/gateway/gunicorn.conf.py apps.gateway.gateway_main:app
+import multiprocessing
+import os
+
+bind = os.getenv("GATEWAY_BIND", "0.0.0.0:8000")
+# По умолчанию один воркер. SessionRegistry (буферы для ?resume=) живёт в памяти
+# воркера, а переподключение попадает в произвольный воркер: при N воркерах
+# примерно (N-1)/N возобновлений не найдут сессию, и клиент пройдёт полный
+# вход с токеном и потеряет буфер кадров. Исходящие сообщения между воркерами
+# маршрутизирует NodeRegistry, поэтому больше воркеров (0 — по числу ядер)
+# имеет смысл, когда пропускная способность важнее бесшовного resume
+workers = int(os.getenv("GATEWAY_WORKERS", "1")) or multiprocessing.cpu_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# SO_REUSEPORT: новый master при rolling-рестарте может занять порт, пока старый
+# дорабатывает. Привязки клиента к воркеру это не даёт — каждое соединение
+# (и каждое переподключение) принимает любой воркер
+reuse_port = True
+
+# Тяжёлые импорты (FastAPI, pydantic-модели, aio-pika) и чтение настроек —
+# один раз в master до fork. Подключения к RabbitMQ/Redis создаются в lifespan
+# каждого воркера, поэтому общих сокетов между процессами нет
+preload_app = True
+
+# Время на дренаж WS-соединений при остановке воркера
+graceful_timeout = int(os.getenv("GATEWAY_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
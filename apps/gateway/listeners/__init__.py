@@ -1,12 +1,15 @@
 # apps/gateway/listeners/__init__.py
 from __future__ import annotations
-import uuid
 from typing import Callable, Awaitable
 
 from libs.messaging.i_message_bus import IMessageBus
 from libs.containers.gateway_container import GatewayContainer
 from libs.messaging.base_listener import BaseMicroserviceListener
 from libs.messaging.rabbitmq_names import Exchanges as Ex
+from libs.messaging.rabbitmq_names import Queues, get_gateway_node_queue_name
+from apps.gateway.gateway.websocket_outbound_dispatcher import (
+    OutboundWebSocketDispatcher,
+)
 
 from .event_listener import EventBroadcastListener
 
@@ -22,7 +25,8 @@ def create_event_broadcast_listener_factory() -> ListenerFactory:
     async def factory(
         bus: IMessageBus, container: GatewayContainer
     ) -> BaseMicroserviceListener:
-        queue_name = f"gateway.events.broadcast.{uuid.uuid4().hex}"
+        # Своя очередь у каждого воркера: событие получают все процессы gateway
+        queue_name = f"gateway.events.broadcast.{container.node_id}"
         await bus.declare_queue(
             queue_name, durable=False, auto_delete=True, exclusive=True
         )
@@ -40,3 +44,51 @@ def create_event_broadcast_listener_factory() -> ListenerFactory:
         )
 
     return factory
+
+
+def create_ws_outbound_listener_factory() -> ListenerFactory:
+    """Фабрика слушателя ответов бекэндов (BackendOutboundEnvelope) для доставки в WS."""
+
+    async def factory(
+        bus: IMessageBus, container: GatewayContainer
+    ) -> BaseMicroserviceListener:
+        # Очередь объявляется в declare_gateway_topology
+        return OutboundWebSocketDispatcher(
+            name="gateway.ws_outbound",
+            queue_name=Queues.GATEWAY_WS_OUTBOUND,
+            message_bus=bus,
+            client_connection_manager=container.client_connection_manager,
+            mailbox=container.mailbox,
+            registry=container.node_registry,
+            prefetch=256,
+        )
+
+    return factory
+
+
+def create_node_outbound_listener_factory() -> ListenerFactory:
+    """
+    Фабрика слушателя личной outbound-очереди воркера: сюда приходят ответы,
+    адресованные по origin.gateway_node, и сообщения, пересланные соседями.
+    """
+
+    async def factory(
+        bus: IMessageBus, container: GatewayContainer
+    ) -> BaseMicroserviceListener:
+        node_id = container.node_id
+        queue_name = get_gateway_node_queue_name(node_id)
+        await bus.declare_queue(
+            queue_name, durable=False, auto_delete=True, exclusive=True
+        )
+        await bus.bind_queue(queue_name, Ex.GATEWAY_OUTBOUND, routing_key=node_id)
+        return OutboundWebSocketDispatcher(
+            name="gateway.ws_outbound.node",
+            queue_name=queue_name,
+            message_bus=bus,
+            client_connection_manager=container.client_connection_manager,
+            mailbox=container.mailbox,
+            registry=container.node_registry,
+            prefetch=256,
+        )
+
+    return factory
@@ -1,10 +1,10 @@
 # apps/gateway/listeners/event_listener.py
 from __future__ import annotations
-import json
 from typing import Any, Dict
 
 from libs.messaging.base_listener import BaseMicroserviceListener
 from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from apps.gateway.gateway.ws_codec import EncodedFrame
 from libs.utils.logging_setup import app_logger as logger
 
 
@@ -24,7 +24,8 @@ class EventBroadcastListener(BaseMicroserviceListener):
             "topic": routing_key,
             "payload": data,
         }
-        message_json = json.dumps(ws_payload)
+        # Сериализуется лениво, один раз на каждый формат соединений
+        message = EncodedFrame(ws_payload)
 
         # Рассылаем всем
         active_clients = list(self.client_manager.active_connections.keys())
@@ -35,4 +36,4 @@ class EventBroadcastListener(BaseMicroserviceListener):
             f"Broadcasting event '{routing_key}' to {len(active_clients)} clients."
         )
         for client_id in active_clients:
-            await self.client_manager.send_message_to_client(client_id, message_json)
+            await self.client_manager.send_frame(client_id, message)
@@ -0,0 +1,53 @@
+# apps/gateway/rest/admin.py
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+
+from apps.gateway.config.setting_gateway import GatewaySettings
+from apps.gateway.dependencies import get_settings
+from libs.utils.logging_setup import app_logger as logger
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+def _require_admin(
+    settings: GatewaySettings = Depends(get_settings),
+    x_admin_token: Optional[str] = Header(None),
+) -> None:
+    expected = settings.GATEWAY_ADMIN_TOKEN
+    # Без настроенного токена админ-эндпоинтов как будто нет
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+
+@router.post(
+    "/drain",
+    summary="Перевести воркер gateway в режим drain",
+    dependencies=[Depends(_require_admin)],
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def start_drain(request: Request):
+    """
+    Воркер перестаёт принимать WS-соединения, проваливает readiness и
+    закрывает текущие волнами. Действует на воркер, принявший запрос;
+    при нескольких воркерах на узле дренаж всего узла — SIGTERM мастеру gunicorn.
+    """
+    container = request.app.state.container
+    drain = container.drain
+    already = drain.draining
+    drain.start()
+    if not already:
+        logger.warning(
+            f"🚧 Drain запущен через /admin/drain (node={container.node_id})"
+        )
+    return {
+        "node_id": container.node_id,
+        "draining": True,
+        "connections": len(container.client_connection_manager.active_connections),
+    }
+
+
+admin_router = router
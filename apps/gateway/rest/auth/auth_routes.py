@@ -1,11 +1,14 @@
 # apps/gateway/rest/auth/auth_routes.py
 
+from typing import Dict, Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Request, Header
 
 from libs.messaging.i_message_bus import IMessageBus
 from libs.messaging.rabbitmq_names import Queues, Exchanges
 from libs.app.errors import get_http_status, ErrorCode
-from apps.gateway.dependencies import get_message_bus
+from apps.gateway.dependencies import get_message_bus, get_token_verifier
+from apps.gateway.gateway.token_verifier import TokenVerifier
 
 # --- ИМПОРТЫ ОБНОВЛЕНЫ НА НОВЫЕ ИМЕНА DTO ---
 from .dto import (
@@ -24,6 +27,12 @@ from .dto import (
 router = APIRouter(prefix="/v1/auth")
 
 
+def _retry_headers(rpc_resp: Optional[dict]) -> Optional[Dict[str, str]]:
+    """Retry-After для отказа auth_svc по перегрузке (auth.overloaded)."""
+    retry_after = rpc_resp.get("retry_after") if rpc_resp else None
+    return {"Retry-After": str(retry_after)} if retry_after else None
+
+
 @router.post("/login", response_model=APIResponse[ApiLoginResponse])
 async def login(
     request: Request,
@@ -34,7 +43,10 @@ async def login(
     rpc_resp = await message_bus.call_rpc(
         exchange_name=Exchanges.RPC,
         routing_key=Queues.AUTH_ISSUE_TOKEN_RPC,
-        payload=body.model_dump(),
+        payload={
+            **body.model_dump(),
+            "client_ip": getattr(request.client, "host", None),
+        },
         correlation_id=correlation_id,
     )
     if not rpc_resp or not rpc_resp.get("success"):
@@ -50,6 +62,7 @@ async def login(
                 if rpc_resp
                 else "Auth service timeout."
             ),
+            headers=_retry_headers(rpc_resp),
         )
     return APIResponse[ApiLoginResponse](success=True, data=rpc_resp.get("data"))
 
@@ -81,6 +94,7 @@ async def register(
                 if rpc_resp
                 else "Auth service timeout."
             ),
+            headers=_retry_headers(rpc_resp),
         )
     return APIResponse[ApiRegisterResponse](success=True, data=rpc_resp.get("data"))
 
@@ -89,7 +103,7 @@ async def register(
 async def validate_token(
     request: Request,
     authorization: str = Header(...),
-    message_bus: IMessageBus = Depends(get_message_bus),
+    token_verifier: TokenVerifier = Depends(get_token_verifier),
 ):
     correlation_id = request.headers.get("x-request-id")
     try:
@@ -101,25 +115,14 @@ async def validate_token(
             status_code=401, detail="Invalid authorization header format"
         )
 
-    rpc_resp = await message_bus.call_rpc(
-        exchange_name=Exchanges.RPC,
-        routing_key=Queues.AUTH_VALIDATE_TOKEN_RPC,
-        payload={"access_token": token},
-        correlation_id=correlation_id,
-    )
-    if not rpc_resp or not rpc_resp.get("valid"):
+    result = await token_verifier.verify(token, correlation_id=correlation_id)
+    if not result.valid:
         raise HTTPException(
-            status_code=401,
-            detail=(
-                rpc_resp.get("error_message", "Invalid token")
-                if rpc_resp
-                else "Auth service timeout."
-            ),
+            status_code=401, detail=result.error_message or "Invalid token"
         )
 
-    # Эта строка теперь будет работать корректно
     return APIResponse[ApiValidateResponse](
-        success=True, data=ApiValidateResponse(**rpc_resp)
+        success=True, data=ApiValidateResponse(**result.model_dump())
     )
 
 
@@ -2,7 +2,7 @@
 # --- ВРЕМЕННАЯ УПРОЩЕННАЯ ВЕРСИЯ ДЛЯ ОТЛАДКИ WEBSOCKET ---
 
 import os
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from libs.utils.logging_setup import app_logger as logger
 
 router = APIRouter(tags=["Health Check"])
@@ -19,4 +19,28 @@ async def simplified_health_check():
     return {"status": "healthy_debug_mode", "version": os.getenv("APP_VERSION", "dev")}
 
 
+@router.get("/health/ws", summary="Счётчики WS-соединений шлюза")
+async def ws_stats(request: Request):
+    """
+    Нагрузка на WS-слой узла: соединения, отказы в допуске, отброшенные
+    лимитом входящие кадры по классу соединения ("<client_type>.<тип кадра>"),
+    пути валидации токенов и кэш её результатов (hit rate, память).
+    """
+    container = request.app.state.container
+    manager = container.client_connection_manager
+    limiter = manager.inbound_limiter
+    cache = container.token_verifier.cache
+    denylist = container.token_verifier.denylist
+    return {
+        "connections": len(manager.active_connections),
+        "connection_load": manager.connection_load,
+        "handshakes_in_progress": container.admission.handshakes,
+        "admission_rejected": container.admission.rejected,
+        "rate_limited_frames": dict(limiter.throttled) if limiter else {},
+        "token_validations": dict(container.token_verifier.stats),
+        "token_cache": cache.stats() if cache else None,
+        "revoked_entries": len(denylist) if denylist is not None else 0,
+    }
+
+
 health_router = router
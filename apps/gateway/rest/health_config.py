@@ -1,3 +1,7 @@
+from .admin import admin_router
 from .health import health_router
 
-health_routers = [{"router": health_router, "prefix": "", "tags": ["Health Check"]}]
+health_routers = [
+    {"router": health_router, "prefix": "", "tags": ["Health Check"]},
+    {"router": admin_router, "tags": ["Admin"]},
+]
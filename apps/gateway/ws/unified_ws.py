@@ -1,8 +1,7 @@
 # apps/gateway/ws/unified_ws.py
 from __future__ import annotations
-import asyncio
 import uuid
-from typing import Optional
+from typing import Optional, Union
 
 from fastapi import (
     APIRouter,
@@ -13,32 +12,87 @@ from fastapi import (
     Query,
     Header,
 )
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 from starlette.websockets import WebSocketState
 
-from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
-from libs.messaging.i_message_bus import IMessageBus
-from libs.messaging.rabbitmq_names import Queues, Exchanges
+from apps.gateway.gateway.client_connection_manager import (
+    ClientConnectionManager,
+    ConnectionRecord,
+)
+from apps.gateway.gateway.command_router import CommandRouter
+from apps.gateway.gateway.inbound_command_publisher import InboundCommandPublisher
+from apps.gateway.gateway.account_mailbox import AccountMailbox
+from apps.gateway.gateway.admission import AdmissionController, AdmissionDecision
+from apps.gateway.gateway.inbound_rate_limit import FrameClass, Verdict
+from apps.gateway.gateway.reauth_batcher import ReauthBatcher
+from apps.gateway.gateway.session_resume import ResumableSession
+from apps.gateway.gateway.token_verifier import TokenVerifier
+from apps.gateway.gateway.ws_codec import (
+    DeflateOptions,
+    EncodedFrame,
+    negotiate_codec,
+    send_frame,
+)
+from libs.app.errors import ErrorCode
+from libs.messaging.rabbitmq_names import is_valid_queue_name_part
+from libs.utils.ids import new_request_id
 from libs.utils.logging_setup import app_logger as logger
+from libs.utils.token_validation import TOKEN_EXPIRED
 
 from apps.gateway.dependencies import (
-    get_ws_message_bus,
     get_ws_client_connection_manager,
+    get_ws_command_publisher,
+    get_ws_mailbox,
+    get_ws_admission,
+    get_ws_command_router,
+    get_ws_token_verifier,
+    get_ws_reauth_batcher,
     get_ws_settings,
 )
 
 from apps.gateway.config.setting_gateway import GatewaySettings
 
-from libs.domain.dto.ws import WSHelloFrame, WSPongFrame
+from libs.domain.dto.backend import (
+    AuthInfo,
+    BackendInboundCommandEnvelope,
+    OriginInfo,
+    RoutingInfo,
+)
+from libs.domain.dto.errors import ErrorDTO
+from libs.domain.dto.ws import (
+    ClientWSFrame,
+    WSCommandFrame,
+    WSErrorFrame,
+    WSHelloFrame,
+    WSPingFrame,
+    WSPongFrame,
+    WSReauthFrame,
+    WSReauthedFrame,
+)
 
 router = APIRouter(tags=["Unified WebSocket"])
 
+# Бюджет входящих кадров, из которого списывается кадр каждого типа
+_FRAME_CLASSES = {
+    "command": FrameClass.COMMAND,
+    "ping": FrameClass.PING,
+    "subscribe": FrameClass.SUBSCRIPTION,
+    "unsubscribe": FrameClass.SUBSCRIPTION,
+    "reauth": FrameClass.COMMAND,
+}
+
 
 async def get_token_from_ws(
     websocket: WebSocket,
     authorization: Optional[str] = Header(None),
     token: Optional[str] = Query(None),
-) -> str:
-    """Извлекает токен из заголовка или query-параметра."""
+    resume: Optional[str] = Query(None),
+) -> Optional[str]:
+    """
+    Извлекает токен из заголовка или query-параметра.
+    При возобновлении сессии (?resume=) токен не обязателен.
+    """
     if authorization:
         try:
             scheme, value = authorization.split()
@@ -48,6 +102,8 @@ async def get_token_from_ws(
             pass  # Игнорируем неверный формат заголовка
     if token:
         return token
+    if resume:
+        return None
 
     # Если токен не найден нигде
     await websocket.close(
@@ -58,80 +114,450 @@ async def get_token_from_ws(
     )  # ИЗМЕНЕНИЕ
 
 
+def _error_frame(
+    code: ErrorCode, message: str, request_id: Optional[str] = None, **details
+) -> WSErrorFrame:
+    return WSErrorFrame(
+        error=ErrorDTO(code=code.value, message=message, details=details or None),
+        request_id=request_id,
+    )
+
+
+async def _handle_reauth(
+    frame: WSReauthFrame,
+    *,
+    account_id: int,
+    conn_id: str,
+    client_conn_manager: ClientConnectionManager,
+    reauth_batcher: ReauthBatcher,
+) -> Union[WSReauthedFrame, WSErrorFrame]:
+    """
+    Продлевает авторизацию соединения свежим токеном того же аккаунта.
+    При отказе соединение живёт до exp прежнего токена.
+    """
+    result = await reauth_batcher.validate(frame.token)
+    if not result.valid:
+        code = (
+            ErrorCode.AUTH_TOKEN_EXPIRED
+            if result.error_code == TOKEN_EXPIRED
+            else ErrorCode.AUTH_INVALID_TOKEN
+        )
+        return _error_frame(code, "Reauth failed", frame.request_id)
+    if result.account_id != account_id:
+        return _error_frame(
+            ErrorCode.AUTH_FORBIDDEN,
+            "Token belongs to another account",
+            frame.request_id,
+        )
+    client_conn_manager.set_token_expiry(conn_id, result.exp, result.sid, result.iat)
+    return WSReauthedFrame(exp=result.exp, request_id=frame.request_id)
+
+
+def _resumable_session(
+    resume: Optional[str],
+    last_seq: int,
+    *,
+    client_conn_manager: ClientConnectionManager,
+    token_verifier: TokenVerifier,
+) -> Optional[ResumableSession]:
+    """
+    Сессия для ?resume= или None, если возобновить нельзя: токен не найден,
+    нужные кадры вытеснены из кольца или токен сессии с тех пор отозван.
+    """
+    sessions = client_conn_manager.sessions
+    if not resume or sessions is None:
+        return None
+    session = sessions.find(resume)
+    if session is None or session.frames_after(last_seq) is None:
+        return None
+    if token_verifier.is_revoked(session.sid, session.account_id, session.iat):
+        logger.info(f"🛑 Resume отклонён: токен сессии {session.conn_id} отозван")
+        if session.detached:
+            # Ждать в grace-периоде отозванной сессии больше нечего
+            client_conn_manager.disconnect(session.conn_id)
+        return None
+    return session
+
+
+async def _reject_handshake(websocket: WebSocket, decision: AdmissionDecision) -> None:
+    """
+    Отказ в handshake с подсказкой, когда повторить попытку.
+    Если ASGI-сервер поддерживает websocket.http.response — это обычный HTTP 503
+    с Retry-After без апгрейда; иначе accept и сразу close 1013 (Try Again Later).
+    """
+    error = ErrorDTO(
+        code=ErrorCode.WS_ADMISSION_REJECTED.value,
+        message="Gateway is busy, retry later",
+        details={"reason": decision.reason, "retry_after": decision.retry_after},
+    )
+    if "websocket.http.response" in websocket.scope.get("extensions", {}):
+        await websocket.send_denial_response(
+            JSONResponse(
+                error.model_dump(),
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(decision.retry_after)},
+            )
+        )
+        return
+    await websocket.accept()
+    await websocket.close(
+        code=status.WS_1013_TRY_AGAIN_LATER,
+        reason=f"{decision.reason}; retry_after={decision.retry_after}",
+    )
+
+
+async def _receive_raw(websocket: WebSocket) -> Union[str, bytes]:
+    """Принимает текстовый или бинарный кадр (receive_text не пропускает bytes)."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(
+            code=message.get("code", status.WS_1000_NORMAL_CLOSURE)
+        )
+    text = message.get("text")
+    return text if text is not None else (message.get("bytes") or b"")
+
+
+def _handle_command(
+    frame: WSCommandFrame,
+    *,
+    record: ConnectionRecord,
+    account_id: int,
+    conn_id: str,
+    client_ip: Optional[str],
+    user_agent: Optional[str],
+    client_conn_manager: ClientConnectionManager,
+    command_publisher: InboundCommandPublisher,
+    command_router: CommandRouter,
+    settings: GatewaySettings,
+) -> Optional[WSErrorFrame]:
+    """
+    Ставит команду клиента в очередь на публикацию в доменную очередь бекэнда.
+    Возвращает кадр ошибки для клиента или None, если команда принята.
+    Ответы приходят асинхронно через outbound-очередь (OutboundWebSocketDispatcher).
+    """
+    request_id = frame.request_id or new_request_id()
+    registry = client_conn_manager.registry
+    allowed = settings.GATEWAY_WS_COMMAND_DOMAINS
+    # Домен попадает в routing key: проверяем символы и без allow-list
+    if not is_valid_queue_name_part(frame.domain) or (
+        allowed and frame.domain not in allowed
+    ):
+        return _error_frame(
+            ErrorCode.WS_UNKNOWN_DOMAIN,
+            f"Unknown command domain '{frame.domain}'",
+            request_id,
+        )
+    if not client_conn_manager.begin_command(record, request_id):
+        return _error_frame(
+            ErrorCode.WS_INFLIGHT_LIMIT,
+            "Too many commands in flight",
+            request_id,
+            limit=client_conn_manager.max_inflight_commands,
+        )
+
+    envelope = BackendInboundCommandEnvelope(
+        request_id=request_id,
+        meta=frame.meta,
+        routing=RoutingInfo(domain=frame.domain, command=frame.command),
+        auth=AuthInfo(account_id=account_id),
+        origin=OriginInfo(
+            transport="ws",
+            connection_id=conn_id,
+            gateway_node=registry.node_id if registry is not None else None,
+            ip=client_ip,
+            user_agent=user_agent,
+        ),
+        payload=frame.payload,
+        actor=frame.actor,
+    )
+    if not command_publisher.submit(
+        envelope, routing_key=command_router.routing_key(frame.domain, frame.actor)
+    ):
+        client_conn_manager.complete_command(conn_id, request_id)
+        return _error_frame(
+            ErrorCode.WS_COMMAND_NOT_DELIVERED,
+            "Gateway command buffer is full, retry later",
+            request_id,
+        )
+    return None
+
+
 @router.websocket("/v1/connect")
 async def unified_websocket_endpoint(
     websocket: WebSocket,
-    token: str = Depends(get_token_from_ws),
+    token: Optional[str] = Depends(get_token_from_ws),
+    resume: Optional[str] = Query(None),
+    last_seq: int = Query(0, ge=0),
+    batch: bool = Query(False),
     client_conn_manager: ClientConnectionManager = Depends(
         get_ws_client_connection_manager
     ),
-    message_bus: IMessageBus = Depends(get_ws_message_bus),
+    command_publisher: InboundCommandPublisher = Depends(get_ws_command_publisher),
+    command_router: CommandRouter = Depends(get_ws_command_router),
+    mailbox: AccountMailbox = Depends(get_ws_mailbox),
+    admission: AdmissionController = Depends(get_ws_admission),
+    token_verifier: TokenVerifier = Depends(get_ws_token_verifier),
+    reauth_batcher: ReauthBatcher = Depends(get_ws_reauth_batcher),
     settings: GatewaySettings = Depends(get_ws_settings),
 ):
-    await websocket.accept()
-    client_addr = f"{getattr(websocket.client, 'host', '0.0.0.0')}:{getattr(websocket.client, 'port', '0')}"
+    # Формат кадров согласуем при handshake через Sec-WebSocket-Protocol;
+    # без совпадений остаёмся на JSON
+    deflate = (
+        DeflateOptions(
+            threshold=settings.GATEWAY_WS_DEFLATE_THRESHOLD_BYTES,
+            level=settings.GATEWAY_WS_DEFLATE_LEVEL,
+            window_bits=settings.GATEWAY_WS_DEFLATE_WINDOW_BITS,
+            mem_level=settings.GATEWAY_WS_DEFLATE_MEM_LEVEL,
+            allow_context_takeover=settings.GATEWAY_WS_DEFLATE_CONTEXT_TAKEOVER,
+        )
+        if settings.GATEWAY_WS_DEFLATE_ENABLED
+        else None
+    )
+    codec = negotiate_codec(websocket.scope.get("subprotocols", ()), deflate)
+    client_ip = getattr(websocket.client, "host", None)
+    client_addr = f"{client_ip or '0.0.0.0'}:{getattr(websocket.client, 'port', '0')}"
+
+    # 0. Допуск до accept: при шторме переподключений отказ стоит один HTTP-ответ
+    decision = admission.try_admit(
+        client_ip or "unknown", client_conn_manager.connection_load
+    )
+    if not decision.admitted:
+        logger.warning(
+            f"🚦 WS handshake rejected: reason={decision.reason}, ip={client_addr}, retry_after={decision.retry_after}"
+        )
+        await _reject_handshake(websocket, decision)
+        return
+
     account_id: Optional[int] = None
+    token_exp: Optional[int] = None
+    token_sid: Optional[str] = None
+    token_iat: Optional[int] = None
     conn_id: Optional[str] = None
+    record: Optional[ConnectionRecord] = None
+    # Обрыв без close-кадра (сеть, смена вышки) оставляет сессию ждать resume
+    resumable = False
 
     try:
-        # 1. Валидация токена через RPC
-        rpc_resp = await message_bus.call_rpc(
-            exchange_name=Exchanges.RPC,
-            routing_key=Queues.AUTH_VALIDATE_TOKEN_RPC,
-            payload={"access_token": token},
-        )
+        # 1. Проверки до accept: сессия для resume или валидация токена
+        #    (локально, RPC в auth_svc — запасной путь).
+        #    Невалидный клиент получает отказ в handshake, не заняв сокет
+        sessions = client_conn_manager.sessions
+        try:
+            session = _resumable_session(
+                resume,
+                last_seq,
+                client_conn_manager=client_conn_manager,
+                token_verifier=token_verifier,
+            )
+            if session is None:
+                if not token:
+                    await websocket.close(
+                        code=status.WS_1008_POLICY_VIOLATION, reason="Resume failed"
+                    )
+                    return
+                validation = await token_verifier.verify(token)
+                if not (validation.valid and validation.account_id):
+                    await websocket.close(
+                        code=status.WS_1008_POLICY_VIOLATION, reason="Invalid token"
+                    )
+                    return
+                account_id = validation.account_id
+                token_exp = validation.exp
+                token_sid, token_iat = validation.sid, validation.iat
 
-        if not (
-            rpc_resp and rpc_resp.get("valid", False) and rpc_resp.get("account_id")
-        ):
-            await websocket.close(
-                code=status.WS_1008_POLICY_VIOLATION, reason="Invalid token"
+            await websocket.accept(subprotocol=codec.subprotocol)
+        finally:
+            admission.release()
+
+        if session is not None:
+            # 2a. Возобновление сессии: без полной синхронизации
+            conn_id, account_id = session.conn_id, session.account_id
+            await send_frame(
+                websocket,
+                codec,
+                WSHelloFrame(
+                    connection_id=conn_id,
+                    heartbeat_sec=settings.GATEWAY_WS_PING_INTERVAL,
+                    resume_token=session.token,
+                    resumed=True,
+                    request_id=str(uuid.uuid4()),
+                ),
+            )
+            record = await client_conn_manager.resume(
+                websocket,
+                session,
+                last_seq,
+                client_type="PLAYER",
+                codec=codec,
+                batch=batch,
+            )
+            if record is None:
+                # Кольцо переполнилось, пока досылали: только полная синхронизация
+                client_conn_manager.disconnect(conn_id)
+                await websocket.close(
+                    code=status.WS_1008_POLICY_VIOLATION, reason="Resume failed"
+                )
+                return
+        else:
+            # 2b. Регистрация нового соединения и HELLO
+            assert account_id is not None  # Для mypy
+            conn_id = f"ws_{account_id}_{uuid.uuid4().hex[:8]}"
+            new_session = (
+                sessions.create(conn_id, account_id) if sessions is not None else None
+            )
+            hello = WSHelloFrame(
+                connection_id=conn_id,
+                heartbeat_sec=settings.GATEWAY_WS_PING_INTERVAL,
+                resume_token=new_session.token if new_session else None,
+                v=1,
+                request_id=str(uuid.uuid4()),  # ИЗМЕНЕНИЕ
+            )
+            await send_frame(websocket, codec, hello)
+            record = await client_conn_manager.connect(
+                websocket,
+                client_id=conn_id,
+                client_type="PLAYER",
+                account_id=account_id,
+                codec=codec,
+                session=new_session,
+                batch=batch,
+                token_exp=token_exp,
+                sid=token_sid,
+                iat=token_iat,
             )
-            return
 
-        account_id = int(rpc_resp["account_id"])
-        conn_id = f"ws_{account_id}_{uuid.uuid4().hex[:8]}"
+            # Кадры, пришедшие, пока у аккаунта не было сессий
+            for pending in await mailbox.drain(account_id):
+                await client_conn_manager.send_frame(conn_id, EncodedFrame(pending))
 
-        # 2. Регистрация соединения
-        await client_conn_manager.connect(
-            websocket, client_id=conn_id, client_type="PLAYER"
-        )
         logger.info(
-            f"✅ WS connected: account_id={account_id}, conn_id={conn_id}, ip={client_addr}"
+            f"✅ WS connected: account_id={account_id}, conn_id={conn_id}, ip={client_addr}, codec={codec.name}"
         )
+        # 3. Основной цикл: разбор кадров клиента
+        user_agent = websocket.headers.get("user-agent")
+        while True:
+            # Idle disconnect делает сторож по колесу таймеров (gateway_main),
+            # здесь только отмечаем активность — без таймера на каждый кадр
+            raw_data = await _receive_raw(websocket)
+            client_conn_manager.update_activity(conn_id)
 
-        # 3. Отправка HELLO
-        hello = WSHelloFrame(
-            connection_id=conn_id,
-            heartbeat_sec=settings.GATEWAY_WS_PING_INTERVAL,
-            v=1,
-            request_id=str(uuid.uuid4()),  # ИЗМЕНЕНИЕ
-        )
-        await websocket.send_text(hello.model_dump_json())
+            frame: Optional[ClientWSFrame] = None
+            decode_error: Optional[WSErrorFrame] = None
+            # Совместимость со старыми клиентами: голый "ping" без JSON
+            if raw_data == "ping":
+                frame_class = FrameClass.PING
+            else:
+                try:
+                    # JSON валидируется из сырого текста сразу, без промежуточного json.loads
+                    frame = codec.decode(raw_data)
+                    frame_class = _FRAME_CLASSES[frame.type]
+                except ValidationError as e:
+                    decode_error = _error_frame(
+                        ErrorCode.VALIDATION_FAILED,
+                        "Malformed client frame",
+                        errors=e.errors(
+                            include_url=False,
+                            include_context=False,
+                            include_input=False,
+                        ),
+                    )
+                    frame_class = FrameClass.COMMAND
+                except ValueError:
+                    # Битый msgpack/deflate
+                    decode_error = _error_frame(
+                        ErrorCode.VALIDATION_FAILED, "Malformed client frame"
+                    )
+                    frame_class = FrameClass.COMMAND
 
-        # 4. Основной цикл (пока просто держим соединение)
-        while True:
-            # Ждем сообщение с таймаутом, чтобы реализовать idle disconnect
-            raw_data = await asyncio.wait_for(
-                websocket.receive_text(), timeout=settings.GATEWAY_WS_IDLE_TIMEOUT
-            )
-            # В будущем здесь будет обработка входящих команд
-            # Пока просто отвечаем pong на ping для keep-alive
-            if "ping" in raw_data:
-                await websocket.send_text(
-                    WSPongFrame(v=1, request_id=str(uuid.uuid4())).model_dump_json()
-                )  # ИЗМЕНЕНИЕ
-
-    except WebSocketDisconnect:
-        logger.info(f"🔌 WS disconnect: account_id={account_id}, conn_id={conn_id}")
-    except asyncio.TimeoutError:
-        logger.warning(
-            f"🔌 WS idle timeout: account_id={account_id}, conn_id={conn_id}"
+            # Лимит входящих кадров: сначала отбрасываем, при упорстве — закрываем
+            verdict = client_conn_manager.check_inbound(record, frame_class)
+            if verdict is Verdict.CLOSE:
+                logger.warning(
+                    f"🚫 WS rate limit: закрываем conn_id={conn_id}, account_id={account_id}"
+                )
+                await websocket.close(
+                    code=status.WS_1008_POLICY_VIOLATION, reason="Rate limit exceeded"
+                )
+                return
+            if verdict is Verdict.THROTTLE:
+                limiter = client_conn_manager.inbound_limiter
+                assert limiter is not None and record.rate_state is not None
+                await client_conn_manager.send_frame(
+                    conn_id,
+                    _error_frame(
+                        ErrorCode.WS_RATE_LIMITED,
+                        "Too many frames, slow down",
+                        frame.request_id if frame is not None else None,
+                        retry_after_ms=limiter.retry_after_ms(
+                            record.rate_state, frame_class
+                        ),
+                    ),
+                    # Ответ на каждую отброшенную команду нужен клиенту по request_id,
+                    # остальные отказы схлопываются в один кадр
+                    None
+                    if frame_class is FrameClass.COMMAND
+                    else ("rate_limited", frame_class),
+                )
+                continue
+
+            if decode_error is not None:
+                await client_conn_manager.send_frame(conn_id, decode_error)
+                continue
+            if frame is None:
+                await send_frame(websocket, codec, WSPongFrame())
+                continue
+
+            if isinstance(frame, WSPingFrame):
+                await send_frame(
+                    websocket,
+                    codec,
+                    WSPongFrame(nonce=frame.nonce, request_id=frame.request_id),
+                )
+            elif isinstance(frame, WSCommandFrame):
+                error_frame = _handle_command(
+                    frame,
+                    record=record,
+                    account_id=account_id,
+                    conn_id=conn_id,
+                    client_ip=client_ip,
+                    user_agent=user_agent,
+                    client_conn_manager=client_conn_manager,
+                    command_publisher=command_publisher,
+                    command_router=command_router,
+                    settings=settings,
+                )
+                if error_frame is not None:
+                    await client_conn_manager.send_frame(conn_id, error_frame)
+            elif isinstance(frame, WSReauthFrame):
+                await client_conn_manager.send_frame(
+                    conn_id,
+                    await _handle_reauth(
+                        frame,
+                        account_id=account_id,
+                        conn_id=conn_id,
+                        client_conn_manager=client_conn_manager,
+                        reauth_batcher=reauth_batcher,
+                    ),
+                )
+            else:
+                # subscribe/unsubscribe появятся вместе с подписками на топики
+                await client_conn_manager.send_frame(
+                    conn_id,
+                    _error_frame(
+                        ErrorCode.NOT_IMPLEMENTED,
+                        f"Frame type '{frame.type}' is not supported yet",
+                        frame.request_id,
+                    ),
+                )
+
+    except WebSocketDisconnect as e:
+        resumable = e.code not in (
+            status.WS_1000_NORMAL_CLOSURE,
+            status.WS_1001_GOING_AWAY,
+        )
+        logger.info(
+            f"🔌 WS disconnect: account_id={account_id}, conn_id={conn_id}, code={e.code}"
         )
-        if websocket.client_state != WebSocketState.DISCONNECTED:
-            await websocket.close(
-                code=status.WS_1008_POLICY_VIOLATION, reason="Idle timeout"
-            )
     except Exception as e:
         logger.exception(
             f"WS error for account_id={account_id}, conn_id={conn_id}: {e}"
@@ -142,4 +568,4 @@ async def unified_websocket_endpoint(
             )
     finally:
         if conn_id:
-            client_conn_manager.disconnect(conn_id)
+            client_conn_manager.release(conn_id, websocket, resumable=resumable)
@@ -12,6 +12,7 @@ from typing import (
     TypeVar,
     Coroutine,
     Any,
+    Tuple,
 )
 from fastapi import FastAPI
 from pydantic_settings import BaseSettings
@@ -29,6 +30,10 @@ ListenerFactory = Callable[[IMessageBus, ContainerT], Awaitable]
 TopologyDeclarator = Callable[[IMessageBus], Awaitable[None]]
 ContainerFactory = Callable[..., Awaitable[ContainerT]]
 BackgroundTask = Callable[..., Coroutine[Any, Any, None]]
+# Хук остановки сервиса (settings, container): до остановки фоновых задач и слушателей
+ShutdownHook = Callable[..., Awaitable[None]]
+# Проверка готовности от самого сервиса: (имя, готов) или None — неприменима
+ReadinessCheck = Callable[[FastAPI], Awaitable[Optional[Tuple[str, bool]]]]
 
 
 @asynccontextmanager
@@ -39,6 +44,7 @@ async def service_lifespan(
     topology_declarator: TopologyDeclarator,
     listener_factories: List[ListenerFactory],
     background_tasks: List[BackgroundTask],
+    shutdown_hooks: Optional[List[ShutdownHook]] = None,
 ):
     """
     Управляет жизненным циклом сервиса: DI, шина, слушатели и фоновые задачи.
@@ -58,11 +64,13 @@ async def service_lifespan(
         # --- КОНЕЦ ИСПРАВЛЕНИЯ ---
 
         app.state.container = container
-        bus = container.bus
+        # bus=None — процесс без брокера (только HTTP), например супервизор раннера
+        bus = getattr(container, "bus", None)
         log.info("DI-контейнер инициализирован.")
 
-        await topology_declarator(bus)
-        log.info("Топология RabbitMQ объявлена.")
+        if bus is not None:
+            await topology_declarator(bus)
+            log.info("Топология RabbitMQ объявлена.")
 
         if listener_factories:
             listener_tasks = [factory(bus, container) for factory in listener_factories]
@@ -86,6 +94,15 @@ async def service_lifespan(
         raise
     finally:
         log.info("Остановка сервиса...")
+        container = getattr(app.state, "container", None)
+        if container is not None:
+            for hook in shutdown_hooks or []:
+                try:
+                    await hook(getattr(app.state, "settings", None), container)
+                except Exception:
+                    log.exception(
+                        f"Ошибка в хуке остановки {getattr(hook, '__name__', hook)}"
+                    )
         for task in running_bg_tasks:
             task.cancel()
         if running_bg_tasks:
@@ -114,9 +131,13 @@ def create_service_app(
     settings_class: Optional[Type[BaseSettings]] = None,
     include_rest_routers: Optional[List] = None,
     background_tasks: Optional[List[BackgroundTask]] = None,
+    extra_readiness_checks: Optional[List[ReadinessCheck]] = None,
+    shutdown_hooks: Optional[List[ShutdownHook]] = None,
 ) -> FastAPI:
     """
     Фабрика для создания FastAPI-приложения микросервиса.
+    extra_readiness_checks — проверки сервиса сверх общих (брокер, БД, Redis);
+    shutdown_hooks — действия сервиса при остановке, пока шина и слушатели живы.
     """
 
     def _lifespan(app):
@@ -126,6 +147,7 @@ def create_service_app(
             topology_declarator=topology_declarator,
             listener_factories=listener_factories or [],
             background_tasks=background_tasks or [],
+            shutdown_hooks=shutdown_hooks or [],
         )
 
     app = FastAPI(title=service_name, lifespan=_lifespan)
@@ -138,7 +160,10 @@ def create_service_app(
     readiness_checks = []
 
     async def rmq_check():
-        is_ready = await app.state.container.bus.is_connected()
+        bus = getattr(app.state.container, "bus", None)
+        if bus is None:
+            return None
+        is_ready = await bus.is_connected()
         return "rabbitmq", is_ready
 
     readiness_checks.append(rmq_check)
@@ -162,6 +187,9 @@ def create_service_app(
 
     readiness_checks.append(redis_check)
 
+    for service_check in extra_readiness_checks or []:
+        readiness_checks.append(_bind_check(app, service_check))
+
     app.include_router(
         create_readiness_router(
             [check for check in readiness_checks if check is not None]
@@ -178,3 +206,14 @@ def create_service_app(
 
     log.info(f"Приложение '{service_name}' сконфигурировано.")
     return app
+
+
+def _bind_check(
+    app: FastAPI, check: ReadinessCheck
+) -> Callable[[], Awaitable[Optional[Tuple[str, bool]]]]:
+    async def bound():
+        return await check(app)
+
+    # Имя нужно readiness-роутеру, если проверка упала исключением
+    bound.__name__ = getattr(check, "__name__", "check")
+    return bound
@@ -14,6 +14,10 @@ class ErrorCode(str, Enum):
     # --- НОВЫЕ КОДЫ ОШИБОК ---
     AUTH_REFRESH_INVALID = "auth.refresh_invalid"
     AUTH_REFRESH_EXPIRED = "auth.refresh_expired"
+    # Очередь на проверку паролей полна: повторить через retry_after
+    AUTH_OVERLOADED = "auth.overloaded"
+    # Слишком много попыток входа с IP/подсети
+    AUTH_RATE_LIMITED = "auth.rate_limited"
 
     # RPC
     RPC_TIMEOUT = "rpc.timeout"
@@ -22,6 +26,13 @@ class ErrorCode(str, Enum):
     # Validation
     VALIDATION_FAILED = "validation.failed"
 
+    # WebSocket
+    WS_INFLIGHT_LIMIT = "ws.inflight_limit"
+    WS_UNKNOWN_DOMAIN = "ws.unknown_domain"
+    WS_COMMAND_NOT_DELIVERED = "ws.command_not_delivered"
+    WS_ADMISSION_REJECTED = "ws.admission_rejected"
+    WS_RATE_LIMITED = "ws.rate_limited"
+
     # Common
     NOT_IMPLEMENTED = "common.not_implemented"
     INTERNAL_ERROR = "common.internal_error"
@@ -37,9 +48,13 @@ ERROR_CODE_TO_HTTP_STATUS = {
     # --- ДОБАВЛЯЕМ МАППИНГ ДЛЯ НОВЫХ ОШИБОК ---
     ErrorCode.AUTH_REFRESH_INVALID: status.HTTP_401_UNAUTHORIZED,
     ErrorCode.AUTH_REFRESH_EXPIRED: status.HTTP_401_UNAUTHORIZED,
+    ErrorCode.AUTH_OVERLOADED: status.HTTP_503_SERVICE_UNAVAILABLE,
+    ErrorCode.AUTH_RATE_LIMITED: status.HTTP_429_TOO_MANY_REQUESTS,
     ErrorCode.VALIDATION_FAILED: status.HTTP_400_BAD_REQUEST,
     ErrorCode.RPC_TIMEOUT: status.HTTP_504_GATEWAY_TIMEOUT,
     ErrorCode.RPC_BAD_RESPONSE: status.HTTP_502_BAD_GATEWAY,
+    ErrorCode.WS_ADMISSION_REJECTED: status.HTTP_503_SERVICE_UNAVAILABLE,
+    ErrorCode.WS_RATE_LIMITED: status.HTTP_429_TOO_MANY_REQUESTS,
     ErrorCode.NOT_IMPLEMENTED: status.HTTP_501_NOT_IMPLEMENTED,
     ErrorCode.INTERNAL_ERROR: status.HTTP_500_INTERNAL_SERVER_ERROR,
 }
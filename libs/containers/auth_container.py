@@ -3,17 +3,21 @@
 from __future__ import annotations
 import asyncio
 from dataclasses import dataclass
+from typing import Optional
 
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
 from libs.messaging.i_message_bus import IMessageBus
 from libs.messaging.rabbitmq_message_bus import RabbitMQMessageBus
 from libs.infra.central_redis_client import CentralRedisClient
+from libs.infra.revocation import RevocationPublisher
 from apps.auth_svc.services.auth_service import AuthService
 from apps.auth_svc.utils.jwt_manager import JwtManager
+from apps.auth_svc.utils.login_throttle import LoginThrottle
 from apps.auth_svc.utils.password_manager import PasswordManager
 from apps.auth_svc.handlers.auth_issue_token_rpc_handler import AuthIssueTokenRpcHandler
 from apps.auth_svc.handlers.auth_validate_token_rpc_handler import (
+    AuthValidateManyRpcHandler,
     AuthValidateTokenRpcHandler,
 )
 from apps.auth_svc.handlers.auth_register_rpc_handler import AuthRegisterRpcHandler
@@ -22,6 +26,22 @@ from apps.auth_svc.handlers.auth_refresh_token_rpc_handler import (
 )
 from apps.auth_svc.handlers.auth_logout_rpc_handler import AuthLogoutRpcHandler
 from apps.auth_svc.config.settings_auth import AuthServiceSettings
+from libs.utils.jwt_keys import KeyRing
+from libs.utils.logging_setup import app_logger as logger
+
+
+def load_keyring(settings: AuthServiceSettings) -> Optional[KeyRing]:
+    """Ключи подписи из AUTH_JWT_KEYS_DIR (None — HS256 с общим секретом)."""
+    if not settings.AUTH_JWT_KEYS_DIR:
+        return None
+    keyring = KeyRing.from_pem_dir(
+        settings.AUTH_JWT_KEYS_DIR, active_kid=settings.AUTH_JWT_ACTIVE_KID
+    )
+    logger.info(
+        f"🔑 Подпись JWT ключом {keyring.active_kid} ({keyring.active.algorithm}), "
+        f"в JWKS: {keyring.kids}"
+    )
+    return keyring
 
 
 @dataclass
@@ -32,11 +52,15 @@ class AuthContainer:
     redis: CentralRedisClient
     auth_service: AuthService
     session_factory: async_sessionmaker[AsyncSession]
+    password_manager: PasswordManager
     issue_token_handler: AuthIssueTokenRpcHandler
     validate_token_handler: AuthValidateTokenRpcHandler
+    validate_many_handler: AuthValidateManyRpcHandler
     register_handler: AuthRegisterRpcHandler
     refresh_token_handler: AuthRefreshTokenRpcHandler
     logout_handler: AuthLogoutRpcHandler
+    # Ключи подписи (None — HS256 с общим секретом); публичная часть — в JWKS
+    keyring: Optional[KeyRing] = None
 
     @classmethod
     async def create(cls, settings: AuthServiceSettings) -> "AuthContainer":
@@ -50,14 +74,23 @@ class AuthContainer:
             redis_url=settings.REDIS_URL, password=settings.REDIS_PASSWORD
         )
 
-        await asyncio.gather(bus.connect(), redis_client.connect())
-
-        password_manager = PasswordManager()
+        password_manager = PasswordManager(
+            settings.AUTH_PASSWORD_BCRYPT_ROUNDS,
+            workers=settings.AUTH_PASSWORD_HASH_WORKERS,
+            max_pending=settings.AUTH_PASSWORD_HASH_MAX_PENDING,
+            max_wait_ms=settings.AUTH_LOGIN_MAX_WAIT_MS,
+            reject_headroom=settings.AUTH_PASSWORD_REJECT_HEADROOM,
+        )
+        if settings.AUTH_PASSWORD_CALIBRATE:
+            # До старта слушателей: от результата зависит их prefetch
+            await asyncio.to_thread(password_manager.calibrate)
+        keyring = load_keyring(settings)
         # Передаем настройки напрямую в JwtManager
         jwt_manager = JwtManager(
             secret=settings.JWT_SECRET,
             issuer=settings.AUTH_JWT_ISS,
             audience=settings.AUTH_JWT_AUD,
+            keyring=keyring,
         )
 
         # Передаем настройки в AuthService
@@ -67,11 +100,28 @@ class AuthContainer:
             password_manager=password_manager,
             redis=redis_client,
             settings=settings,  # <-- ПЕРЕДАЕМ ВЕСЬ ОБЪЕКТ
+            revocations=RevocationPublisher(redis_client, settings.AUTH_ACCESS_TTL),
+            login_throttle=LoginThrottle(
+                redis_client,
+                window_sec=settings.AUTH_LOGIN_WINDOW_SEC,
+                ip_limit=settings.AUTH_LOGIN_IP_LIMIT,
+                subnet_limit=settings.AUTH_LOGIN_SUBNET_LIMIT,
+                global_fail_limit=settings.AUTH_LOGIN_GLOBAL_FAIL_LIMIT,
+                attack_factor=settings.AUTH_LOGIN_ATTACK_FACTOR,
+            ),
         )
+        # Подключаемся, когда сервисы уже зарегистрировали свои Lua-скрипты:
+        # connect() загружает реестр в Redis, и первый вызов идёт сразу EVALSHA
+        await asyncio.gather(bus.connect(), redis_client.connect())
 
         # Передаем настройки в обработчики, которым они нужны
         issue_handler = AuthIssueTokenRpcHandler(auth_service=auth_service)
-        validate_handler = AuthValidateTokenRpcHandler(settings=settings)
+        validate_handler = AuthValidateTokenRpcHandler(
+            settings=settings, keyring=keyring
+        )
+        validate_many_handler = AuthValidateManyRpcHandler(
+            settings=settings, keyring=keyring
+        )
         register_handler = AuthRegisterRpcHandler(auth_service=auth_service)
         refresh_handler = AuthRefreshTokenRpcHandler(auth_service=auth_service)
         logout_handler = AuthLogoutRpcHandler(auth_service=auth_service)
@@ -81,14 +131,18 @@ class AuthContainer:
             redis=redis_client,
             auth_service=auth_service,
             session_factory=SessionFactory,
+            password_manager=password_manager,
             issue_token_handler=issue_handler,
             validate_token_handler=validate_handler,
+            validate_many_handler=validate_many_handler,
             register_handler=register_handler,
             refresh_token_handler=refresh_handler,
             logout_handler=logout_handler,
+            keyring=keyring,
         )
 
     async def shutdown(self):
+        self.password_manager.shutdown()
         shutdown_tasks = []
         if self.bus:
             shutdown_tasks.append(self.bus.close())
@@ -96,3 +150,23 @@ class AuthContainer:
             shutdown_tasks.append(self.redis.close())
 
         await asyncio.gather(*shutdown_tasks, return_exceptions=True)
+
+
+@dataclass
+class AuthHttpContainer:
+    """
+    Контейнер HTTP-процесса раннера (apps.auth_svc.runner): только JWKS и
+    health. Шину, БД, Redis и bcrypt держат процессы-консьюмеры, поэтому
+    здесь нет ни подключений, ни калибровки.
+    """
+
+    keyring: Optional[KeyRing] = None
+    # Без шины bootstrap не объявляет топологию и не проверяет брокер
+    bus: Optional[IMessageBus] = None
+
+    @classmethod
+    async def create(cls, settings: AuthServiceSettings) -> "AuthHttpContainer":
+        return cls(keyring=load_keyring(settings))
+
+    async def shutdown(self):
+        pass
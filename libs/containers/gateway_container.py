@@ -1,12 +1,38 @@
 # libs/containers/gateway_container.py
 from __future__ import annotations
+import asyncio
 import os
+import socket
+import time
 from dataclasses import dataclass
+from typing import Optional
 from libs.messaging.i_message_bus import IMessageBus
 from libs.messaging.rabbitmq_message_bus import RabbitMQMessageBus
+from libs.domain.dto.backend import BackendInboundCommandEnvelope
+from libs.domain.dto.errors import ErrorDTO
+from libs.domain.dto.ws import WSErrorFrame
+from libs.app.errors import ErrorCode
+from libs.infra.central_redis_client import CentralRedisClient
 
 # --- НОВЫЙ ИМПОРТ ---
 from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from apps.gateway.gateway.inbound_command_publisher import InboundCommandPublisher
+from apps.gateway.gateway.account_mailbox import AccountMailbox
+from apps.gateway.gateway.admission import AdmissionController
+from apps.gateway.gateway.command_router import CommandRouter
+from apps.gateway.gateway.drain import DrainController
+from apps.gateway.gateway.node_registry import NodeRegistry
+from apps.gateway.gateway.inbound_rate_limit import BucketSpec, InboundRateLimiter
+from apps.gateway.gateway.session_resume import SessionRegistry
+from apps.gateway.gateway.reauth_batcher import ReauthBatcher
+from apps.gateway.gateway.validate_rpc_batcher import ValidateRpcBatcher
+from apps.gateway.gateway.revocation_subscriber import RevocationSubscriber
+from apps.gateway.gateway.token_cache import TokenValidationCache
+from apps.gateway.gateway.token_verifier import TokenVerifier
+from libs.infra.jwks_client import JwksClient
+from libs.infra.revocation import RevocationList
+from libs.utils.token_validation import TokenValidator
+from apps.gateway.config.setting_gateway import GatewaySettings
 
 
 @dataclass
@@ -18,23 +44,226 @@ class GatewayContainer:
     bus: IMessageBus
     # --- НОВОЕ СВОЙСТВО ---
     client_connection_manager: ClientConnectionManager
+    command_publisher: InboundCommandPublisher
+    command_router: CommandRouter
+    redis: CentralRedisClient
+    mailbox: AccountMailbox
+    admission: AdmissionController
+    # Идентификатор воркера: у каждого процесса gateway своя outbound-очередь
+    node_id: str
+    node_registry: NodeRegistry
+    drain: DrainController
+    token_verifier: TokenVerifier
+    reauth_batcher: ReauthBatcher
+    jwks: Optional[JwksClient] = None
+    revocations: Optional[RevocationSubscriber] = None
 
     @classmethod
-    async def create(cls) -> "GatewayContainer":
+    async def create(cls, settings: GatewaySettings) -> "GatewayContainer":
         """Фабричный метод для асинхронной инициализации контейнера."""
-        amqp_url = os.getenv("RABBITMQ_DSN")
-        if not amqp_url:
-            raise ValueError("RABBITMQ_DSN is not set")
+        bus = RabbitMQMessageBus(settings.RABBITMQ_DSN)
+        redis_client = CentralRedisClient(
+            redis_url=settings.REDIS_URL, password=settings.REDIS_PASSWORD
+        )
+        await asyncio.gather(bus.connect(), redis_client.connect())
 
-        bus = RabbitMQMessageBus(amqp_url)
-        await bus.connect()
+        # Контейнер создаётся в lifespan уже после fork, поэтому pid — свой у воркера
+        node_id = f"{settings.GATEWAY_NODE_NAME or socket.gethostname()}-{os.getpid()}"
+        node_registry = NodeRegistry(
+            redis_client,
+            node_id,
+            ttl_sec=settings.GATEWAY_NODE_REGISTRY_TTL_SEC,
+            heartbeat_sec=settings.GATEWAY_PRESENCE_HEARTBEAT_SEC,
+            flush_interval_ms=settings.GATEWAY_NODE_REGISTRY_FLUSH_MS,
+        )
+        node_registry.start()
+
+        sessions = (
+            SessionRegistry(
+                buffer_frames=settings.GATEWAY_WS_RESUME_BUFFER_FRAMES,
+                grace_sec=settings.GATEWAY_WS_RESUME_GRACE_SEC,
+                now=time.monotonic(),
+            )
+            if settings.GATEWAY_WS_RESUME_ENABLED
+            else None
+        )
+
+        inbound_limiter = (
+            InboundRateLimiter(
+                commands=BucketSpec(
+                    settings.GATEWAY_WS_RATE_COMMANDS_PER_SEC,
+                    settings.GATEWAY_WS_RATE_COMMANDS_BURST,
+                ),
+                pings=BucketSpec(
+                    settings.GATEWAY_WS_RATE_PINGS_PER_SEC,
+                    settings.GATEWAY_WS_RATE_PINGS_BURST,
+                ),
+                subscriptions=BucketSpec(
+                    settings.GATEWAY_WS_RATE_SUBSCRIPTIONS_PER_SEC,
+                    settings.GATEWAY_WS_RATE_SUBSCRIPTIONS_BURST,
+                ),
+                strike_limit=settings.GATEWAY_WS_RATE_STRIKE_LIMIT,
+                strike_decay_sec=settings.GATEWAY_WS_RATE_STRIKE_DECAY_SEC,
+            )
+            if settings.GATEWAY_WS_RATE_LIMIT_ENABLED
+            else None
+        )
 
         # --- СОЗДАЕМ МЕНЕДЖЕР ЗДЕСЬ ---
-        client_manager = ClientConnectionManager()
+        client_manager = ClientConnectionManager(
+            idle_timeout=settings.GATEWAY_WS_IDLE_TIMEOUT,
+            idle_tick_sec=settings.GATEWAY_WS_IDLE_TICK_SEC,
+            max_inflight_commands=settings.GATEWAY_WS_MAX_INFLIGHT_COMMANDS,
+            command_timeout=settings.GATEWAY_WS_COMMAND_TIMEOUT_SEC,
+            delta_enabled=settings.GATEWAY_WS_DELTA_ENABLED,
+            delta_max_entries=settings.GATEWAY_WS_DELTA_MAX_ENTRIES,
+            delta_max_version_gap=settings.GATEWAY_WS_DELTA_MAX_GAP,
+            sessions=sessions,
+            max_outbox=settings.GATEWAY_WS_MAX_OUTBOX,
+            batch_window_ms=settings.GATEWAY_WS_BATCH_WINDOW_MS,
+            batch_max_frames=settings.GATEWAY_WS_BATCH_MAX_FRAMES,
+            inbound_limiter=inbound_limiter,
+            registry=node_registry,
+            token_warn_sec=settings.GATEWAY_WS_TOKEN_WARN_SEC,
+            token_wheel_span_sec=settings.AUTH_ACCESS_TTL,
+        )
+
+        async def _on_publish_failed(
+            envelope: BackendInboundCommandEnvelope, exc: BaseException
+        ) -> None:
+            # Команда не ушла в брокер: освобождаем слот и сообщаем клиенту
+            conn_id = envelope.origin.connection_id
+            if not conn_id or envelope.request_id is None:
+                return
+            client_manager.complete_command(conn_id, envelope.request_id)
+            frame = WSErrorFrame(
+                error=ErrorDTO(
+                    code=ErrorCode.WS_COMMAND_NOT_DELIVERED.value,
+                    message="Command could not be delivered to backend",
+                ),
+                request_id=envelope.request_id,
+            )
+            await client_manager.send_frame(conn_id, frame)
+
+        command_publisher = InboundCommandPublisher(
+            bus,
+            batch_size=settings.GATEWAY_COMMAND_BATCH_SIZE,
+            flush_window_ms=settings.GATEWAY_COMMAND_BATCH_WINDOW_MS,
+            on_publish_failed=_on_publish_failed,
+        )
+        command_publisher.start()
+        command_router = CommandRouter(
+            settings.GATEWAY_COMMAND_SHARDS,
+            vnodes=settings.GATEWAY_COMMAND_SHARD_VNODES,
+        )
+
+        mailbox = AccountMailbox(
+            redis_client,
+            ttl_sec=settings.GATEWAY_WS_MAILBOX_TTL_SEC,
+            max_frames=settings.GATEWAY_WS_MAILBOX_MAX_FRAMES,
+        )
+
+        admission = AdmissionController(
+            max_handshakes=settings.GATEWAY_WS_MAX_HANDSHAKES,
+            per_ip_rate=settings.GATEWAY_WS_CONNECT_RATE_PER_IP,
+            per_ip_burst=settings.GATEWAY_WS_CONNECT_BURST_PER_IP,
+            max_connections=settings.GATEWAY_WS_MAX_CONNECTIONS,
+            memory_budget_mb=settings.GATEWAY_WS_MEMORY_BUDGET_MB,
+            conn_memory_kb=settings.GATEWAY_WS_CONN_MEMORY_KB,
+            max_rss_mb=settings.GATEWAY_WS_MAX_RSS_MB,
+            retry_after_sec=settings.GATEWAY_WS_ADMISSION_RETRY_AFTER_SEC,
+        )
+
+        drain = DrainController(
+            client_manager,
+            admission,
+            window_sec=settings.GATEWAY_DRAIN_WINDOW_SEC,
+            waves=settings.GATEWAY_DRAIN_WAVES,
+            reconnect_min_sec=settings.GATEWAY_DRAIN_RECONNECT_MIN_SEC,
+            reconnect_max_sec=settings.GATEWAY_DRAIN_RECONNECT_MAX_SEC,
+            flush_timeout_sec=settings.GATEWAY_DRAIN_FLUSH_TIMEOUT_SEC,
+        )
+
+        jwks = None
+        local_validator = None
+        if settings.GATEWAY_LOCAL_TOKEN_VALIDATION:
+            if settings.GATEWAY_JWKS_URL:
+                jwks = JwksClient(
+                    settings.GATEWAY_JWKS_URL,
+                    refresh_sec=settings.GATEWAY_JWKS_REFRESH_SEC,
+                    min_refresh_sec=settings.GATEWAY_JWKS_MIN_REFRESH_SEC,
+                )
+                # Недоступный JWKS не мешает старту: до обновления работает RPC
+                await jwks.start()
+            if jwks is not None or settings.JWT_SECRET:
+                local_validator = TokenValidator(
+                    settings.JWT_SECRET,
+                    audience=settings.AUTH_JWT_AUD,
+                    keyring=jwks.keyring if jwks is not None else None,
+                )
+        token_cache = (
+            TokenValidationCache(
+                max_entries=settings.GATEWAY_TOKEN_CACHE_MAX_ENTRIES,
+                ttl_sec=settings.GATEWAY_TOKEN_CACHE_TTL_SEC,
+                negative_ttl_sec=settings.GATEWAY_TOKEN_CACHE_NEGATIVE_TTL_SEC,
+            )
+            if settings.GATEWAY_TOKEN_CACHE_ENABLED
+            else None
+        )
+        denylist = RevocationList(access_ttl_sec=settings.AUTH_ACCESS_TTL)
+        revocations = RevocationSubscriber(
+            redis_client, denylist, token_cache, connections=client_manager
+        )
+        await revocations.start()
+        rpc_batcher = None
+        if settings.GATEWAY_AUTH_RPC_BATCH_WINDOW_MS > 0:
+            rpc_batcher = ValidateRpcBatcher(
+                bus,
+                window_ms=settings.GATEWAY_AUTH_RPC_BATCH_WINDOW_MS,
+                max_batch=settings.GATEWAY_AUTH_RPC_BATCH_MAX,
+            )
+        token_verifier = TokenVerifier(
+            bus,
+            local=local_validator,
+            jwks=jwks,
+            cache=token_cache,
+            denylist=denylist,
+            rpc_batcher=rpc_batcher,
+        )
+        reauth_batcher = ReauthBatcher(
+            token_verifier,
+            window_ms=settings.GATEWAY_WS_REAUTH_BATCH_WINDOW_MS,
+            max_batch=settings.GATEWAY_WS_REAUTH_BATCH_MAX,
+        )
 
-        return cls(bus=bus, client_connection_manager=client_manager)
+        return cls(
+            bus=bus,
+            client_connection_manager=client_manager,
+            command_publisher=command_publisher,
+            command_router=command_router,
+            redis=redis_client,
+            mailbox=mailbox,
+            admission=admission,
+            node_id=node_id,
+            node_registry=node_registry,
+            drain=drain,
+            token_verifier=token_verifier,
+            reauth_batcher=reauth_batcher,
+            jwks=jwks,
+            revocations=revocations,
+        )
 
     async def shutdown(self):
         """Корректно освобождает ресурсы."""
+        if self.command_publisher:
+            await self.command_publisher.stop()
+        if self.node_registry:
+            await self.node_registry.stop()
+        if self.jwks:
+            await self.jwks.stop()
+        if self.revocations:
+            await self.revocations.stop()
         if self.bus:
             await self.bus.close()
+        if self.redis:
+            await self.redis.close()
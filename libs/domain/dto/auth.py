@@ -17,6 +17,8 @@ class IssueTokenRequest(BaseModel):
     client_id: Optional[str] = "game_client"
     scopes: List[str] = Field(default_factory=list)
     expires_in: Optional[int] = Field(default=None, ge=60)
+    # Адрес клиента (проставляет gateway) — для лимитов на подбор паролей
+    client_ip: Optional[str] = None
 
 
 class IssueTokenResponse(BaseModel):
@@ -44,10 +46,34 @@ class ValidateTokenResponse(BaseModel):
     scopes: List[str] = Field(default_factory=list)
     iat: Optional[int] = None
     exp: Optional[int] = None
+    # Сессия (jti refresh-токена), по которой отзывают выданные в ней access-токены
+    sid: Optional[str] = None
     error_code: Optional[str] = None
     error_message: Optional[str] = None
 
 
+# ----- VALIDATE MANY -----
+# Максимум токенов в одном запросе validate_many
+VALIDATE_MANY_MAX_TOKENS = 512
+
+
+class ValidateTokensRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    tokens: List[str] = Field(max_length=VALIDATE_MANY_MAX_TOKENS)
+    # correlation_id исходных запросов по токенам (для трассировки, в логи)
+    correlation_ids: Optional[List[Optional[str]]] = Field(
+        None, max_length=VALIDATE_MANY_MAX_TOKENS
+    )
+    expected_aud: Optional[str] = None
+    expected_iss: Optional[str] = None
+
+
+class ValidateTokensResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    # В том же порядке, что tokens запроса
+    results: List[ValidateTokenResponse]
+
+
 # ----- REGISTER -----
 class RegisterRequest(BaseModel):
     model_config = ConfigDict(extra="forbid")
@@ -22,6 +22,9 @@ class AuthInfo(BaseModel):
 class OriginInfo(BaseModel):
     transport: TransportType
     connection_id: Optional[str] = None
+    # node_id воркера gateway: ответ можно слать прямо в его очередь
+    # (Exchanges.GATEWAY_OUTBOUND, routing key = gateway_node)
+    gateway_node: Optional[str] = None
     ip: Optional[str] = None
     user_agent: Optional[str] = None
 
@@ -90,3 +93,10 @@ class BackendOutboundEnvelope(BaseMessage):
     # Игровая синхронизация (опционально)
     tick: Optional[int] = None
     state_version: Optional[int] = None
+    # Ключ сущности для дельта-кодирования (вместе со state_version):
+    # гейтвей может прислать клиенту diff относительно прошлой версии
+    entity_key: Optional[str] = None
+    # Разрешить гейтвею заменять ещё не отправленный клиенту update с тем же
+    # event + entity_key более новым (latest-wins для медленных клиентов).
+    # Действует только вместе с entity_key
+    coalesce: bool = False
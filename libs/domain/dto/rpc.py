@@ -14,3 +14,5 @@ class RpcResponse(BaseModel, Generic[PayloadT]):
     error_code: Optional[str] = None
     message: Optional[str] = None
     correlation_id: Optional[str] = None
+    # Через сколько секунд повторить (перегрузка); шлюз отдаёт его в Retry-After
+    retry_after: Optional[int] = None
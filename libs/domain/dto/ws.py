@@ -1,7 +1,8 @@
 from __future__ import annotations
-from typing import Optional, Dict, Any, Union, Annotated, Literal
-from pydantic import Field
+from typing import Optional, Dict, Any, List, Union, Annotated, Literal
+from pydantic import Field, TypeAdapter
 
+from .backend import ActorHint
 from .base import BaseMessage
 from .errors import ErrorDTO
 
@@ -17,6 +18,8 @@ class WSCommandFrame(BaseMessage):
     domain: str
     command: str
     payload: Dict[str, Any] = Field(default_factory=dict)
+    # Подсказка маршрутизации: команды одной сущности уходят на один шард бекэнда
+    actor: Optional[ActorHint] = None
 
 
 class WSPingFrame(BaseMessage):
@@ -35,11 +38,27 @@ class WSUnsubscribeFrame(BaseMessage):
     topic: str
 
 
+class WSReauthFrame(BaseMessage):
+    """Продление авторизации живого соединения свежим access-токеном."""
+
+    type: Literal["reauth"] = "reauth"
+    token: str
+
+
 ClientWSFrame = Annotated[
-    Union[WSCommandFrame, WSPingFrame, WSSubscribeFrame, WSUnsubscribeFrame],
+    Union[
+        WSCommandFrame,
+        WSPingFrame,
+        WSSubscribeFrame,
+        WSUnsubscribeFrame,
+        WSReauthFrame,
+    ],
     Field(discriminator="type"),
 ]
 
+# Кэшированный адаптер: строится один раз и валидирует сырой JSON без json.loads
+CLIENT_WS_FRAME_ADAPTER: TypeAdapter[ClientWSFrame] = TypeAdapter(ClientWSFrame)
+
 # --------- WS: сервер -> клиент (discriminated union по полю "type")
 
 
@@ -47,6 +66,10 @@ class WSHelloFrame(BaseMessage):
     type: Literal["hello"] = "hello"
     connection_id: str
     heartbeat_sec: int
+    # Токен для переподключения: /v1/connect?resume=<token>&last_seq=<n>
+    resume_token: Optional[str] = None
+    # True — сессия возобновлена, пропущенные кадры досылаются следом за hello
+    resumed: bool = False
 
 
 class WSPongFrame(BaseMessage):
@@ -65,6 +88,51 @@ class WSEventFrame(BaseMessage):
     # Игровая синхронизация (опционально)
     tick: Optional[int] = None
     state_version: Optional[int] = None
+    # Ключ сущности: полный снимок, к которому применяются следующие WSDeltaFrame
+    key: Optional[str] = None
+
+
+class WSDeltaFrame(BaseMessage):
+    """
+    Обновление состояния сущности в виде JSON Patch (RFC 6902) к версии base_version,
+    которую клиент получил последней по этому key (событием или дельтой).
+    """
+
+    type: Literal["delta"] = "delta"
+    event: str
+    status: ServerEventStatus
+    key: str = Field(..., description="Ключ сущности (entity_key из бекэнда)")
+    base_version: int
+    state_version: int
+    patch: List[Dict[str, Any]] = Field(default_factory=list)
+    request_id: Optional[str] = None
+    tick: Optional[int] = None
+
+
+class WSBatchFrame(BaseMessage):
+    """
+    Несколько серверных кадров одним WS-сообщением (режим ?batch=1).
+    Кадры идут в исходном порядке; для resume каждый вложенный кадр считается отдельно.
+    """
+
+    type: Literal["batch"] = "batch"
+    frames: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class WSTokenExpiringFrame(BaseMessage):
+    """Токен соединения скоро истечёт: клиенту пора прислать reauth."""
+
+    type: Literal["token_expiring"] = "token_expiring"
+    # exp текущего токена (unix сек); в этот момент соединение будет закрыто
+    exp: int
+    expires_in: int
+
+
+class WSReauthedFrame(BaseMessage):
+    """Ответ на успешный reauth: соединение живёт до нового exp."""
+
+    type: Literal["reauthed"] = "reauthed"
+    exp: Optional[int] = None
 
 
 class WSErrorFrame(BaseMessage):
@@ -74,6 +142,15 @@ class WSErrorFrame(BaseMessage):
 
 
 ServerWSFrame = Annotated[
-    Union[WSHelloFrame, WSPongFrame, WSEventFrame, WSErrorFrame],
+    Union[
+        WSHelloFrame,
+        WSPongFrame,
+        WSEventFrame,
+        WSDeltaFrame,
+        WSBatchFrame,
+        WSTokenExpiringFrame,
+        WSReauthedFrame,
+        WSErrorFrame,
+    ],
     Field(discriminator="type"),
 ]
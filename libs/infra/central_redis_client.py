@@ -1,11 +1,14 @@
+import hashlib
 import json
 import logging
 import os
-from typing import Any, Dict, Optional, cast, Awaitable
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Sequence, cast, Awaitable
 import uuid
 import datetime
 import redis.asyncio as redis_asyncio
 from redis.asyncio import Redis
+from redis.exceptions import NoScriptError
 
 
 def _json_serializer(obj):
@@ -16,9 +19,28 @@ def _json_serializer(obj):
     raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 
+@dataclass(frozen=True)
+class RedisScript:
+    """Lua-скрипт для CentralRedisClient.run_script; sha считается по тексту."""
+
+    name: str
+    source: str
+    sha: str = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self, "sha", hashlib.sha1(self.source.encode("utf-8")).hexdigest()
+        )
+
+
 class CentralRedisClient:
     """
     Низкоуровневый клиент для взаимодействия с центральным Redis-сервером.
+
+    Lua-скрипты регистрируются в реестре клиента (register_script) и
+    загружаются в Redis один раз при подключении; вызов идёт по EVALSHA,
+    а если Redis скрипт забыл (рестарт, SCRIPT FLUSH) — один раз по EVAL,
+    который заодно кэширует его снова.
     """
 
     def __init__(
@@ -35,6 +57,8 @@ class CentralRedisClient:
         self._socket_timeout = socket_timeout
         self.redis: Optional[Redis] = None
         self.redis_raw: Optional[Redis] = None
+        # Реестр Lua-скриптов: name -> RedisScript
+        self._scripts: Dict[str, RedisScript] = {}
         self.logger.info("✨ CentralRedisClient инициализирован, ожидание подключения.")
 
     async def connect(self):
@@ -62,6 +86,7 @@ class CentralRedisClient:
                 )
                 await cast(Redis, self.redis).ping()
                 await cast(Redis, self.redis_raw).ping()
+                await self._load_scripts()
                 self.logger.info(
                     "✅ Подключение к центральному Redis успешно установлено."
                 )
@@ -73,6 +98,41 @@ class CentralRedisClient:
                 self.redis_raw = None
                 raise
 
+    def register_script(self, script: RedisScript) -> RedisScript:
+        """
+        Добавляет скрипт в реестр. Регистрировать до connect(): он загружает
+        реестр в Redis. Скрипт, добавленный после, загрузится первым вызовом (EVAL).
+        """
+        self._scripts[script.name] = script
+        return script
+
+    async def _load_scripts(self) -> None:
+        for script in self._scripts.values():
+            await cast(
+                Awaitable[Any], cast(Redis, self.redis).script_load(script.source)
+            )
+        if self._scripts:
+            self.logger.info(f"📜 Загружено Lua-скриптов в Redis: {len(self._scripts)}")
+
+    async def run_script(
+        self, script: RedisScript, keys: Sequence[str] = (), args: Sequence[Any] = ()
+    ) -> Any:
+        """Выполняет скрипт одним round trip: EVALSHA, при NOSCRIPT — EVAL."""
+        if self.redis is None:
+            raise RuntimeError("Redis client not connected.")
+        self._scripts.setdefault(script.name, script)
+        try:
+            return await cast(
+                Awaitable[Any],
+                self.redis.evalsha(script.sha, len(keys), *keys, *args),
+            )
+        except NoScriptError:
+            self.logger.info(f"📜 Скрипт {script.name} не найден в Redis, EVAL")
+            return await cast(
+                Awaitable[Any],
+                self.redis.eval(script.source, len(keys), *keys, *args),
+            )
+
     async def close(self):
         """Закрывает все подключения Redis."""
         if self.redis:
@@ -191,6 +251,11 @@ class CentralRedisClient:
             raise RuntimeError("Redis client not connected.")
         return self.redis.pipeline()
 
+    def pubsub(self) -> redis_asyncio.client.PubSub:
+        if self.redis is None:
+            raise RuntimeError("Redis client not connected.")
+        return self.redis.pubsub()
+
     async def publish(self, channel: str, message: str):
         if self.redis is None:
             self.logger.error("Redis не инициализирован.")
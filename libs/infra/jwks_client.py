@@ -0,0 +1,94 @@
+# libs/infra/jwks_client.py
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import re
+import time
+from typing import Optional
+
+import httpx
+
+from libs.utils.jwt_keys import KeyRing
+from libs.utils.logging_setup import app_logger as logger
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class JwksClient:
+    """
+    Кэширующий клиент JWKS auth_svc для локальной проверки токенов.
+
+    Набор ключей живёт в self.keyring и обновляется в фоне: по max-age из
+    Cache-Control (или refresh_sec), с If-None-Match. Токен с незнакомым kid
+    (ключ только что ротирован) запускает внеочередное обновление, но не чаще
+    раза в min_refresh_sec — поток мусорных kid не превращается в поток запросов.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        refresh_sec: float = 300.0,
+        min_refresh_sec: float = 10.0,
+        timeout_sec: float = 3.0,
+    ):
+        self.url = url
+        self.refresh_sec = max(1.0, float(refresh_sec))
+        self.min_refresh_sec = max(0.0, float(min_refresh_sec))
+        self.keyring = KeyRing()
+        self._client = httpx.AsyncClient(timeout=timeout_sec)
+        self._etag: Optional[str] = None
+        self._next_refresh_in = self.refresh_sec
+        self._last_attempt = float("-inf")
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self.refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self._client.aclose()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._next_refresh_in)
+            await self.refresh()
+
+    async def refresh(self) -> bool:
+        """Перечитывает JWKS; False — не удалось (остаётся прежний набор)."""
+        async with self._lock:
+            self._last_attempt = time.monotonic()
+            headers = {"If-None-Match": self._etag} if self._etag else {}
+            try:
+                resp = await self._client.get(self.url, headers=headers)
+                if resp.status_code != 304:
+                    resp.raise_for_status()
+                    keys = KeyRing.keys_from_jwks(resp.json())
+                    self.keyring.replace(keys)
+                    self._etag = resp.headers.get("ETag")
+                    logger.info(f"🔑 JWKS обновлён: kid={self.keyring.kids}")
+            except Exception as e:
+                logger.warning(f"⚠️ Не удалось обновить JWKS ({self.url}): {e}")
+                self._next_refresh_in = min(self.refresh_sec, 30.0)
+                return False
+            match = _MAX_AGE_RE.search(resp.headers.get("Cache-Control", ""))
+            self._next_refresh_in = (
+                max(1.0, float(match.group(1))) if match else self.refresh_sec
+            )
+            return True
+
+    async def ensure_kid(self, kid: str) -> bool:
+        """Есть ли ключ kid; незнакомый kid вызывает обновление (с ограничением частоты)."""
+        if kid in self.keyring:
+            return True
+        if time.monotonic() - self._last_attempt >= self.min_refresh_sec:
+            await self.refresh()
+        return kid in self.keyring
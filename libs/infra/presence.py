@@ -0,0 +1,85 @@
+# libs/infra/presence.py
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Iterable, Optional, Sequence, Set
+
+from libs.infra.central_redis_client import CentralRedisClient
+from libs.utils.redis_keys import key_ws_online_user
+
+# Формат поля в hash присутствия аккаунта: node_id -> "<число соединений>:<дедлайн, unix сек>"
+# Дедлайн продлевает heartbeat узла; поле упавшего узла просто перестаёт считаться
+
+
+def encode_presence(count: int, deadline: float) -> str:
+    return f"{int(count)}:{int(deadline)}"
+
+
+def decode_presence(value: str) -> tuple[int, int]:
+    count, _, deadline = value.partition(":")
+    return int(count), int(deadline or 0)
+
+
+def live_nodes(fields: Dict[str, str], now: float) -> Dict[str, int]:
+    """node_id -> число соединений для полей с непросроченным дедлайном."""
+    nodes: Dict[str, int] = {}
+    for node, raw in fields.items():
+        try:
+            count, deadline = decode_presence(raw)
+        except ValueError:
+            continue
+        if count > 0 and deadline > now:
+            nodes[node] = count
+    return nodes
+
+
+def stage_presence(
+    pipe: Any,
+    account_id: int,
+    node_id: str,
+    count: int,
+    *,
+    deadline: float,
+    ttl_sec: int,
+) -> None:
+    """Добавляет в pipeline запись присутствия аккаунта на узле (count=0 — удаление)."""
+    key = key_ws_online_user(account_id)
+    if count > 0:
+        pipe.hset(key, node_id, encode_presence(count, deadline))
+        pipe.expire(key, ttl_sec)
+    else:
+        pipe.hdel(key, node_id)
+
+
+class PresenceReader:
+    """
+    Чтение онлайн-статуса аккаунтов (пишут узлы gateway, см. NodeRegistry).
+    Любой запрос — один round trip в Redis, сколько бы аккаунтов ни спросили.
+    """
+
+    def __init__(self, redis: CentralRedisClient):
+        self.redis = redis
+
+    async def nodes_of(
+        self, account_id: int, now: Optional[float] = None
+    ) -> Dict[str, int]:
+        fields = await self.redis.hgetall(key_ws_online_user(account_id))
+        return live_nodes(fields or {}, time.time() if now is None else now)
+
+    async def which_online(
+        self, account_ids: Iterable[int], now: Optional[float] = None
+    ) -> Set[int]:
+        """Какие из переданных аккаунтов сейчас онлайн хотя бы на одном узле."""
+        ids: Sequence[int] = list(dict.fromkeys(account_ids))
+        if not ids:
+            return set()
+        now = time.time() if now is None else now
+        pipe = self.redis.pipeline()
+        for account_id in ids:
+            pipe.hgetall(key_ws_online_user(account_id))
+        results = await pipe.execute()
+        return {
+            account_id
+            for account_id, fields in zip(ids, results)
+            if fields and live_nodes(fields, now)
+        }
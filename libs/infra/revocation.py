@@ -0,0 +1,142 @@
+# libs/infra/revocation.py
+from __future__ import annotations
+
+import json
+import math
+import time
+from typing import Any, Dict, Optional
+
+from libs.infra.central_redis_client import CentralRedisClient
+from libs.utils.redis_keys import (
+    key_auth_revocations_channel,
+    key_auth_revoked_accounts,
+    key_auth_revoked_sessions,
+)
+
+# Типы событий отзыва в канале key_auth_revocations_channel()
+REVOKE_SESSION = "session"  # {"type", "sid", "account_id", "exp"}
+REVOKE_ACCOUNT = "account"  # {"type", "account_id", "nbf"}
+
+
+class RevocationPublisher:
+    """
+    Публикация отзыва access-токенов для узлов, проверяющих токены локально.
+
+    Событие пишется в Redis дважды одним pipeline: в ZSET (для загрузки списка
+    целиком при старте узла) и в pub/sub (для мгновенной доставки живым узлам).
+    Запись нужна только пока жив отозванный access-токен, поэтому ZSET
+    подрезается при каждой публикации.
+    """
+
+    def __init__(self, redis: CentralRedisClient, access_ttl_sec: int):
+        self.redis = redis
+        self.access_ttl_sec = int(access_ttl_sec)
+
+    async def revoke_session(
+        self, sid: str, account_id: Optional[int], exp: Optional[float] = None
+    ) -> None:
+        """Отзывает access-токены сессии (sid — jti её refresh-токена)."""
+        now = time.time()
+        exp = int(exp if exp is not None else now + self.access_ttl_sec)
+        event = {
+            "type": REVOKE_SESSION,
+            "sid": sid,
+            "account_id": account_id,
+            "exp": exp,
+        }
+        pipe = self.redis.pipeline()
+        pipe.zadd(key_auth_revoked_sessions(), {sid: exp})
+        pipe.zremrangebyscore(key_auth_revoked_sessions(), "-inf", now)
+        pipe.publish(key_auth_revocations_channel(), json.dumps(event))
+        await pipe.execute()
+
+    async def revoke_account(
+        self, account_id: int, not_before: Optional[float] = None
+    ) -> None:
+        """Отзывает все access-токены аккаунта, выданные раньше not_before."""
+        now = time.time()
+        # Токены, выданные в ту же секунду, тоже считаются отозванными
+        nbf = int(math.ceil(not_before if not_before is not None else now))
+        event = {"type": REVOKE_ACCOUNT, "account_id": account_id, "nbf": nbf}
+        pipe = self.redis.pipeline()
+        pipe.zadd(key_auth_revoked_accounts(), {str(account_id): nbf}, gt=True)
+        pipe.zremrangebyscore(
+            key_auth_revoked_accounts(), "-inf", now - self.access_ttl_sec
+        )
+        pipe.publish(key_auth_revocations_channel(), json.dumps(event))
+        await pipe.execute()
+
+
+class RevocationList:
+    """
+    Denylist в памяти узла: множество отозванных sid и "водяной знак" по
+    аккаунту (токены с iat < nbf отозваны). Проверка — два поиска в dict,
+    без сетевых вызовов на запрос.
+    """
+
+    def __init__(self, access_ttl_sec: int = 1800):
+        self.access_ttl_sec = int(access_ttl_sec)
+        # sid -> exp (после exp токен отклонит и обычная проверка)
+        self._sessions: Dict[str, float] = {}
+        # account_id -> nbf
+        self._watermarks: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions) + len(self._watermarks)
+
+    def revoke_session(self, sid: str, exp: float) -> None:
+        self._sessions[sid] = max(exp, self._sessions.get(sid, 0.0))
+
+    def revoke_account(self, account_id: int, nbf: float) -> None:
+        self._watermarks[account_id] = max(nbf, self._watermarks.get(account_id, 0.0))
+
+    def is_revoked(
+        self, sid: Optional[str], account_id: Optional[int], iat: Optional[int]
+    ) -> bool:
+        if sid is not None and sid in self._sessions:
+            return True
+        if account_id is not None:
+            nbf = self._watermarks.get(account_id)
+            if nbf is not None and (iat is None or iat < nbf):
+                return True
+        return False
+
+    def apply(self, event: Dict[str, Any]) -> Optional[int]:
+        """Применяет событие из канала; возвращает затронутый account_id."""
+        kind = event.get("type")
+        account_id = event.get("account_id")
+        if kind == REVOKE_SESSION and event.get("sid"):
+            self.revoke_session(str(event["sid"]), float(event.get("exp") or 0))
+        elif kind == REVOKE_ACCOUNT and account_id is not None:
+            self.revoke_account(int(account_id), float(event.get("nbf") or 0))
+        else:
+            return None
+        return int(account_id) if account_id is not None else None
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Убирает записи, которые уже не могут совпасть с живым токеном."""
+        now = time.time() if now is None else now
+        self._sessions = {sid: exp for sid, exp in self._sessions.items() if exp > now}
+        horizon = now - self.access_ttl_sec
+        self._watermarks = {
+            acc: nbf for acc, nbf in self._watermarks.items() if nbf > horizon
+        }
+
+    async def load(
+        self, redis: CentralRedisClient, now: Optional[float] = None
+    ) -> None:
+        """Загружает текущий список из Redis целиком (два ZRANGEBYSCORE)."""
+        now = time.time() if now is None else now
+        pipe = redis.pipeline()
+        pipe.zrangebyscore(key_auth_revoked_sessions(), now, "+inf", withscores=True)
+        pipe.zrangebyscore(
+            key_auth_revoked_accounts(),
+            now - self.access_ttl_sec,
+            "+inf",
+            withscores=True,
+        )
+        sessions, accounts = await pipe.execute()
+        for member, exp in sessions:
+            self.revoke_session(member, float(exp))
+        for account_id, nbf in accounts:
+            self.revoke_account(int(account_id), float(nbf))
@@ -1,4 +1,9 @@
 # libs/messaging/rabbitmq_names.py
+import re
+from typing import Optional
+
+# Допустимая часть имени очереди из внешних данных (домен, шард)
+QUEUE_NAME_PART_RE = re.compile(r"^[a-z0-9_]+$")
 
 
 class Exchanges:
@@ -7,6 +12,10 @@ class Exchanges:
     RPC = "core.rpc.v1"
     EVENTS = "core.events.v1"
     DLX = "core.dlx.v1"
+    # Команды от клиентов (через gateway) в доменные бекэнды
+    COMMANDS = "core.commands.v1"
+    # Адресная доставка в конкретный воркер gateway (routing key = node_id)
+    GATEWAY_OUTBOUND = "core.gateway.outbound.v1"
 
 
 class Queues:
@@ -17,6 +26,8 @@ class Queues:
 
     AUTH_ISSUE_TOKEN_RPC = "core.auth.rpc.issue_token.v1"
     AUTH_VALIDATE_TOKEN_RPC = "core.auth.rpc.validate_token.v1"
+    # Пачка токенов в одном сообщении (волны переподключений, ротация ключей)
+    AUTH_VALIDATE_MANY_RPC = "core.auth.rpc.validate_many.v1"
     AUTH_REGISTER_RPC = "core.auth.rpc.register.v1"
     # --- НОВЫЕ ОЧЕРЕДИ ---
     AUTH_REFRESH_TOKEN_RPC = "core.auth.rpc.refresh_token.v1"
@@ -25,6 +36,26 @@ class Queues:
     GATEWAY_WS_OUTBOUND = "core.gateway.queue.ws_outbound.v1"
 
 
+def get_domain_commands_queue_name(domain: str, shard: Optional[str] = None) -> str:
+    """
+    Генерирует имя очереди входящих команд домена (routing key в Exchanges.COMMANDS).
+    С shard — очередь отдельного шарда домена (см. CommandRouter в gateway).
+    """
+    if shard:
+        return f"core.{domain}.queue.commands.{shard}.v1"
+    return f"core.{domain}.queue.commands.v1"
+
+
+def is_valid_queue_name_part(part: str) -> bool:
+    """Домен/шард можно подставлять в имя очереди (routing key) как есть."""
+    return bool(QUEUE_NAME_PART_RE.match(part))
+
+
+def get_gateway_node_queue_name(node_id: str) -> str:
+    """Генерирует имя outbound-очереди отдельного воркера gateway."""
+    return f"core.gateway.queue.ws_outbound.{node_id}.v1"
+
+
 def get_retry_queue_name(base_name: str) -> str:
     """Генерирует имя retry-очереди."""
     return f"{base_name}.retry"
@@ -1,12 +1,15 @@
 # libs/messaging/rabbitmq_topology.py
 from __future__ import annotations
 import os
+from typing import Optional
+
 from libs.messaging.i_message_bus import IMessageBus
 from libs.messaging.rabbitmq_names import (
     Exchanges as Ex,
     Queues as Q,
     get_retry_queue_name,
     get_dlq_name,
+    get_domain_commands_queue_name,
 )
 
 # Получаем настройки из ENV с дефолтами
@@ -65,6 +68,23 @@ async def declare_rpc_queue_with_retry(
     )
 
 
+async def declare_domain_commands_queue(
+    bus: IMessageBus, domain: str, shard: Optional[str] = None
+) -> str:
+    """
+    Объявляет очередь входящих команд домена и привязывает её к Exchanges.COMMANDS.
+    Вызывается бекэндом домена при старте; воркер шарда передаёт свой shard.
+    Возвращает имя очереди.
+    """
+    queue_name = get_domain_commands_queue_name(domain, shard)
+    await bus.declare_exchange(Ex.COMMANDS, type_="direct", durable=True)
+    await bus.declare_queue(queue_name, durable=True)
+    await bus.bind_queue(
+        queue_name=queue_name, exchange_name=Ex.COMMANDS, routing_key=queue_name
+    )
+    return queue_name
+
+
 async def declare_auth_topology(bus: IMessageBus) -> None:
     """Объявляет ресурсы, необходимые для auth_svc."""
     await bus.declare_exchange(Ex.RPC, type_="direct", durable=True)
@@ -74,6 +94,7 @@ async def declare_auth_topology(bus: IMessageBus) -> None:
     # Объявляем полные цепочки для каждого RPC-метода
     await declare_rpc_queue_with_retry(bus, Q.AUTH_ISSUE_TOKEN_RPC)
     await declare_rpc_queue_with_retry(bus, Q.AUTH_VALIDATE_TOKEN_RPC)
+    await declare_rpc_queue_with_retry(bus, Q.AUTH_VALIDATE_MANY_RPC)
     await declare_rpc_queue_with_retry(bus, Q.AUTH_REGISTER_RPC)
     # --- ДОБАВЛЯЕМ ОБЪЯВЛЕНИЕ НОВЫХ ОЧЕРЕДЕЙ ---
     await declare_rpc_queue_with_retry(bus, Q.AUTH_REFRESH_TOKEN_RPC)
@@ -86,6 +107,10 @@ async def declare_gateway_topology(bus: IMessageBus) -> None:
     await bus.declare_exchange(Ex.RPC, type_="direct", durable=True)
     await bus.declare_exchange(Ex.EVENTS, type_="topic", durable=True)
     await bus.declare_exchange(Ex.DLX, type_="direct", durable=True)
+    # Exchange для команд клиентов; очереди доменов объявляют сами бекэнды
+    await bus.declare_exchange(Ex.COMMANDS, type_="direct", durable=True)
+    # Exchange для адресной доставки в воркер; его очередь объявляет сам воркер
+    await bus.declare_exchange(Ex.GATEWAY_OUTBOUND, type_="direct", durable=True)
 
     # И свою очередь для входящих событий от воркеров
     await bus.declare_queue(Q.GATEWAY_WS_OUTBOUND, durable=True)
@@ -0,0 +1,76 @@
+# libs/utils/consistent_hash.py
+from __future__ import annotations
+
+import bisect
+import hashlib
+from typing import Dict, Iterable, List
+
+
+def stable_hash(value: str) -> int:
+    """
+    64-битный хеш, одинаковый во всех процессах.
+    Встроенный hash() для str рандомизируется на процесс и тут не годится:
+    воркеры gateway и бекэнды должны видеть одно и то же кольцо.
+    """
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+class ConsistentHashRing:
+    """
+    Кольцо консистентного хеширования с виртуальными узлами.
+
+    Каждый узел занимает vnodes точек на кольце, ключ принадлежит первой точке
+    по часовой стрелке. При добавлении/удалении узла переезжает только ~1/N
+    ключей — остальные сущности остаются на прежних воркерах с тёплыми кэшами.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 64):
+        self.vnodes = max(1, int(vnodes))
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self._nodes: set[str] = set()
+        for node in nodes:
+            self.add_node(node)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: object) -> bool:
+        return node in self._nodes
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def _node_points(self, node: str) -> List[int]:
+        return [stable_hash(f"{node}#{i}") for i in range(self.vnodes)]
+
+    def add_node(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for point in self._node_points(node):
+            # Коллизия 64-битных точек практически невозможна; при ней точка остаётся за первым узлом
+            if point in self._owners:
+                continue
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove_node(self, node: str) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        for point in self._node_points(node):
+            if self._owners.get(point) == node:
+                del self._owners[point]
+                self._points.pop(bisect.bisect_left(self._points, point))
+
+    def node_for(self, key: str) -> str:
+        if not self._points:
+            raise LookupError("ConsistentHashRing is empty")
+        idx = bisect.bisect(self._points, stable_hash(key))
+        if idx == len(self._points):
+            idx = 0
+        return self._owners[self._points[idx]]
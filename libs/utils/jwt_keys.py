@@ -0,0 +1,170 @@
+# libs/utils/jwt_keys.py
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import jwt  # PyJWT
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm
+
+
+@dataclass(frozen=True, slots=True)
+class JwtKey:
+    kid: str
+    algorithm: str
+    verify_key: Any
+    # Есть только у auth_svc; в наборе ключей верификатора — None
+    sign_key: Any = None
+
+
+def algorithm_for(private_key: Any) -> str:
+    """Алгоритм JWS по типу ключа: Ed25519 -> EdDSA, EC P-256 -> ES256."""
+    if isinstance(private_key, ed25519.Ed25519PrivateKey):
+        return "EdDSA"
+    if isinstance(private_key, ec.EllipticCurvePrivateKey) and isinstance(
+        private_key.curve, ec.SECP256R1
+    ):
+        return "ES256"
+    raise ValueError(f"Неподдерживаемый тип ключа подписи: {type(private_key)}")
+
+
+class KeyRing:
+    """
+    Набор ключей подписи JWT с идентификаторами (kid).
+
+    Подписывает только активный ключ; остальные остаются для проверки
+    уже выданных токенов и публикуются в JWKS. Ротация:
+      1) положить новый ключ — он попадает в JWKS, верификаторы его подтягивают;
+      2) после max-age JWKS сделать его активным;
+      3) старый удалить, когда истекут подписанные им токены. Refresh-токены
+         подписываются тем же ключом и живут AUTH_REFRESH_TTL (14 дней), поэтому
+         держать старый ключ нужно не меньше refresh TTL, а не access TTL: иначе
+         refresh перестанет проверяться и все держатели будут разлогинены.
+    """
+
+    def __init__(self, keys: Iterable[JwtKey] = (), active_kid: Optional[str] = None):
+        self._keys: Dict[str, JwtKey] = {}
+        self.active_kid: Optional[str] = None
+        self.replace(keys, active_kid)
+
+    def __contains__(self, kid: object) -> bool:
+        return kid in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def kids(self) -> List[str]:
+        return sorted(self._keys)
+
+    def get(self, kid: Optional[str]) -> Optional[JwtKey]:
+        return self._keys.get(kid) if kid else None
+
+    @property
+    def active(self) -> JwtKey:
+        key = self.get(self.active_kid)
+        if key is None or key.sign_key is None:
+            raise LookupError("KeyRing has no active signing key")
+        return key
+
+    def replace(self, keys: Iterable[JwtKey], active_kid: Optional[str] = None) -> None:
+        """Атомарно подменяет набор (обновление JWKS не видно наполовину)."""
+        new_keys = {key.kid: key for key in keys}
+        if active_kid is not None and active_kid not in new_keys:
+            raise ValueError(f"Активный kid {active_kid!r} отсутствует в наборе")
+        self._keys = new_keys
+        self.active_kid = active_kid
+
+    def to_jwks(self) -> Dict[str, Any]:
+        """Публичная часть набора в формате JWKS (RFC 7517)."""
+        keys = []
+        for key in sorted(self._keys.values(), key=lambda k: k.kid):
+            codec = OKPAlgorithm if key.algorithm == "EdDSA" else ECAlgorithm
+            jwk = codec.to_jwk(key.verify_key, as_dict=True)
+            jwk.update({"kid": key.kid, "alg": key.algorithm, "use": "sig"})
+            keys.append(jwk)
+        return {"keys": keys}
+
+    @classmethod
+    def from_pem_dir(cls, path: str, active_kid: Optional[str] = None) -> "KeyRing":
+        """
+        Приватные ключи из <path>/<kid>.pem. Без явного active_kid активным
+        становится последний по имени (удобно с kid вида "2026-10").
+        """
+        keys = []
+        for pem in sorted(Path(path).glob("*.pem")):
+            private_key = serialization.load_pem_private_key(
+                pem.read_bytes(), password=None
+            )
+            keys.append(
+                JwtKey(
+                    kid=pem.stem,
+                    algorithm=algorithm_for(private_key),
+                    verify_key=private_key.public_key(),
+                    sign_key=private_key,
+                )
+            )
+        if not keys:
+            raise ValueError(f"В {path} нет ключей подписи (*.pem)")
+        return cls(keys, active_kid or keys[-1].kid)
+
+    @staticmethod
+    def keys_from_jwks(data: Dict[str, Any]) -> List[JwtKey]:
+        """Ключи проверки из JWKS; ключи без kid или с чужим use пропускаются."""
+        keys = []
+        for jwk in data.get("keys", []):
+            if not jwk.get("kid") or jwk.get("use", "sig") != "sig":
+                continue
+            try:
+                parsed = jwt.PyJWK.from_dict(jwk)
+            except jwt.PyJWTError:
+                continue
+            keys.append(
+                JwtKey(
+                    kid=jwk["kid"],
+                    algorithm=parsed.algorithm_name,
+                    verify_key=parsed.key,
+                )
+            )
+        return keys
+
+
+def jwks_etag(jwks: Dict[str, Any]) -> str:
+    body = json.dumps(jwks, sort_keys=True, separators=(",", ":")).encode()
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def unverified_kid(token: str) -> Optional[str]:
+    """kid из заголовка токена без проверки подписи (None — нет или токен битый)."""
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+    except jwt.PyJWTError:
+        return None
+    return kid if isinstance(kid, str) else None
+
+
+def resolve_verification_key(
+    token: str,
+    keyring: Optional[KeyRing],
+    secret: Optional[str],
+    secret_algorithms: Sequence[str] = ("HS256",),
+) -> Tuple[Any, List[str]]:
+    """
+    Ключ и допустимые алгоритмы для проверки токена.
+    Токен с kid проверяется только своим ключом и его алгоритмом (без путаницы
+    HS/ES), без kid — общим секретом (токены, выданные до перехода на ключи).
+    """
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is not None:
+        key = keyring.get(kid) if keyring is not None else None
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+        return key.verify_key, [key.algorithm]
+    if secret is None:
+        raise jwt.InvalidTokenError("Token has no kid")
+    return secret, list(secret_algorithms)
@@ -0,0 +1,96 @@
+# libs/utils/micro_batch.py
+from __future__ import annotations
+
+import asyncio
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Generic,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Склеивает одновременные вызовы submit() в пачки для handler.
+
+    Пачка уходит через window_ms после первого элемента или сразу, как только
+    набралось max_batch. handler получает элементы в порядке поступления и
+    должен вернуть результаты в том же порядке; его исключение получают
+    все вызовы пачки.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[T]], Awaitable[List[R]]],
+        *,
+        window_ms: float = 10.0,
+        max_batch: int = 256,
+    ):
+        self.handler = handler
+        self.window = max(0.0, float(window_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.batches = 0
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        # Задачи отправки пачек (по окну и по max_batch): держим ссылки до
+        # завершения, чтобы задачу с handler в полёте не собрал GC
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush_now()
+        elif self._flush_task is None:
+            self._flush_task = self._spawn(self._flush_later())
+        return await future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        await self._flush(self._take())
+
+    def _flush_now(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._spawn(self._flush(self._take()))
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+        return task
+
+    def _take(self) -> List[Tuple[T, asyncio.Future]]:
+        batch, self._pending = self._pending, []
+        return batch
+
+    async def _flush(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        if not batch:
+            return
+        self.batches += 1
+        try:
+            results = await self.handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"MicroBatcher: {len(results)} результатов на {len(batch)} элементов"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -19,14 +19,57 @@ def key_auth_ban(username_or_ip: str) -> str:
     return make_key("auth", "ban", "login", username_or_ip)
 
 
+def key_auth_login_ip(ip: str) -> str:
+    """Ключ (zset) скользящего окна попыток логина с IP."""
+    return make_key("auth", "throttle", "ip", ip)
+
+
+def key_auth_login_subnet(subnet: str) -> str:
+    """Ключ (zset) скользящего окна попыток логина с подсети (/24, /64)."""
+    return make_key("auth", "throttle", "subnet", subnet)
+
+
+def key_auth_login_global_failures() -> str:
+    """Ключ (zset) скользящего окна неудачных логинов по всему сервису."""
+    return make_key("auth", "throttle", "failures")
+
+
 def key_auth_cache_account(account_id: int) -> str:
     """Ключ для кэша данных профиля аккаунта."""
     return make_key("auth", "cache", "account", str(account_id))
 
 
+def key_auth_revoked_sessions() -> str:
+    """Ключ (zset) отозванных сессий: sid -> exp последнего access-токена сессии."""
+    return make_key("auth", "revoked", "sessions")
+
+
+def key_auth_revoked_accounts() -> str:
+    """Ключ (zset) отзыва по аккаунту: account_id -> nbf (токены с iat < nbf отозваны)."""
+    return make_key("auth", "revoked", "accounts")
+
+
+def key_auth_revocations_channel() -> str:
+    """Pub/sub-канал событий отзыва токенов (см. libs/infra/revocation.py)."""
+    return make_key("auth", "revocations")
+
+
 # --- Ключи для домена WebSocket (Gateway) ---
 
 
 def key_ws_online_user(account_id: int) -> str:
-    """Ключ для хранения информации об онлайн-статусе пользователя."""
+    """
+    Ключ (hash) присутствия аккаунта: node_id -> "<соединений>:<дедлайн>"
+    (см. libs/infra/presence.py).
+    """
     return make_key("ws", "online", str(account_id))
+
+
+def key_ws_conn_node(conn_id: str) -> str:
+    """Ключ (string) с node_id воркера gateway, владеющего WS-соединением."""
+    return make_key("ws", "conn", conn_id, "node")
+
+
+def key_ws_mailbox(account_id: int) -> str:
+    """Ключ (list) недоставленных WS-кадров аккаунта, пока он офлайн."""
+    return make_key("ws", "mailbox", str(account_id))
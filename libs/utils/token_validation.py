@@ -0,0 +1,131 @@
+# libs/utils/token_validation.py
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import jwt  # PyJWT
+
+from libs.domain.dto.auth import ValidateTokenResponse
+from libs.utils.jwt_keys import KeyRing, resolve_verification_key, unverified_kid
+
+# Коды ошибок валидации access-токена (одинаковые для auth_svc и gateway)
+TOKEN_EXPIRED = "auth.TOKEN_EXPIRED"
+BAD_AUDIENCE = "auth.BAD_AUDIENCE"
+BAD_ISSUER = "auth.BAD_ISSUER"
+INVALID_TOKEN = "auth.INVALID_TOKEN"
+INTERNAL_ERROR = "auth.INTERNAL_ERROR"
+TOKEN_REVOKED = "auth.TOKEN_REVOKED"
+
+
+class TokenValidator:
+    """
+    Проверка access-токена без обращения к auth_svc.
+
+    Единственная реализация проверок (подпись, aud, iss, обязательные exp/iat):
+    ей пользуется и RPC-хендлер auth_svc, и gateway при локальной валидации,
+    поэтому результат и коды ошибок совпадают на обоих путях.
+
+    Токены с kid проверяются публичным ключом из keyring (EdDSA/ES256),
+    токены без kid — общим секретом, если он задан.
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        *,
+        audience: str,
+        keyring: Optional[KeyRing] = None,
+        algorithms: Sequence[str] = ("HS256",),
+        issuer: Optional[str] = None,
+        leeway_sec: float = 0.0,
+    ):
+        self._secret = secret
+        self.keyring = keyring
+        self._algorithms = list(algorithms)
+        self._aud = audience
+        # None — iss проверяется, только если его передал вызывающий
+        self._iss = issuer
+        self._leeway = leeway_sec
+
+    def validate(
+        self,
+        token: str,
+        expected_aud: Optional[str] = None,
+        expected_iss: Optional[str] = None,
+    ) -> ValidateTokenResponse:
+        try:
+            key, algorithms = resolve_verification_key(
+                token, self.keyring, self._secret, self._algorithms
+            )
+            decoded = jwt.decode(
+                token,
+                key,
+                algorithms=algorithms,
+                options={"require": ["exp", "iat"]},
+                audience=expected_aud or self._aud,
+                issuer=expected_iss or self._iss,
+                leeway=self._leeway,
+            )
+        except jwt.ExpiredSignatureError as e:
+            return _invalid(TOKEN_EXPIRED, e)
+        except jwt.InvalidAudienceError as e:
+            return _invalid(BAD_AUDIENCE, e)
+        except jwt.InvalidIssuerError as e:
+            return _invalid(BAD_ISSUER, e)
+        except jwt.InvalidTokenError as e:
+            return _invalid(INVALID_TOKEN, e)
+        except Exception as e:
+            return _invalid(INTERNAL_ERROR, e)
+        return claims_to_response(decoded)
+
+    def can_verify(self, token: str) -> bool:
+        """Хватает ли локальных ключей, чтобы вынести вердикт по токену."""
+        kid = unverified_kid(token)
+        if kid is None:
+            # Без kid — общий секрет; битый заголовок отклоняется и локально
+            return self._secret is not None or not _has_header(token)
+        return self.keyring is not None and kid in self.keyring
+
+
+def claims_to_response(decoded: dict) -> ValidateTokenResponse:
+    """Успешный ответ валидации из claims проверенного токена."""
+    sub = decoded.get("sub")
+    user_id = str(sub) if sub is not None else None
+    account_id = None
+    try:
+        account_id = int(sub) if sub is not None else None
+    except Exception:
+        account_id = None
+
+    aud = decoded.get("aud")
+    client_id = (
+        aud
+        if isinstance(aud, str)
+        else (aud[0] if isinstance(aud, list) and aud else None)
+    )
+
+    scope_raw = decoded.get("scope") or ""
+    scopes = [s for s in scope_raw.split() if s]
+
+    return ValidateTokenResponse(
+        valid=True,
+        user_id=user_id,
+        account_id=account_id,
+        client_id=client_id,
+        scopes=scopes,
+        iat=decoded.get("iat"),
+        exp=decoded.get("exp"),
+        sid=decoded.get("sid"),
+    )
+
+
+def _invalid(code: str, exc: Exception) -> ValidateTokenResponse:
+    return ValidateTokenResponse(valid=False, error_code=code, error_message=str(exc))
+
+
+def _has_header(token: str) -> bool:
+    try:
+        jwt.get_unverified_header(token)
+    except jwt.PyJWTError:
+        return False
+    return True
@@ -2,9 +2,11 @@
 import asyncio
 import json
 import uuid
+from typing import Any, Dict, List, Optional, Tuple
 
 import aio_pika
 from aio_pika import Message, DeliveryMode, IncomingMessage
+from fastapi.websockets import WebSocketState
 
 
 class RpcClient:
@@ -62,3 +64,149 @@ class RpcClient:
             await self.channel.close()
         if self.connection and not self.connection.is_closed:
             await self.connection.close()
+
+
+class FakeWebSocket:
+    """
+    WebSocket для ClientConnectionManager: копит отправленные JSON-кадры и
+    код закрытия. С gate отправка ждёт, пока тест не откроет "сеть" —
+    так моделируется медленный клиент.
+    """
+
+    def __init__(self, gate: Optional[asyncio.Event] = None):
+        self.client_state = WebSocketState.CONNECTED
+        self.gate = gate
+        self.sent: List[Dict[str, Any]] = []
+        self.closed: Optional[Tuple[int, Optional[str]]] = None
+
+    async def send_text(self, data):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        raise AssertionError("JSON-соединение не должно слать bytes")
+
+    async def close(self, code=1000, reason=None):
+        self.closed = (code, reason)
+        self.client_state = WebSocketState.DISCONNECTED
+
+
+class FakePipeline:
+    """Копит команды и выполняет их в FakeRedis одним execute()."""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.ops: List[Tuple[str, Any, tuple, dict]] = []
+
+    def __getattr__(self, name):
+        # Неподдержанная команда падает сразу, а не молча теряется
+        command = getattr(self.redis, f"_cmd_{name}")
+
+        def _stage(*args, **kwargs):
+            self.ops.append((name, command, args, kwargs))
+            return self
+
+        return _stage
+
+    async def execute(self):
+        ops, self.ops = self.ops, []
+        self.redis.round_trips += 1
+        self.redis.executed.append([name for name, *_ in ops])
+        return [command(*args, **kwargs) for _, command, args, kwargs in ops]
+
+
+class FakeRedis:
+    """
+    Redis в памяти для unit-тестов: строки, хеши, zset и publish.
+    round_trips считает выполненные pipeline, executed — их команды.
+    """
+
+    def __init__(self):
+        self.strings: Dict[str, Any] = {}
+        self.hashes: Dict[str, Dict[str, Any]] = {}
+        self.zsets: Dict[str, Dict[str, float]] = {}
+        self.published: List[Tuple[str, str]] = []
+        self.executed: List[List[str]] = []
+        self.round_trips = 0
+
+    def pipeline(self) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def hgetall(self, key):
+        return self._cmd_hgetall(key)
+
+    def _cmd_set(self, key, value, ex=None):
+        self.strings[key] = value
+        return True
+
+    def _cmd_delete(self, *keys):
+        removed = 0
+        for key in keys:
+            for store in (self.strings, self.hashes, self.zsets):
+                removed += store.pop(key, None) is not None
+        return removed
+
+    def _cmd_expire(self, key, seconds):
+        return any(key in store for store in (self.strings, self.hashes, self.zsets))
+
+    def _cmd_hset(self, key, field, value):
+        fields = self.hashes.setdefault(key, {})
+        added = field not in fields
+        fields[field] = value
+        return int(added)
+
+    def _cmd_hdel(self, key, field):
+        fields = self.hashes.get(key, {})
+        removed = fields.pop(field, None) is not None
+        if not fields:
+            self.hashes.pop(key, None)
+        return int(removed)
+
+    def _cmd_hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def _cmd_zadd(self, key, mapping, gt=False):
+        zset = self.zsets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            if member not in zset:
+                added += 1
+            elif gt and score <= zset[member]:
+                continue
+            zset[member] = score
+        return added
+
+    def _cmd_zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def _cmd_zrangebyscore(self, key, low, high, withscores=False):
+        low, high = float(low), float(high)
+        zset = self.zsets.get(key, {})
+        items = sorted(
+            ((m, s) for m, s in zset.items() if low <= s <= high), key=lambda i: i[1]
+        )
+        return items if withscores else [m for m, _ in items]
+
+    def _cmd_zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        doomed = self._cmd_zrangebyscore(key, low, high)
+        for member in doomed:
+            del zset[member]
+        return len(doomed)
+
+    def _cmd_zremrangebyrank(self, key, start, stop):
+        zset = self.zsets.get(key, {})
+        ordered = sorted(zset, key=zset.get)
+        stop = stop if stop >= 0 else len(ordered) + stop
+        doomed = ordered[start : max(stop + 1, 0)]
+        for member in doomed:
+            del zset[member]
+        return len(doomed)
+
+    def _cmd_publish(self, channel, message):
+        self.published.append((channel, message))
+        return 1
@@ -0,0 +1,49 @@
+# tests/unit/test_admission.py
+from apps.gateway.gateway.admission import (
+    REASON_CAPACITY,
+    REASON_HANDSHAKES,
+    REASON_IP_RATE,
+    AdmissionController,
+)
+
+
+def test_ip_bucket_limits_and_refills():
+    """Всплеск одного IP ограничен burst; токены возвращаются со временем."""
+    admission = AdmissionController(per_ip_rate=2.0, per_ip_burst=3)
+    results = []
+    for _ in range(4):
+        decision = admission.try_admit("10.0.0.1", 0, now=0.0)
+        results.append(decision.admitted)
+        if decision.admitted:
+            admission.release()
+
+    assert results == [True, True, True, False]
+    assert decision.reason == REASON_IP_RATE and decision.retry_after >= 1
+    # Другой IP не страдает от соседа
+    assert admission.try_admit("10.0.0.2", 0, now=0.0).admitted
+    admission.release()
+    # Через полсекунды при 2 conn/s появился один токен
+    assert admission.try_admit("10.0.0.1", 0, now=0.5).admitted
+
+
+def test_handshake_slots_and_connection_budget():
+    """Слоты handshake возвращаются через release; бюджет памяти ограничивает соединения."""
+    admission = AdmissionController(
+        max_handshakes=2,
+        per_ip_rate=0,
+        max_connections=1000,
+        memory_budget_mb=1,
+        conn_memory_kb=128,
+    )
+    assert admission.max_connections == 8  # 1 MiB / 128 KiB < 1000
+
+    assert admission.try_admit("a", 0).admitted
+    assert admission.try_admit("b", 0).admitted
+    busy = admission.try_admit("c", 0)
+    assert not busy.admitted and busy.reason == REASON_HANDSHAKES
+    admission.release()
+    assert admission.try_admit("c", 0).admitted
+
+    full = admission.try_admit("d", 8)
+    assert not full.admitted and full.reason == REASON_CAPACITY
+    assert admission.rejected == 2
@@ -0,0 +1,132 @@
+# tests/unit/test_auth_runner.py
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+
+from apps.auth_svc.rest.health import consumers_check, login_capacity_check
+from apps.auth_svc.runner import ConsumerSupervisor
+from libs.app.bootstrap import service_lifespan
+from libs.containers.auth_container import AuthHttpContainer
+
+
+def _reporting_consumer(index, reports, report_sec):
+    """Консьюмер-заглушка: отчитывается и живёт, пока его не остановят."""
+    while True:
+        reports.put(
+            {
+                "index": index,
+                "pid": os.getpid(),
+                "at": time.time(),
+                "ready": True,
+                "password_hashing": {
+                    "in_flight": 1,
+                    "waiting": 2,
+                    "hash_time": {"count": 3},
+                    # Второй процесс упёрся в пул bcrypt
+                    "overloaded": index == 1,
+                },
+            }
+        )
+        time.sleep(report_sec)
+
+
+def _crashing_consumer(index, reports, report_sec):
+    raise SystemExit(3)
+
+
+def _wait(predicate, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.mark.anyio
+async def test_health_aggregates_child_reports():
+    """Отчёты всех процессов сводятся в одну картину здоровья."""
+    supervisor = ConsumerSupervisor(2, target=_reporting_consumer, report_sec=0.1)
+    supervisor.start()
+    try:
+        assert _wait(lambda: (supervisor.poll(), supervisor.health()["ready"])[1] == 2)
+        health = supervisor.health()
+        assert health["alive"] == 2
+        assert health["password_hashing"] == {
+            "in_flight": 2,
+            "waiting": 4,
+            "hashes": 6,
+            "rejected": 0,
+        }
+        assert health["login_capacity"] == 1
+        assert len({c["pid"] for c in health["children"]}) == 2
+    finally:
+        await supervisor.stop(timeout_sec=5.0)
+    assert supervisor.health()["alive"] == 0
+
+
+@pytest.mark.anyio
+async def test_crashed_child_is_restarted_with_backoff():
+    """Упавший на старте процесс перезапускается, но не чаще, чем позволяет пауза."""
+    supervisor = ConsumerSupervisor(1, target=_crashing_consumer, report_sec=0.1)
+    supervisor.start()
+    try:
+        child = supervisor._children[0]
+        assert _wait(lambda: not child.process.is_alive())
+        now = time.monotonic()
+        supervisor.poll(now)
+        assert child.restarts == 0 and child.backoff_sec == 1.0
+
+        supervisor.poll(now + 1.0)
+        assert child.restarts == 1
+        assert _wait(lambda: not child.process.is_alive())
+        supervisor.poll(now + 1.5)
+        assert child.backoff_sec == 2.0 and child.restarts == 1
+    finally:
+        await supervisor.stop(timeout_sec=5.0)
+
+
+def _app_with_runner(health):
+    return SimpleNamespace(
+        state=SimpleNamespace(runner=SimpleNamespace(health=lambda: health))
+    )
+
+
+@pytest.mark.anyio
+async def test_runner_readiness_follows_consumers():
+    """Супервизор не готов, пока ни один консьюмер не готов слушать очереди."""
+    crash_looping = _app_with_runner({"ready": 0, "login_capacity": 0})
+    assert await consumers_check(crash_looping) == ("consumers", False)
+    assert await login_capacity_check(crash_looping) == ("login_capacity", False)
+
+    serving = _app_with_runner({"ready": 2, "login_capacity": 1})
+    assert await consumers_check(serving) == ("consumers", True)
+    assert await login_capacity_check(serving) == ("login_capacity", True)
+
+    # Без раннера консьюмеры живут в этом же процессе — проверка неприменима
+    assert await consumers_check(SimpleNamespace(state=SimpleNamespace())) is None
+
+
+@pytest.mark.anyio
+async def test_http_only_container_skips_broker():
+    """HTTP-процесс раннера поднимается без шины: ни топологии, ни слушателей."""
+
+    async def declare_topology(bus):
+        raise AssertionError("топология объявляется консьюмерами")
+
+    app = FastAPI()
+
+    async def container_factory():
+        return AuthHttpContainer()
+
+    async with service_lifespan(
+        app,
+        container_factory=container_factory,
+        topology_declarator=declare_topology,
+        listener_factories=[],
+        background_tasks=[],
+    ):
+        assert app.state.container.keyring is None
@@ -0,0 +1,67 @@
+# tests/unit/test_command_router.py
+from types import SimpleNamespace
+
+from apps.gateway.gateway.command_router import CommandRouter
+from apps.gateway.ws.unified_ws import _handle_command
+from libs.app.errors import ErrorCode
+from libs.domain.dto.backend import ActorHint
+from libs.domain.dto.ws import WSCommandFrame
+from libs.messaging.rabbitmq_names import is_valid_queue_name_part
+from libs.utils.consistent_hash import ConsistentHashRing
+
+
+def test_same_entity_same_shard_and_fallbacks():
+    """Команды одной сущности идут в одну очередь; без подсказки — в общую."""
+    router = CommandRouter(["s0", "s1", "s2"])
+    actor = ActorHint(kind="location", entity_id="42")
+
+    key = router.routing_key("world", actor)
+    assert key.startswith("core.world.queue.commands.s") and key.endswith(".v1")
+    assert (
+        router.routing_key("world", ActorHint(kind="location", entity_id="42")) == key
+    )
+    # Явный узел из набора шардов выигрывает у хеширования
+    assert (
+        router.routing_key("world", ActorHint(entity_id="42", node_id="s1"))
+        == "core.world.queue.commands.s1.v1"
+    )
+    assert router.routing_key("world", None) == "core.world.queue.commands.v1"
+    assert router.routing_key("world", ActorHint()) == "core.world.queue.commands.v1"
+    assert CommandRouter().routing_key("world", actor) == "core.world.queue.commands.v1"
+
+
+def test_adding_node_moves_only_its_share():
+    """Новый узел забирает примерно 1/N ключей, остальные остаются на месте."""
+    ring = ConsistentHashRing([f"s{i}" for i in range(4)], vnodes=64)
+    keys = [f"entity:{i}" for i in range(2000)]
+    before = {key: ring.node_for(key) for key in keys}
+
+    ring.add_node("s4")
+    moved = [key for key in keys if ring.node_for(key) != before[key]]
+    assert all(ring.node_for(key) == "s4" for key in moved)
+    assert 0.1 < len(moved) / len(keys) < 0.3
+
+    ring.remove_node("s4")
+    assert {key: ring.node_for(key) for key in keys} == before
+
+
+def test_domain_is_checked_before_routing_without_allow_list():
+    """Без allow-list домен всё равно проверяется: он попадает в routing key."""
+    manager = SimpleNamespace(registry=None)
+    settings = SimpleNamespace(GATEWAY_WS_COMMAND_DOMAINS=[])
+    for domain in ("world.#", "World", "a b", ""):
+        error = _handle_command(
+            WSCommandFrame(domain=domain, command="move"),
+            record=None,
+            account_id=1,
+            conn_id="c1",
+            client_ip=None,
+            user_agent=None,
+            client_conn_manager=manager,
+            command_publisher=None,
+            command_router=CommandRouter(),
+            settings=settings,
+        )
+        assert error is not None
+        assert error.error.code == ErrorCode.WS_UNKNOWN_DOMAIN.value
+    assert is_valid_queue_name_part("world_2")
@@ -0,0 +1,137 @@
+# tests/unit/test_connection_outbox.py
+import asyncio
+
+import msgpack
+import pytest
+
+from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from apps.gateway.gateway.connection_outbox import ConnectionOutbox
+from apps.gateway.gateway.websocket_outbound_dispatcher import (
+    OutboundWebSocketDispatcher,
+)
+from apps.gateway.gateway.ws_codec import MSGPACK_CODEC, EncodedFrame
+from libs.domain.dto.ws import WSEventFrame
+from tests.helpers import FakeWebSocket
+
+
+def _frame(n: int, status: str = "update") -> EncodedFrame:
+    return EncodedFrame(WSEventFrame(event="e", status=status, payload={"n": n}))
+
+
+@pytest.mark.anyio
+async def test_coalescing_replaces_in_place():
+    """Новый кадр с тем же ключом занимает место старого, порядок сохраняется."""
+    outbox = ConnectionOutbox(max_frames=10)
+    outbox.put(_frame(1), key=("pos", "hero"))
+    outbox.put(_frame(2))
+    outbox.put(_frame(3), key=("pos", "hero"))
+    assert len(outbox) == 2 and outbox.coalesced == 1
+
+    first = await outbox.get()
+    # После выборки ключ свободен: следующий кадр встаёт в конец
+    assert not outbox.has_queued(("pos", "hero"))
+    outbox.put(_frame(4), key=("pos", "hero"))
+    rest = [await outbox.get(), await outbox.get()]
+    assert [f.frame.payload["n"] for f in [first, *rest]] == [3, 2, 4]
+
+
+def test_overflow_is_reported():
+    """Переполнение без ключа слияния отклоняется; со слиянием — нет."""
+    outbox = ConnectionOutbox(max_frames=2)
+    assert outbox.put(_frame(1), key="k")
+    assert outbox.put(_frame(2))
+    assert not outbox.put(_frame(3))
+    assert outbox.put(_frame(4), key="k")
+
+
+@pytest.mark.anyio
+async def test_slow_client_gets_latest_state_and_finals():
+    """Медленный клиент получает последний update и все final без потерь."""
+    manager = ClientConnectionManager()
+    ws = FakeWebSocket(gate=asyncio.Event())
+    await manager.connect(ws, "c1", "PLAYER")
+    key = ("pos", "hero")
+    await manager.send_frame("c1", _frame(0), key)
+    await asyncio.sleep(0)  # writer забрал кадр 0 и ждёт сокет
+    for n in range(1, 50):
+        await manager.send_frame("c1", _frame(n), key)
+    await manager.send_frame("c1", _frame(99, status="final"))
+    ws.gate.set()
+    await manager.flush("c1")
+    assert [(m["status"], m["payload"]["n"]) for m in ws.sent] == [
+        ("update", 0),
+        ("update", 49),
+        ("final", 99),
+    ]
+
+
+@pytest.mark.anyio
+async def test_batching_respects_tick_boundary_and_finals():
+    """Пачка закрывается на смене tick и сразу после final; порядок сохраняется."""
+
+    def ev(n, tick, status="update"):
+        return WSEventFrame(event="e", status=status, payload={"n": n}, tick=tick)
+
+    manager = ClientConnectionManager(batch_window_ms=20)
+    ws = FakeWebSocket()
+    await manager.connect(ws, "c1", "PLAYER", batch=True)
+    for frame in (ev(1, 1), ev(2, 1), ev(3, 2), ev(4, 2, "final"), ev(5, 2)):
+        await manager.send_frame("c1", frame)
+    await manager.flush("c1")
+    shapes = [
+        [f["payload"]["n"] for f in m["frames"]]
+        if m["type"] == "batch"
+        else m["payload"]["n"]
+        for m in ws.sent
+    ]
+    assert shapes == [[1, 2], [3, 4], 5]
+
+
+def test_msgpack_batch_reuses_encoded_frames():
+    """msgpack-пачка собирается из уже закодированных кадров и читается как один map."""
+    frames = [_frame(1), _frame(2)]
+    data = msgpack.unpackb(MSGPACK_CODEC.encode_batch(frames))
+    assert data["t"] == "batch"
+    assert [f["p"]["n"] for f in data["fr"]] == [1, 2]
+
+
+@pytest.mark.anyio
+async def test_dispatcher_coalesces_per_entity():
+    """Слияние — по event + entity_key: обновления разных сущностей не теряются."""
+    manager = ClientConnectionManager()
+    ws = FakeWebSocket(gate=asyncio.Event())
+    await manager.connect(ws, "c1", "PLAYER")
+    dispatcher = OutboundWebSocketDispatcher(
+        client_connection_manager=manager, name="t", queue_name="q", message_bus=None
+    )
+
+    async def update(n, entity_key=None):
+        await dispatcher.process_message(
+            {
+                "event": "pos",
+                "status": "update",
+                "payload": {"n": n},
+                "recipient": {"connection_id": "c1"},
+                "entity_key": entity_key,
+                "coalesce": True,
+            },
+            {},
+        )
+
+    await update(0, "hero")
+    await asyncio.sleep(0)  # writer забрал кадр 0 и ждёт сокет
+    await update(1, "hero")
+    await update(2, "orc")
+    await update(3, "hero")
+    # Без entity_key сущности не различить — не сливаем
+    await update(4)
+    await update(5)
+    ws.gate.set()
+    await manager.flush("c1")
+    assert [(m["key"], m["payload"]["n"]) for m in ws.sent] == [
+        ("hero", 0),
+        ("hero", 3),
+        ("orc", 2),
+        (None, 4),
+        (None, 5),
+    ]
@@ -0,0 +1,47 @@
+# tests/unit/test_delta_state.py
+from apps.gateway.gateway.delta_state import DeltaStateCache, json_diff
+
+
+def test_json_diff_nested_changes():
+    """Проверяет add/remove/replace и экранирование ключей в пути."""
+    old = {"hp": 10, "pos": {"x": 1, "y": 2}, "buffs": ["a"], "gone": True}
+    new = {"hp": 9, "pos": {"x": 1, "y": 3}, "buffs": ["a", "b"], "a/b": 1}
+
+    patch = json_diff(old, new)
+
+    assert {"op": "replace", "path": "/hp", "value": 9} in patch
+    assert {"op": "replace", "path": "/pos/y", "value": 3} in patch
+    assert {"op": "replace", "path": "/buffs", "value": ["a", "b"]} in patch
+    assert {"op": "remove", "path": "/gone"} in patch
+    assert {"op": "add", "path": "/a~1b", "value": 1} in patch
+    assert len(patch) == 5
+    assert json_diff(new, dict(new)) == []
+
+
+def test_base_requires_consecutive_version():
+    """Дельта только к предыдущей версии; откат или разрыв — полный снимок."""
+    cache = DeltaStateCache(max_entries=10, max_version_gap=1)
+    assert cache.base_for("c1", "hero:1", 1) is None
+
+    cache.remember("c1", "hero:1", 1, {"hp": 10})
+    assert cache.base_for("c1", "hero:1", 2).payload == {"hp": 10}
+    assert cache.base_for("c1", "hero:1", 1) is None  # та же/старая версия
+    assert cache.base_for("c1", "hero:1", 3) is None  # разрыв
+    assert cache.base_for("c2", "hero:1", 2) is None  # другое соединение
+
+
+def test_lru_eviction_and_drop_client():
+    """Кэш ограничен по размеру и очищается при отключении соединения."""
+    cache = DeltaStateCache(max_entries=2)
+    cache.remember("c1", "a", 1, {})
+    cache.remember("c1", "b", 1, {})
+    cache.remember("c1", "a", 2, {})  # "a" становится самым свежим
+    cache.remember("c2", "a", 1, {})
+
+    assert len(cache) == 2
+    assert cache.base_for("c1", "b", 2) is None
+    assert cache.base_for("c1", "a", 3) is not None
+
+    cache.drop_client("c1")
+    assert len(cache) == 1
+    assert cache.base_for("c2", "a", 2) is not None
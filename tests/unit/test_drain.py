@@ -0,0 +1,88 @@
+# tests/unit/test_drain.py
+import pytest
+from fastapi import FastAPI
+
+from apps.gateway.gateway.admission import REASON_DRAINING, AdmissionController
+from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from apps.gateway.gateway.drain import DrainController
+from libs.app.bootstrap import service_lifespan
+from libs.domain.dto.ws import WSEventFrame
+from tests.helpers import FakeWebSocket
+
+
+@pytest.mark.anyio
+async def test_drain_flushes_and_closes_with_reconnect_hint():
+    """Очередь дописывается, затем close 1012 с задержкой в заданном диапазоне."""
+    manager = ClientConnectionManager()
+    admission = AdmissionController(per_ip_rate=0)
+    drain = DrainController(
+        manager,
+        admission,
+        window_sec=0.02,
+        waves=2,
+        reconnect_min_sec=1.0,
+        reconnect_max_sec=2.0,
+    )
+    sockets = [FakeWebSocket() for _ in range(4)]
+    for i, ws in enumerate(sockets):
+        await manager.connect(ws, f"c{i}", "PLAYER")
+    await manager.send_frame("c0", WSEventFrame(event="last", status="final"))
+
+    drain.start()
+    assert admission.try_admit("ip", 0).reason == REASON_DRAINING
+    await drain.wait()
+
+    assert manager.active_connections == {}
+    assert [m["event"] for m in sockets[0].sent] == ["last"]
+    for ws in sockets:
+        code, reason = ws.closed
+        assert code == 1012
+        delay_ms = int(reason.rsplit("=", 1)[1])
+        assert 1000 <= delay_ms <= 2000
+
+
+@pytest.mark.anyio
+async def test_shutdown_hooks_run_before_listeners_stop():
+    """Хуки остановки сервиса отрабатывают, пока слушатели и шина ещё живы."""
+    events = []
+
+    class _Listener:
+        name = "fake"
+
+        async def start(self):
+            events.append("listener.start")
+
+        async def stop(self):
+            events.append("listener.stop")
+
+    class _Container:
+        bus = None
+
+        async def shutdown(self):
+            events.append("container.shutdown")
+
+    async def container_factory():
+        return _Container()
+
+    async def listener_factory(bus, container):
+        return _Listener()
+
+    async def hook(settings, container):
+        events.append("hook")
+
+    app = FastAPI()
+    async with service_lifespan(
+        app,
+        container_factory=container_factory,
+        topology_declarator=None,
+        listener_factories=[listener_factory],
+        background_tasks=[],
+        shutdown_hooks=[hook],
+    ):
+        pass
+    assert events == [
+        "listener.start",
+        "hook",
+        "listener.stop",
+        "container.shutdown",
+    ]
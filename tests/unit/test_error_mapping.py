@@ -11,6 +11,8 @@ from libs.app.errors import ErrorCode, get_http_status
         (ErrorCode.AUTH_INVALID_CREDENTIALS, status.HTTP_401_UNAUTHORIZED),
         (ErrorCode.AUTH_USER_EXISTS, status.HTTP_409_CONFLICT),
         (ErrorCode.AUTH_FORBIDDEN, status.HTTP_403_FORBIDDEN),
+        (ErrorCode.AUTH_OVERLOADED, status.HTTP_503_SERVICE_UNAVAILABLE),
+        (ErrorCode.AUTH_RATE_LIMITED, status.HTTP_429_TOO_MANY_REQUESTS),
         (ErrorCode.RPC_TIMEOUT, status.HTTP_504_GATEWAY_TIMEOUT),
         (ErrorCode.RPC_BAD_RESPONSE, status.HTTP_502_BAD_GATEWAY),
         (ErrorCode.INTERNAL_ERROR, status.HTTP_500_INTERNAL_SERVER_ERROR),
@@ -0,0 +1,44 @@
+# tests/unit/test_inbound_rate_limit.py
+from apps.gateway.gateway.inbound_rate_limit import (
+    BucketSpec,
+    FrameClass,
+    InboundRateLimiter,
+    Verdict,
+)
+
+
+def _limiter(**kwargs) -> InboundRateLimiter:
+    return InboundRateLimiter(
+        commands=BucketSpec(rate=10.0, burst=2),
+        pings=BucketSpec(rate=1.0, burst=1),
+        subscriptions=BucketSpec(rate=1.0, burst=1),
+        **kwargs,
+    )
+
+
+def test_budgets_are_separate_and_refill():
+    """Флуд пингами не съедает бюджет команд; токены возвращаются со временем."""
+    limiter = _limiter()
+    state = limiter.new_state(0.0)
+
+    assert limiter.check(state, FrameClass.PING, "PLAYER", 0.0) is Verdict.ALLOW
+    assert limiter.check(state, FrameClass.PING, "PLAYER", 0.0) is Verdict.THROTTLE
+    assert limiter.check(state, FrameClass.COMMAND, "PLAYER", 0.0) is Verdict.ALLOW
+    assert limiter.check(state, FrameClass.COMMAND, "PLAYER", 0.0) is Verdict.ALLOW
+    assert limiter.check(state, FrameClass.COMMAND, "PLAYER", 0.0) is Verdict.THROTTLE
+    assert limiter.retry_after_ms(state, FrameClass.COMMAND) <= 101
+    # 0.1 с при 10 команд/с — ровно один токен
+    assert limiter.check(state, FrameClass.COMMAND, "PLAYER", 0.1) is Verdict.ALLOW
+    assert limiter.throttled == {"PLAYER.ping": 1, "PLAYER.command": 1}
+
+
+def test_sustained_flood_escalates_to_close():
+    """Непрерывное превышение копит штрафы и заканчивается закрытием."""
+    limiter = _limiter(strike_limit=3, strike_decay_sec=10.0)
+    state = limiter.new_state(0.0)
+    limiter.check(state, FrameClass.SUBSCRIPTION, "BOT", 0.0)
+
+    verdicts = [
+        limiter.check(state, FrameClass.SUBSCRIPTION, "BOT", 0.0) for _ in range(3)
+    ]
+    assert verdicts == [Verdict.THROTTLE, Verdict.THROTTLE, Verdict.CLOSE]
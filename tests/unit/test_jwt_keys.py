@@ -0,0 +1,101 @@
+# tests/unit/test_jwt_keys.py
+from datetime import timedelta
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from apps.auth_svc.utils.jwt_manager import JwtManager
+from apps.gateway.gateway.token_verifier import TokenVerifier
+from libs.utils.jwt_keys import KeyRing
+from libs.utils.token_validation import TokenValidator
+
+
+def _write_key(directory, kid, private_key):
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    (directory / f"{kid}.pem").write_bytes(pem)
+
+
+def _keyring(tmp_path):
+    _write_key(tmp_path, "2026-09", ec.generate_private_key(ec.SECP256R1()))
+    _write_key(tmp_path, "2026-10", ed25519.Ed25519PrivateKey.generate())
+    return KeyRing.from_pem_dir(str(tmp_path))
+
+
+class _FakeJwks:
+    def __init__(self, keyring, published):
+        self.keyring = keyring
+        self.published = published
+        self.refreshes = 0
+
+    async def ensure_kid(self, kid):
+        self.refreshes += 1
+        self.keyring.replace(KeyRing.keys_from_jwks(self.published))
+        return kid in self.keyring
+
+
+def test_tokens_verify_with_public_jwks_only(tmp_path):
+    ring = _keyring(tmp_path)
+    assert ring.active_kid == "2026-10" and ring.active.algorithm == "EdDSA"
+    manager = JwtManager(secret="unused", audience="game-clients", keyring=ring)
+    token = manager.create_access_token(42, "bob", timedelta(minutes=5))
+    assert jwt.get_unverified_header(token)["kid"] == "2026-10"
+    refresh, _ = manager.create_refresh_token(42, timedelta(days=1))
+    assert manager.decode_token(refresh)["sub"] == "42"
+
+    published = ring.to_jwks()
+    assert [k["alg"] for k in published["keys"]] == ["ES256", "EdDSA"]
+    assert all("d" not in k for k in published["keys"])  # Только публичная часть
+
+    # Верификатор без секрета: только ключи из JWKS
+    verifier_ring = KeyRing(KeyRing.keys_from_jwks(published))
+    validator = TokenValidator(audience="game-clients", keyring=verifier_ring)
+    assert validator.validate(token).account_id == 42
+
+    # Подделка HS256 с kid асимметричного ключа не проходит
+    forged = jwt.encode(
+        {"sub": "1", "iat": 0, "exp": 2**31, "aud": "game-clients"},
+        "attacker-chosen-secret-of-sufficient-length",
+        algorithm="HS256",
+        headers={"kid": "2026-10"},
+    )
+    assert validator.validate(forged).error_code == "auth.INVALID_TOKEN"
+
+
+@pytest.mark.anyio
+async def test_unknown_kid_refreshes_jwks_before_rpc(tmp_path):
+    ring = _keyring(tmp_path)
+    manager = JwtManager(secret="unused", audience="game-clients", keyring=ring)
+    token = manager.create_access_token(7, "eve", timedelta(minutes=5))
+
+    class _Bus:
+        calls = 0
+
+        async def call_rpc(self, *args, **kwargs):
+            self.calls += 1
+            return None
+
+    jwks = _FakeJwks(KeyRing(), ring.to_jwks())
+    bus = _Bus()
+    verifier = TokenVerifier(
+        bus,
+        local=TokenValidator(audience="game-clients", keyring=jwks.keyring),
+        jwks=jwks,
+    )
+    assert (await verifier.verify(token)).account_id == 7
+    assert jwks.refreshes == 1 and bus.calls == 0
+
+    jwks.published = {"keys": []}
+    unknown = jwt.encode(
+        {"sub": "1"},
+        "attacker-chosen-secret-of-sufficient-length",
+        algorithm="HS256",
+        headers={"kid": "rotated"},
+    )
+    await verifier.verify(unknown)
+    assert bus.calls == 1  # Ключа нет и в свежем JWKS — решает auth_svc
@@ -0,0 +1,56 @@
+# tests/unit/test_login_throttle.py
+import pytest
+
+from apps.auth_svc.utils.login_throttle import (
+    REASON_IP,
+    REASON_SUBNET,
+    LoginThrottle,
+    subnet_of,
+)
+from tests.helpers import FakeRedis
+
+
+def test_subnet_of():
+    assert subnet_of("203.0.113.77") == "203.0.113.0/24"
+    assert subnet_of("2001:db8::1") == "2001:db8::/64"
+    assert subnet_of("unknown") is None
+
+
+@pytest.mark.anyio
+async def test_ip_and_subnet_windows_in_one_round_trip():
+    """Лимиты IP и подсети проверяются одним pipeline и отпускают по окну."""
+    redis = FakeRedis()
+    throttle = LoginThrottle(
+        redis, window_sec=60, ip_limit=3, subnet_limit=5, global_fail_limit=0
+    )
+    decisions = [await throttle.check("10.0.0.1", now=100.0 + i) for i in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert decisions[-1].reason == REASON_IP
+    assert redis.round_trips == 4
+
+    # Соседний адрес той же /24 упирается в лимит подсети
+    other = [await throttle.check("10.0.0.2", now=110.0 + i) for i in range(2)]
+    assert not other[-1].allowed and other[-1].reason == REASON_SUBNET
+
+    # Окно уехало — снова пускаем
+    assert (await throttle.check("10.0.0.1", now=200.0)).allowed
+
+
+@pytest.mark.anyio
+async def test_global_failures_tighten_limits():
+    """Поток неудач по сервису ужесточает лимиты на IP (распределённый подбор)."""
+    redis = FakeRedis()
+    throttle = LoginThrottle(
+        redis,
+        window_sec=60,
+        ip_limit=8,
+        subnet_limit=0,
+        global_fail_limit=5,
+        attack_factor=0.25,
+    )
+    for i in range(5):
+        await throttle.record_failure(now=100.0 + i * 0.01)
+
+    decisions = [await throttle.check("192.0.2.9", now=101.0 + i) for i in range(3)]
+    assert all(d.under_attack for d in decisions)
+    assert [d.allowed for d in decisions] == [True, True, False]
@@ -0,0 +1,76 @@
+# tests/unit/test_node_routing.py
+import pytest
+
+from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from apps.gateway.gateway.websocket_outbound_dispatcher import (
+    FORWARDED_HEADER,
+    OutboundWebSocketDispatcher,
+)
+from libs.messaging.rabbitmq_names import Exchanges
+from tests.helpers import FakeWebSocket
+
+
+class _FakeRegistry:
+    node_id = "gw-1"
+
+    def __init__(self, conn_nodes, account_nodes):
+        self.conn_nodes = conn_nodes
+        self.account_nodes = account_nodes
+
+    def track(self, conn_id, account_id):
+        pass
+
+    def forget(self, conn_id, account_id):
+        pass
+
+    async def node_of(self, conn_id):
+        return self.conn_nodes.get(conn_id)
+
+    async def nodes_of_account(self, account_id):
+        return self.account_nodes.get(account_id, [])
+
+
+class _FakeBus:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, exchange_name, routing_key, message, **kwargs):
+        self.published.append((exchange_name, routing_key, kwargs["headers"]))
+
+
+def _envelope(**recipient):
+    return {"event": "e", "status": "ok", "payload": {}, "recipient": recipient}
+
+
+@pytest.mark.anyio
+async def test_outbound_is_forwarded_to_owner_nodes():
+    """Чужое соединение — пересылка владельцу; аккаунт — локально и соседям."""
+    registry = _FakeRegistry(
+        conn_nodes={"c9": "gw-2"}, account_nodes={7: ["gw-1", "gw-3"]}
+    )
+    manager = ClientConnectionManager(registry=registry)
+    ws = FakeWebSocket()
+    await manager.connect(ws, "c1", "PLAYER", account_id=7)
+    bus = _FakeBus()
+    dispatcher = OutboundWebSocketDispatcher(
+        client_connection_manager=manager,
+        registry=registry,
+        name="t",
+        queue_name="q",
+        message_bus=bus,
+    )
+
+    await dispatcher.process_message(_envelope(connection_id="c9"), {})
+    await dispatcher.process_message(_envelope(account_id=7), {})
+    # Пересланное соседом дальше не уходит, даже если адресата уже нет
+    await dispatcher.process_message(
+        _envelope(connection_id="c9"), {"headers": {FORWARDED_HEADER: "gw-2"}}
+    )
+    await manager.flush("c1")
+
+    header = {FORWARDED_HEADER: "gw-1"}
+    assert bus.published == [
+        (Exchanges.GATEWAY_OUTBOUND, "gw-2", header),
+        (Exchanges.GATEWAY_OUTBOUND, "gw-3", header),
+    ]
+    assert [m["event"] for m in ws.sent] == ["e"]
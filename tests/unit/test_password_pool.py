@@ -0,0 +1,200 @@
+# tests/unit/test_password_pool.py
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from apps.auth_svc.handlers.auth_issue_token_rpc_handler import (
+    AuthIssueTokenRpcHandler,
+)
+from apps.auth_svc.listeners import create_issue_token_listener_factory
+from apps.auth_svc.services.auth_service import AuthService
+from apps.auth_svc.utils.password_manager import (
+    PasswordHasherOverloaded,
+    PasswordManager,
+)
+from libs.app.errors import ErrorCode
+
+
+@pytest.mark.anyio
+async def test_hash_and_verify_off_the_event_loop():
+    """Хеш считается в пуле: event loop в это время продолжает работать."""
+    manager = PasswordManager(10, workers=2)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.001)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    hashed = await manager.hash("secret")
+    task.cancel()
+
+    assert ticks > 5
+    assert await manager.verify("secret", hashed)
+    assert not await manager.verify("wrong", hashed)
+    stats = manager.stats()
+    assert stats["hash_time"]["count"] == 3
+    assert stats["in_flight"] == 0
+    manager.shutdown()
+
+
+@pytest.mark.anyio
+async def test_pending_hashes_are_bounded():
+    """Сверх числа потоков вызовы ждут слот, а не копятся в очереди пула."""
+    manager = PasswordManager(8, workers=1, max_pending=2)
+    first = asyncio.create_task(manager.hash("a"))
+    second = asyncio.create_task(manager.hash("b"))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert manager.in_flight == 1
+    assert manager.waiting == 1
+    await asyncio.gather(first, second)
+    assert manager.stats()["queue_time"]["count"] == 2
+    manager.shutdown()
+
+
+@pytest.mark.anyio
+async def test_overload_is_rejected_before_hashing():
+    """Полная очередь — отказ с retry_after без единого хеша."""
+    manager = PasswordManager(8, workers=1, max_pending=2)
+    accepted = [asyncio.create_task(manager.hash(str(n))) for n in range(2)]
+    await asyncio.sleep(0)
+    assert manager.overloaded
+
+    try:
+        await manager.hash("extra")
+    except PasswordHasherOverloaded as e:
+        assert e.retry_after >= 1
+    else:
+        raise AssertionError("ожидали PasswordHasherOverloaded")
+    assert manager.rejected == 1
+
+    await asyncio.gather(*accepted)
+    assert not manager.overloaded
+    assert manager.hash_time.count == 2
+    manager.shutdown()
+
+
+def test_calibration_sizes_queue_by_wait_budget():
+    """Бюджет очереди — сколько "волн" пула укладывается в max_wait_ms."""
+    manager = PasswordManager(4, workers=2, max_wait_ms=1000)
+    manager.calibrate(samples=1)
+    manager.hash_latency = 0.25
+    manager._apply_budget()
+    assert (manager.max_pending, manager.queue_budget) == (10, 8)
+
+    # Явный max_pending важнее калибровки
+    manager = PasswordManager(4, workers=2, max_pending=3)
+    manager.calibrate(samples=1)
+    assert (manager.max_pending, manager.queue_budget) == (3, 1)
+
+
+class _Message:
+    """Входящее сообщение RabbitMQ: ack освобождает слот prefetch."""
+
+    def __init__(self, broker, n):
+        self.broker = broker
+        self.body = json.dumps({"username": "alice", "password": "wrong"}).encode()
+        self.headers = {}
+        self.correlation_id = f"c{n}"
+
+    def info(self):
+        return {"reply_to": "replies", "correlation_id": self.correlation_id}
+
+    async def ack(self):
+        self.broker.unacked -= 1
+        self.broker.slot_freed.set()
+
+    nack = ack
+
+
+class _Broker:
+    """Отдаёт консьюмеру не больше prefetch неподтверждённых сообщений, как RabbitMQ."""
+
+    def __init__(self):
+        self.prefetch = 0
+        self.unacked = 0
+        self.replies = []
+        self.slot_freed = asyncio.Event()
+
+    async def consume(self, queue_name, callback, prefetch):
+        self.callback, self.prefetch = callback, prefetch
+
+    async def publish_rpc_response(self, reply_to, response, correlation_id):
+        self.replies.append(response)
+
+    async def deliver(self, count):
+        tasks = []
+        for n in range(count):
+            while self.unacked >= self.prefetch:
+                self.slot_freed.clear()
+                await self.slot_freed.wait()
+            self.unacked += 1
+            tasks.append(asyncio.create_task(self.callback(_Message(self, n))))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+
+class _Redis:
+    redis = None
+
+    def register_script(self, script):
+        return script
+
+    async def exists(self, key):
+        return False
+
+
+class _Session:
+    def __init__(self, account):
+        self.account = account
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        return SimpleNamespace(scalar_one_or_none=lambda: self.account)
+
+
+@pytest.mark.anyio
+async def test_issue_token_listener_rejects_logins_past_capacity():
+    """prefetch выше ёмкости пула: лишние логины получают auth.overloaded, а не ждут в брокере."""
+    manager = PasswordManager(4, workers=1, max_pending=2)
+    account = SimpleNamespace(
+        credentials=SimpleNamespace(password_hash=manager.hash_password("secret"))
+    )
+    service = AuthService(
+        session_factory=lambda: _Session(account),
+        jwt_manager=None,
+        password_manager=manager,
+        redis=_Redis(),
+        settings=SimpleNamespace(AUTH_ACCESS_TTL=60, AUTH_REFRESH_TTL=60),
+    )
+    container = SimpleNamespace(
+        password_manager=manager,
+        issue_token_handler=AuthIssueTokenRpcHandler(service),
+    )
+    broker = _Broker()
+    listener = await create_issue_token_listener_factory()(broker, container)
+    await listener.start()
+    assert broker.prefetch > manager.max_pending
+
+    await broker.deliver(12)
+
+    codes = [reply["error_code"] for reply in broker.replies]
+    assert len(codes) == 12
+    assert codes.count(ErrorCode.AUTH_OVERLOADED) > 0
+    assert codes.count(ErrorCode.AUTH_INVALID_CREDENTIALS) >= manager.max_pending
+    overloaded = [
+        r for r in broker.replies if r["error_code"] == ErrorCode.AUTH_OVERLOADED
+    ]
+    assert all(r["retry_after"] >= 1 for r in overloaded)
+    manager.shutdown()
@@ -0,0 +1,71 @@
+# tests/unit/test_presence.py
+import pytest
+
+from apps.gateway.gateway.node_registry import NodeRegistry
+from libs.infra.presence import PresenceReader, encode_presence, live_nodes
+from libs.utils.redis_keys import key_ws_conn_node, key_ws_online_user
+from tests.helpers import FakeRedis
+
+
+def test_live_nodes_skips_expired_and_malformed_fields():
+    fields = {
+        "gw-1": encode_presence(2, 200),
+        "gw-2": encode_presence(1, 50),
+        "gw-3": "garbage",
+    }
+    assert live_nodes(fields, now=100) == {"gw-1": 2}
+
+
+@pytest.mark.anyio
+async def test_registry_batches_changes_and_heartbeat_into_one_round_trip():
+    redis = FakeRedis()
+    registry = NodeRegistry(redis, "gw-1", ttl_sec=30, heartbeat_sec=10)
+    registry.track("c1", 7)
+    registry.track("c2", 7)
+    registry.track("c3", 8)
+    registry.track("c3", 8)  # Повторный track не удваивает счётчик
+    await registry.flush()
+    assert redis.round_trips == 1
+    assert await registry.nodes_of_account(7) == ["gw-1"]
+    assert redis.hashes[key_ws_online_user(7)]["gw-1"].startswith("2:")
+
+    registry.forget("c3", 8)
+    await registry.flush()
+    assert key_ws_online_user(8) not in redis.hashes
+
+    await registry.heartbeat()
+    ops = redis.executed[-1]
+    assert ops.count("expire") == 3  # 2 соединения + 1 аккаунт
+    assert ops.count("hset") == 1
+    assert redis.round_trips == 3
+
+    online = await PresenceReader(redis).which_online([7, 8, 9, 7])
+    assert online == {7}
+    assert redis.round_trips == 4
+
+
+@pytest.mark.anyio
+async def test_failed_flush_is_retried_by_heartbeat():
+    """Ошибка Redis не теряет запись соединения: heartbeat дописывает её через SET."""
+    redis = FakeRedis()
+    registry = NodeRegistry(redis, "gw-1", ttl_sec=30, heartbeat_sec=10)
+    healthy = redis.pipeline
+
+    def broken_pipeline():
+        pipe = healthy()
+
+        async def execute():
+            raise ConnectionError("redis down")
+
+        pipe.execute = execute
+        return pipe
+
+    redis.pipeline = broken_pipeline
+    registry.track("c1", 7)
+    await registry.flush()
+    assert key_ws_conn_node("c1") not in redis.strings
+
+    redis.pipeline = healthy
+    await registry.heartbeat()
+    assert redis.strings[key_ws_conn_node("c1")] == "gw-1"
+    assert await registry.nodes_of_account(7) == ["gw-1"]
@@ -0,0 +1,113 @@
+# tests/unit/test_redis_scripts.py
+import pytest
+from redis.exceptions import NoScriptError
+
+from apps.auth_svc.utils.login_attempts import RECORD_FAILURE_SCRIPT, LoginAttempts
+from libs.infra import central_redis_client
+from libs.infra.central_redis_client import CentralRedisClient, RedisScript
+
+
+class _FakeRedis:
+    """Кэш скриптов как в Redis: EVALSHA знает только загруженные sha."""
+
+    def __init__(self, run):
+        self.run = run
+        self.cache = set()
+        self.calls = []
+
+    async def script_load(self, source):
+        script = RedisScript(name="tmp", source=source)
+        self.cache.add(script.sha)
+        return script.sha
+
+    async def evalsha(self, sha, numkeys, *keys_and_args):
+        self.calls.append("evalsha")
+        if sha not in self.cache:
+            raise NoScriptError("NOSCRIPT No matching script.")
+        return self.run(list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:]))
+
+    async def eval(self, source, numkeys, *keys_and_args):
+        self.calls.append("eval")
+        await self.script_load(source)
+        return self.run(list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:]))
+
+    async def delete(self, *keys):
+        return 0
+
+
+def _client(run):
+    client = CentralRedisClient(redis_url="redis://unused")
+    client.redis = _FakeRedis(run)
+    return client
+
+
+@pytest.mark.anyio
+async def test_evalsha_falls_back_to_eval_once():
+    """NOSCRIPT (рестарт, SCRIPT FLUSH) — один EVAL, дальше снова EVALSHA."""
+    client = _client(lambda keys, args: [keys, args])
+    script = client.register_script(RedisScript(name="echo", source="return 1"))
+
+    assert await client.run_script(script, keys=["k"], args=[1]) == [["k"], [1]]
+    await client.run_script(script, keys=["k"])
+    assert client.redis.calls == ["evalsha", "eval", "evalsha"]
+
+    client.redis.cache.clear()
+    await client.run_script(script)
+    assert client.redis.calls[-2:] == ["evalsha", "eval"]
+
+    # Зарегистрированные скрипты грузятся при подключении
+    client.redis.cache.clear()
+    await client._load_scripts()
+    assert script.sha in client.redis.cache
+
+
+@pytest.mark.anyio
+async def test_login_failures_counted_and_banned_in_one_call():
+    """Каждая неудача — один вызов скрипта; на лимите ставится бан."""
+    store = {}
+
+    def emulate(keys, args):
+        # Та же логика, что в RECORD_FAILURE_SCRIPT
+        attempts_key, ban_key = keys
+        if ban_key in store:
+            return [0, 1]
+        store[attempts_key] = store.get(attempts_key, 0) + 1
+        if store[attempts_key] >= args[0]:
+            store[ban_key] = "1"
+            return [store.pop(attempts_key), 1]
+        return [store[attempts_key], 0]
+
+    client = _client(emulate)
+    attempts = LoginAttempts(client, max_attempts=3, window_sec=300, ban_sec=900)
+    assert RECORD_FAILURE_SCRIPT.name in client._scripts
+
+    results = [await attempts.record_failure("alice") for _ in range(4)]
+    assert [(r.attempts, r.banned) for r in results] == [
+        (1, False),
+        (2, False),
+        (3, True),
+        (0, True),
+    ]
+    assert client.redis.calls.count("eval") == 1
+    assert len(client.redis.calls) == 5
+
+
+@pytest.mark.anyio
+async def test_scripts_registered_before_connect_are_preloaded(monkeypatch):
+    """Скрипт из реестра загружается при connect(): первый вызов — сразу EVALSHA."""
+    fake = _FakeRedis(lambda keys, args: [1, 0])
+
+    async def ping():
+        return True
+
+    fake.ping = ping
+    monkeypatch.setattr(
+        central_redis_client.redis_asyncio, "from_url", lambda *a, **kw: fake
+    )
+    client = CentralRedisClient(redis_url="redis://unused")
+    attempts = LoginAttempts(client, max_attempts=3, window_sec=300, ban_sec=900)
+
+    await client.connect()
+    assert RECORD_FAILURE_SCRIPT.sha in fake.cache
+    await attempts.record_failure("alice")
+    assert fake.calls == ["evalsha"]
@@ -0,0 +1,119 @@
+# tests/unit/test_revocation.py
+import json
+
+import pytest
+
+from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from apps.gateway.gateway.revocation_subscriber import RevocationSubscriber
+from apps.gateway.gateway.session_resume import SessionRegistry
+from apps.gateway.gateway.token_cache import TokenValidationCache
+from apps.gateway.gateway.token_verifier import TokenVerifier
+from libs.domain.dto.auth import ValidateTokenResponse
+from libs.infra.revocation import RevocationList, RevocationPublisher
+from libs.utils.redis_keys import (
+    key_auth_revocations_channel,
+    key_auth_revoked_accounts,
+    key_auth_revoked_sessions,
+)
+from tests.helpers import FakeRedis, FakeWebSocket
+
+
+def test_denylist_sessions_and_account_watermark():
+    denylist = RevocationList(access_ttl_sec=600)
+    denylist.revoke_session("s1", exp=2000)
+    denylist.revoke_account(7, nbf=1500)
+
+    assert denylist.is_revoked("s1", 1, iat=1900)
+    assert not denylist.is_revoked("s2", 1, iat=1900)
+    assert denylist.is_revoked("s2", 7, iat=1499)  # Выдан до водяного знака
+    assert not denylist.is_revoked("s2", 7, iat=1500)
+
+    denylist.prune(now=2001)
+    assert not denylist.is_revoked("s1", 1, iat=1900)
+    denylist.prune(now=2101)
+    assert len(denylist) == 0
+
+
+@pytest.mark.anyio
+async def test_published_revocations_reach_gateway_in_bulk_and_live():
+    redis = FakeRedis()
+    publisher = RevocationPublisher(redis, access_ttl_sec=1800)
+    await publisher.revoke_session("s1", 5, exp=4_000_000_000)
+    await publisher.revoke_account(9)
+    assert [ch for ch, _ in redis.published] == [key_auth_revocations_channel()] * 2
+    assert "s1" in redis.zsets[key_auth_revoked_sessions()]
+    assert "9" in redis.zsets[key_auth_revoked_accounts()]
+
+    # Новый узел: загрузка списка целиком
+    denylist = RevocationList(access_ttl_sec=1800)
+    await denylist.load(redis)
+    assert denylist.is_revoked("s1", 5, iat=0)
+    assert denylist.is_revoked(None, 9, iat=1)
+
+    # Живой узел: событие из канала + чистка кэша валидации
+    live = RevocationList(access_ttl_sec=1800)
+    cache = TokenValidationCache()
+    ok = ValidateTokenResponse(valid=True, account_id=5, sid="s1", exp=4_000_000_000)
+    cache.put("tok", ok)
+    subscriber = RevocationSubscriber(redis, live, cache)
+    subscriber.handle(redis.published[0][1])
+    assert live.is_revoked("s1", 5, iat=0)
+    assert cache.get("tok") is None
+
+
+@pytest.mark.anyio
+async def test_verifier_rejects_revoked_token_even_from_cache():
+    class _Bus:
+        async def call_rpc(self, *args, **kwargs):
+            return {
+                "valid": True,
+                "account_id": 5,
+                "sid": "s1",
+                "iat": 100,
+                "exp": 4_000_000_000,
+            }
+
+    denylist = RevocationList()
+    verifier = TokenVerifier(_Bus(), cache=TokenValidationCache(), denylist=denylist)
+    assert (await verifier.verify("tok")).valid
+    denylist.revoke_session("s1", exp=4_000_000_000)
+    result = await verifier.verify("tok")
+    assert not result.valid and result.error_code == "auth.TOKEN_REVOKED"
+
+
+@pytest.mark.anyio
+async def test_revocation_closes_open_connections():
+    """Отзыв закрывает уже открытые соединения с этим токеном и их сессии."""
+    sessions = SessionRegistry()
+    manager = ClientConnectionManager(sessions=sessions)
+    denylist = RevocationList()
+    subscriber = RevocationSubscriber(FakeRedis(), denylist, connections=manager)
+    sockets = {}
+    for conn_id, sid, iat in [("c1", "s1", 100), ("c2", "s2", 100), ("c3", "s1", 100)]:
+        sockets[conn_id] = FakeWebSocket()
+        await manager.connect(
+            sockets[conn_id],
+            conn_id,
+            "PLAYER",
+            account_id=5,
+            session=sessions.create(conn_id, 5),
+            sid=sid,
+            iat=iat,
+        )
+    # c3 оборвался и ждёт resume
+    manager.release("c3", sockets["c3"], resumable=True)
+
+    await subscriber.on_message(
+        json.dumps({"type": "session", "sid": "s1", "account_id": 5, "exp": 4e9})
+    )
+    assert sockets["c1"].closed == (1008, "Token revoked")
+    assert sockets["c2"].closed is None
+    assert manager.get_account_connections(5) == ["c2"]
+    assert sessions.get("c3") is None
+
+    # Водяной знак аккаунта: токены, выданные раньше nbf
+    await subscriber.on_message(
+        json.dumps({"type": "account", "account_id": 5, "nbf": 101})
+    )
+    assert sockets["c2"].closed == (1008, "Token revoked")
+    assert manager.get_account_connections(5) == []
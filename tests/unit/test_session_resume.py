@@ -0,0 +1,130 @@
+# tests/unit/test_session_resume.py
+import pytest
+
+from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from apps.gateway.gateway.session_resume import SessionRegistry
+from apps.gateway.gateway.token_verifier import TokenVerifier
+from apps.gateway.ws.unified_ws import _resumable_session
+from apps.gateway.gateway.ws_codec import EncodedFrame
+from libs.domain.dto.ws import WSEventFrame
+from libs.infra.revocation import RevocationList
+from tests.helpers import FakeWebSocket
+
+
+def _event(n: int) -> WSEventFrame:
+    return WSEventFrame(event="e", status="update", payload={"n": n})
+
+
+def test_frames_after_respects_ring_bounds():
+    """Досылаются только пропущенные кадры; вытесненные делают resume невозможным."""
+    registry = SessionRegistry(buffer_frames=3)
+    session = registry.create("c1", account_id=1)
+    for n in range(1, 6):
+        session.push(EncodedFrame(_event(n)))
+
+    assert [f.frame.payload["n"] for f in session.frames_after(3)] == [4, 5]
+    assert session.frames_after(5) == []
+    assert session.frames_after(1) is None  # кадр 2 уже вытеснен
+    assert session.frames_after(6) is None  # клиент "из будущего"
+
+
+def test_find_checks_token_and_expiry():
+    """Токен сверяется целиком; после grace-периода сессия забывается."""
+    registry = SessionRegistry(grace_sec=5.0, now=0.0)
+    session = registry.create("c1", account_id=1)
+
+    assert registry.find(session.token) is session
+    assert registry.find("c1.forged") is None
+
+    registry.detach("c1", now=0.0)
+    assert registry.collect_expired(3.0) == []
+    assert registry.collect_expired(6.0) == [session]
+    assert registry.find(session.token) is None
+
+
+@pytest.mark.anyio
+async def test_resume_replays_missed_frames():
+    """Кадры, отправленные во время обрыва, досылаются на новый сокет по порядку."""
+    sessions = SessionRegistry(buffer_frames=16, grace_sec=30.0)
+    manager = ClientConnectionManager(sessions=sessions)
+    session = sessions.create("c1", account_id=7)
+    old_ws = FakeWebSocket()
+    await manager.connect(old_ws, "c1", "PLAYER", account_id=7, session=session)
+
+    await manager.send_frame("c1", _event(1))
+    await manager.flush("c1")
+    manager.release("c1", old_ws, resumable=True)
+    # Аккаунт остаётся адресуемым, кадры копятся в буфер сессии
+    assert manager.get_account_connections(7) == ["c1"]
+    assert await manager.send_frame("c1", _event(2))
+    assert await manager.send_frame("c1", _event(3))
+
+    new_ws = FakeWebSocket()
+    record = await manager.resume(new_ws, session, last_seq=1, client_type="PLAYER")
+    assert record is not None
+    await manager.send_frame("c1", _event(4))
+    await manager.flush("c1")
+    assert [m["payload"]["n"] for m in old_ws.sent] == [1]
+    assert [m["payload"]["n"] for m in new_ws.sent] == [2, 3, 4]
+
+
+@pytest.mark.anyio
+async def test_normal_close_drops_session():
+    """Штатное закрытие (1000/1001) не оставляет сессию висеть."""
+    sessions = SessionRegistry()
+    manager = ClientConnectionManager(sessions=sessions)
+    session = sessions.create("c1", account_id=7)
+    ws = FakeWebSocket()
+    await manager.connect(ws, "c1", "PLAYER", account_id=7, session=session)
+    manager.release("c1", ws, resumable=False)
+    assert len(sessions) == 0
+    assert manager.get_account_connections(7) == []
+
+
+@pytest.mark.anyio
+async def test_resume_rejected_after_revocation():
+    """Отозванный после обрыва токен не даёт возобновить сессию без нового входа."""
+    sessions = SessionRegistry()
+    manager = ClientConnectionManager(sessions=sessions)
+    denylist = RevocationList()
+    verifier = TokenVerifier(bus=None, denylist=denylist)
+    session = sessions.create("c1", account_id=7)
+    ws = FakeWebSocket()
+    await manager.connect(
+        ws, "c1", "PLAYER", account_id=7, session=session, sid="s1", iat=1000
+    )
+    manager.release("c1", ws, resumable=True)
+
+    def find():
+        return _resumable_session(
+            session.token,
+            0,
+            client_conn_manager=manager,
+            token_verifier=verifier,
+        )
+
+    assert find() is session
+    denylist.revoke_account(7, nbf=1001)
+    assert find() is None
+    # Отозванная сессия не ждёт grace-период и аккаунт больше не адресуем
+    assert len(sessions) == 0
+    assert manager.get_account_connections(7) == []
+
+
+def test_fractional_grace_expiry_is_on_time():
+    """Дробный now не оставляет сессию жить лишний оборот колеса."""
+    registry = SessionRegistry(grace_sec=5.0, now=0.3)
+    session = registry.create("c1", account_id=1)
+    registry.detach("c1", now=0.6)
+    assert registry.collect_expired(5.5) == []
+    assert registry.collect_expired(6.1) == [session]
+
+
+@pytest.mark.anyio
+async def test_session_dropped_when_client_leaves_before_connect():
+    """Сессия, созданная до connect(), не остаётся висеть после обрыва."""
+    sessions = SessionRegistry()
+    manager = ClientConnectionManager(sessions=sessions)
+    sessions.create("c1", account_id=7)
+    manager.release("c1", FakeWebSocket(), resumable=True)
+    assert len(sessions) == 0
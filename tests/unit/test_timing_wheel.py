@@ -0,0 +1,55 @@
+# tests/unit/test_timing_wheel.py
+from apps.gateway.gateway.timing_wheel import HashedTimingWheel
+
+
+def test_expires_only_due_keys():
+    """Проверяет, что advance возвращает только истёкшие таймеры."""
+    wheel = HashedTimingWheel(tick_sec=1.0, span_sec=10.0, now=0.0)
+    wheel.schedule("a", 3.0)
+    wheel.schedule("b", 7.0)
+
+    assert wheel.advance(2.5) == []
+    assert wheel.advance(3.0) == ["a"]
+    assert "a" not in wheel and "b" in wheel
+    assert wheel.advance(8.0) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_cancel_and_reschedule():
+    """Проверяет, что перепланирование снимает старый таймер."""
+    wheel = HashedTimingWheel(tick_sec=1.0, span_sec=10.0, now=0.0)
+    wheel.schedule("a", 2.0)
+    wheel.schedule("a", 5.0)
+    assert wheel.advance(3.0) == []
+    assert wheel.cancel("a") == 5.0
+    assert wheel.advance(6.0) == []
+
+
+def test_fractional_deadline_fires_on_next_tick():
+    """Дробный дедлайн срабатывает на первом тике после него, а не через оборот."""
+    wheel = HashedTimingWheel(tick_sec=1.0, span_sec=10.0, now=0.0)
+    wheel.schedule("a", 3.7)
+    assert wheel.advance(3.5) == []
+    assert wheel.advance(4.2) == ["a"]
+
+    # Дедлайн внутри текущего тика, поставленный после его обхода
+    wheel.schedule("b", 4.6)
+    assert wheel.advance(4.5) == []
+    assert wheel.advance(5.0) == ["b"]
+
+
+def test_deadline_beyond_span_survives_full_rotation():
+    """Дедлайн дальше одного оборота не должен сработать раньше времени."""
+    wheel = HashedTimingWheel(tick_sec=1.0, span_sec=4.0, now=0.0)
+    wheel.schedule("far", 12.0)
+    for t in range(1, 12):
+        assert wheel.advance(float(t)) == []
+    assert wheel.advance(12.0) == ["far"]
+
+
+def test_large_jump_collects_everything_due():
+    """Пропуск многих тиков (например, после паузы цикла) не теряет таймеры."""
+    wheel = HashedTimingWheel(tick_sec=1.0, span_sec=5.0, now=0.0)
+    for i in range(20):
+        wheel.schedule(i, float(i % 6 + 1))
+    assert sorted(wheel.advance(100.0)) == list(range(20))
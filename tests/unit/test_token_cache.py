@@ -0,0 +1,63 @@
+# tests/unit/test_token_cache.py
+import pytest
+
+from apps.gateway.gateway.token_cache import TokenValidationCache
+from apps.gateway.gateway.token_verifier import TokenVerifier
+from libs.domain.dto.auth import ValidateTokenResponse
+
+
+def _ok(account_id, exp):
+    return ValidateTokenResponse(valid=True, account_id=account_id, exp=exp)
+
+
+def test_entry_ttl_is_bounded_by_token_exp_and_negative_ttl():
+    cache = TokenValidationCache(ttl_sec=300, negative_ttl_sec=5)
+    cache.put("short", _ok(1, exp=1010), now=1000)
+    cache.put("long", _ok(2, exp=5000), now=1000)
+    cache.put(
+        "bad",
+        ValidateTokenResponse(valid=False, error_code="auth.INVALID_TOKEN"),
+        now=1000,
+    )
+    cache.put("timeout", ValidateTokenResponse(valid=False, error_code="rpc.timeout"))
+
+    assert cache.get("short", now=1009).account_id == 1
+    assert cache.get("short", now=1011) is None  # Не переживает exp
+    assert cache.get("long", now=1299) is not None
+    assert cache.get("long", now=1301) is None  # Ограничена ttl_sec
+    assert cache.get("bad", now=1004) is not None
+    assert cache.get("bad", now=1006) is None
+    assert cache.get("timeout") is None  # Временные ошибки не кэшируются
+    assert len(cache) == 0 and cache.bytes == 0
+
+
+def test_lru_eviction_revocation_and_stats():
+    cache = TokenValidationCache(max_entries=2)
+    cache.put("a", _ok(1, exp=2000), now=1000)
+    cache.put("b", _ok(1, exp=2000), now=1000)
+    cache.get("a", now=1000)
+    cache.put("c", _ok(2, exp=2000), now=1000)
+    assert cache.get("b", now=1000) is None  # Вытеснена как давно не читаемая
+    assert cache.evictions == 1
+
+    assert cache.invalidate_account(1) == 1
+    assert cache.get("a", now=1000) is None
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["hits"] == 1 and stats["misses"] == 2
+    assert stats["approx_bytes"] > 0
+
+
+@pytest.mark.anyio
+async def test_repeat_validation_skips_rpc():
+    class _Bus:
+        calls = 0
+
+        async def call_rpc(self, *args, **kwargs):
+            self.calls += 1
+            return {"valid": True, "account_id": 9, "exp": 4_000_000_000}
+
+    bus = _Bus()
+    verifier = TokenVerifier(bus, cache=TokenValidationCache())
+    for _ in range(3):
+        assert (await verifier.verify("tok")).account_id == 9
+    assert bus.calls == 1
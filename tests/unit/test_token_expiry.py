@@ -0,0 +1,73 @@
+# tests/unit/test_token_expiry.py
+import asyncio
+import time
+
+import pytest
+
+from apps.gateway.gateway.client_connection_manager import ClientConnectionManager
+from apps.gateway.gateway.reauth_batcher import ReauthBatcher
+from libs.domain.dto.auth import ValidateTokenResponse
+from tests.helpers import FakeWebSocket
+
+
+class _FakeVerifier:
+    def __init__(self):
+        self.calls = []
+
+    async def verify_many(self, tokens):
+        self.calls.append(list(tokens))
+        return [
+            ValidateTokenResponse(valid=True, account_id=1, exp=int(token))
+            for token in tokens
+        ]
+
+
+@pytest.mark.anyio
+async def test_expiry_warns_then_closes():
+    """Сначала token_expiring за token_warn_sec до exp, затем закрытие в exp."""
+    manager = ClientConnectionManager(token_warn_sec=60.0)
+    exp = int(time.time()) + 120
+    await manager.connect(FakeWebSocket(), "c1", "player", account_id=1, token_exp=exp)
+
+    assert manager.collect_token_expiry(exp - 61) == ([], [])
+    expiring, expired = manager.collect_token_expiry(exp - 59)
+    assert [cid for cid, _ in expiring] == ["c1"] and expired == []
+    # Повторно не предупреждаем
+    assert manager.collect_token_expiry(exp - 1) == ([], [])
+    expiring, expired = manager.collect_token_expiry(exp + 1)
+    assert expiring == [] and [cid for cid, _ in expired] == ["c1"]
+
+
+@pytest.mark.anyio
+async def test_reauth_moves_expiry():
+    """После reauth соединение живёт до нового exp и снова получит предупреждение."""
+    manager = ClientConnectionManager(token_warn_sec=60.0)
+    exp = int(time.time()) + 120
+    await manager.connect(FakeWebSocket(), "c1", "player", account_id=1, token_exp=exp)
+    manager.collect_token_expiry(exp - 59)
+
+    new_exp = exp + 1800
+    manager.set_token_expiry("c1", new_exp)
+    assert manager.collect_token_expiry(exp + 1) == ([], [])
+    expiring, _ = manager.collect_token_expiry(new_exp - 30)
+    assert [cid for cid, _ in expiring] == ["c1"]
+
+    manager.disconnect("c1")
+    assert manager.collect_token_expiry(new_exp + 1) == ([], [])
+
+
+@pytest.mark.anyio
+async def test_reauth_batcher_groups_requests():
+    """Одновременные reauth уходят в верификатор одной пачкой."""
+    verifier = _FakeVerifier()
+    batcher = ReauthBatcher(verifier, window_ms=5.0, max_batch=100)
+    results = await asyncio.gather(
+        *(batcher.validate(str(1000 + n)) for n in range(10))
+    )
+    assert len(verifier.calls) == 1
+    assert [r.exp for r in results] == [1000 + n for n in range(10)]
+
+    # max_batch сбрасывает пачку, не дожидаясь окна
+    batcher = ReauthBatcher(verifier, window_ms=10_000.0, max_batch=2)
+    results = await asyncio.gather(batcher.validate("1"), batcher.validate("2"))
+    assert [r.exp for r in results] == [1, 2]
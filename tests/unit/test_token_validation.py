@@ -0,0 +1,74 @@
+# tests/unit/test_token_validation.py
+import time
+
+import jwt
+import pytest
+
+from apps.auth_svc.handlers.auth_validate_token_rpc_handler import (
+    AuthValidateTokenRpcHandler,
+)
+from apps.gateway.gateway.token_verifier import TokenVerifier
+from libs.domain.dto.auth import ValidateTokenRequest
+from libs.utils.token_validation import TokenValidator
+
+SECRET = "test-secret-that-is-long-enough-for-hs256"
+
+
+class _Settings:
+    JWT_SECRET = SECRET
+    AUTH_JWT_AUD = "game-clients"
+
+
+class _FakeBus:
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    async def call_rpc(self, exchange_name, routing_key, payload, **kwargs):
+        self.calls += 1
+        return self.response
+
+
+def _token(**overrides):
+    now = int(time.time())
+    claims = {"sub": "42", "iat": now, "exp": now + 60, "aud": "game-clients"}
+    claims.update(overrides)
+    claims = {k: v for k, v in claims.items() if v is not None}
+    return jwt.encode(claims, SECRET, algorithm="HS256")
+
+
+@pytest.mark.anyio
+async def test_local_validation_matches_auth_service_handler():
+    handler = AuthValidateTokenRpcHandler(_Settings())
+    local = TokenValidator(SECRET, audience="game-clients")
+    tokens = [
+        _token(),
+        _token(exp=int(time.time()) - 10),
+        _token(aud="other"),
+        _token(iat=None),
+        _token()[:-2] + "xx",
+    ]
+    for token in tokens:
+        remote = await handler.process(ValidateTokenRequest(access_token=token))
+        assert local.validate(token) == remote
+
+    assert local.validate(tokens[0]).account_id == 42
+    assert local.validate(tokens[1]).error_code == "auth.TOKEN_EXPIRED"
+    assert local.validate(tokens[2]).error_code == "auth.BAD_AUDIENCE"
+    assert local.validate(tokens[3]).error_code == "auth.INVALID_TOKEN"
+
+
+@pytest.mark.anyio
+async def test_verifier_uses_rpc_only_without_local_key():
+    bus = _FakeBus({"valid": True, "account_id": 7})
+    local = TokenVerifier(bus, local=TokenValidator(SECRET, audience="game-clients"))
+    assert (await local.verify(_token())).account_id == 42
+    assert bus.calls == 0
+
+    remote = TokenVerifier(bus)
+    assert (await remote.verify(_token())).account_id == 7
+    assert bus.calls == 1
+
+    timed_out = TokenVerifier(_FakeBus(None))
+    result = await timed_out.verify(_token())
+    assert not result.valid and result.error_code == "rpc.timeout"
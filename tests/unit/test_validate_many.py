@@ -0,0 +1,168 @@
+# tests/unit/test_validate_many.py
+import asyncio
+import time
+
+import jwt
+import pytest
+
+from apps.auth_svc.handlers.auth_validate_token_rpc_handler import (
+    AuthValidateManyRpcHandler,
+)
+from apps.gateway.gateway.token_verifier import TokenVerifier
+from apps.gateway.gateway.validate_rpc_batcher import ValidateRpcBatcher
+from libs.app.errors import ErrorCode
+from libs.domain.dto.auth import ValidateTokensRequest
+from libs.messaging.rabbitmq_names import Queues
+from libs.utils.micro_batch import MicroBatcher
+
+SECRET = "test-secret-that-is-long-enough-for-hs256"
+
+
+class _Settings:
+    JWT_SECRET = SECRET
+    AUTH_JWT_AUD = "game-clients"
+
+
+def _token(sub: str, exp_delta: int = 60) -> str:
+    now = int(time.time())
+    claims = {"sub": sub, "iat": now, "exp": now + exp_delta, "aud": "game-clients"}
+    return jwt.encode(claims, SECRET, algorithm="HS256")
+
+
+class _AuthBus:
+    """Шина, отвечающая так, как ответил бы auth_svc."""
+
+    def __init__(self, respond=True):
+        self.handler = AuthValidateManyRpcHandler(_Settings())
+        self.respond = respond
+        self.calls = []
+        self.payloads = []
+        self.correlation_ids = []
+
+    async def call_rpc(
+        self, exchange_name, routing_key, payload, *, correlation_id=None
+    ):
+        self.calls.append(routing_key)
+        self.payloads.append(payload)
+        self.correlation_ids.append(correlation_id)
+        if not self.respond:
+            return None
+        if routing_key == Queues.AUTH_VALIDATE_TOKEN_RPC:
+            tokens = [payload["access_token"]]
+        else:
+            tokens = payload["tokens"]
+        resp = await self.handler.process(
+            ValidateTokensRequest(
+                tokens=tokens, correlation_ids=payload.get("correlation_ids")
+            )
+        )
+        body = resp.model_dump(mode="json")
+        return (
+            body["results"][0]
+            if routing_key == Queues.AUTH_VALIDATE_TOKEN_RPC
+            else body
+        )
+
+
+@pytest.mark.anyio
+async def test_handler_keeps_order_and_isolates_errors():
+    """Результаты в порядке запроса; битый токен не портит соседей."""
+    handler = AuthValidateManyRpcHandler(_Settings())
+    tokens = [_token("1"), "garbage", _token("3", exp_delta=-120)]
+    resp = await handler.process(ValidateTokensRequest(tokens=tokens))
+
+    assert [r.valid for r in resp.results] == [True, False, False]
+    assert resp.results[0].account_id == 1
+    assert resp.results[2].error_code == "auth.TOKEN_EXPIRED"
+
+
+@pytest.mark.anyio
+async def test_concurrent_rpc_validations_share_one_message():
+    """Одновременные запасные проверки уходят одним validate_many."""
+    bus = _AuthBus()
+    verifier = TokenVerifier(bus, rpc_batcher=ValidateRpcBatcher(bus, window_ms=5))
+    tokens = [_token(str(n)) for n in range(1, 6)]
+    results = await verifier.verify_many(tokens + [tokens[0]])
+
+    assert bus.calls == [Queues.AUTH_VALIDATE_MANY_RPC]
+    assert [r.account_id for r in results] == [1, 2, 3, 4, 5, 1]
+
+    # Одиночная проверка идёт прежним validate_token
+    bus.calls.clear()
+    single = await verifier.verify(_token("7"))
+    assert single.account_id == 7
+    assert bus.calls == [Queues.AUTH_VALIDATE_TOKEN_RPC]
+
+
+@pytest.mark.anyio
+async def test_batch_timeout_fails_every_token():
+    bus = _AuthBus(respond=False)
+    batcher = ValidateRpcBatcher(bus, window_ms=5)
+    results = await asyncio.gather(
+        batcher.validate(_token("1")), batcher.validate(_token("2"))
+    )
+    assert [r.error_code for r in results] == [ErrorCode.RPC_TIMEOUT.value] * 2
+
+
+@pytest.mark.anyio
+async def test_correlation_ids_travel_with_the_batch():
+    """correlation_id запросов не теряются: у одиночного RPC — свой, в пачке — поэлементно."""
+    bus = _AuthBus()
+    verifier = TokenVerifier(bus, rpc_batcher=ValidateRpcBatcher(bus, window_ms=5))
+
+    await verifier.verify(_token("1"), correlation_id="req-1")
+    assert bus.correlation_ids == ["req-1"]
+
+    await asyncio.gather(
+        verifier.verify(_token("2"), correlation_id="req-2"),
+        verifier.verify(_token("3")),
+    )
+    assert bus.payloads[-1]["correlation_ids"] == ["req-2", None]
+    # У пачки собственный correlation_id, не совпадающий ни с одним запросом
+    assert bus.correlation_ids[-1] not in (None, "req-2")
+
+
+@pytest.mark.anyio
+async def test_full_batches_are_flushed_by_referenced_tasks():
+    """Пачка по max_batch уходит задачей, на которую батчер держит ссылку."""
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def handler(items):
+        started.set()
+        await release.wait()
+        return items
+
+    batcher = MicroBatcher(handler, window_ms=1000, max_batch=2)
+    pending = asyncio.gather(batcher.submit(1), batcher.submit(2))
+    await started.wait()
+    assert len(batcher._inflight) == 1
+
+    release.set()
+    assert await pending == [1, 2]
+    await asyncio.sleep(0)
+    assert not batcher._inflight
+
+
+@pytest.mark.anyio
+async def test_window_flush_task_is_referenced_while_in_flight():
+    """Пачка по окну тоже держится ссылкой, пока handler в полёте."""
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def handler(items):
+        started.set()
+        await release.wait()
+        return items
+
+    batcher = MicroBatcher(handler, window_ms=1, max_batch=100)
+    pending = asyncio.ensure_future(batcher.submit(1))
+    await started.wait()
+    # Окно истекло, _flush_task уже сброшен, а handler ещё работает
+    assert batcher._flush_task is None
+    assert len(batcher._inflight) == 1
+
+    release.set()
+    assert await pending == 1
+    await asyncio.sleep(0)
+    assert not batcher._inflight
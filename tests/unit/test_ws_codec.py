@@ -0,0 +1,179 @@
+# tests/unit/test_ws_codec.py
+import json
+import typing
+import zlib
+
+import msgpack
+import pytest
+
+from apps.gateway.gateway.ws_codec import (
+    COMPACT_KEYS,
+    EXPANDED_KEYS,
+    DeflateCodec,
+    DeflateOptions,
+    JSON_CODEC,
+    MSGPACK_CODEC,
+    MSGPACK_SUBPROTOCOL,
+    EncodedFrame,
+    negotiate_codec,
+)
+from libs.domain.dto.ws import (
+    ClientWSFrame,
+    ServerWSFrame,
+    WSCommandFrame,
+    WSDeltaFrame,
+    WSEventFrame,
+    WSPongFrame,
+)
+
+
+def _event() -> WSEventFrame:
+    return WSEventFrame(event="movement.moved", status="update", payload={"x": 1})
+
+
+def test_negotiation_defaults_to_json():
+    """Без известного субпротокола остаёмся на JSON."""
+    assert negotiate_codec([]) is JSON_CODEC
+    assert negotiate_codec(["chat.v2"]) is JSON_CODEC
+    assert negotiate_codec(["chat.v2", MSGPACK_SUBPROTOCOL]) is MSGPACK_CODEC
+
+
+def test_msgpack_frame_is_compact():
+    """msgpack-кадр: короткие ключи, без null-полей, ts в миллисекундах."""
+    frame = _event()
+    data = msgpack.unpackb(MSGPACK_CODEC.encode(frame))
+
+    assert data["t"] == "event" and data["e"] == "movement.moved"
+    assert data["p"] == {"x": 1}
+    assert "rid" not in data and "tk" not in data and "m" not in data
+    assert data["ts"] == int(frame.ts.timestamp() * 1000)
+    assert len(MSGPACK_CODEC.encode(frame)) < len(JSON_CODEC.encode(frame))
+
+
+def test_msgpack_decodes_client_frame():
+    """Клиентский кадр с короткими ключами разбирается в DTO."""
+    raw = msgpack.packb(
+        {
+            "t": "command",
+            "d": "movement",
+            "c": "move",
+            "p": {"x": 2},
+            "ts": 1_700_000_000_000,
+        }
+    )
+    frame = MSGPACK_CODEC.decode(raw)
+    assert isinstance(frame, WSCommandFrame)
+    assert frame.domain == "movement" and frame.payload == {"x": 2}
+    assert frame.ts.year == 2023
+
+
+def test_encoded_frame_caches_per_codec():
+    """Один EncodedFrame кодируется не более одного раза на формат."""
+    encoded = EncodedFrame(_event())
+    first = encoded.for_codec(MSGPACK_CODEC)
+    assert encoded.for_codec(MSGPACK_CODEC) is first
+    assert json.loads(encoded.for_codec(JSON_CODEC))["event"] == "movement.moved"
+
+
+def _inflate(data: bytes, inflater=None) -> bytes:
+    assert data[0] == 1
+    inflater = inflater or zlib.decompressobj(-15)
+    return inflater.decompress(data[1:] + b"\x00\x00\xff\xff")
+
+
+def _snapshot() -> WSEventFrame:
+    cells = [{"x": i, "y": i * 2, "kind": "grass"} for i in range(100)]
+    return WSEventFrame(event="world.snapshot", status="ok", payload={"cells": cells})
+
+
+def test_deflate_negotiation_and_threshold():
+    """Сжатый вариант выбирается по суффиксу; мелкие кадры не сжимаются."""
+    options = DeflateOptions(threshold=256)
+    codec = negotiate_codec([MSGPACK_SUBPROTOCOL + ".deflate"], options)
+    assert isinstance(codec, DeflateCodec) and codec.inner is MSGPACK_CODEC
+    assert negotiate_codec([MSGPACK_SUBPROTOCOL + ".deflate"]) is JSON_CODEC
+
+    small = codec.encode(WSPongFrame())
+    assert small[0] == 0 and msgpack.unpackb(small[1:])["t"] == "pong"
+
+    big = codec.encode(_snapshot())
+    assert len(big) < len(MSGPACK_CODEC.encode(_snapshot())) // 2
+    assert msgpack.unpackb(_inflate(big))["e"] == "world.snapshot"
+
+
+def test_deflate_shared_bytes_without_context_takeover():
+    """Без context takeover сжатые байты события общие для всех соединений."""
+    options = DeflateOptions(threshold=0)
+    a = negotiate_codec(["gk.json.v1.deflate"], options)
+    b = negotiate_codec(["gk.json.v1.deflate"], options)
+    encoded = EncodedFrame(_snapshot())
+    assert encoded.for_codec(a) is encoded.for_codec(b)
+
+
+def test_deflate_context_takeover_stream():
+    """С context takeover кадры образуют один поток; повтор сжимается сильнее."""
+    options = DeflateOptions(threshold=0)
+    codec = negotiate_codec(["gk.json.v1.deflate-ctx"], options)
+    assert codec.cache_key is None
+    assert (
+        negotiate_codec(
+            ["gk.json.v1.deflate-ctx"], DeflateOptions(allow_context_takeover=False)
+        )
+        is JSON_CODEC
+    )
+
+    inflater = zlib.decompressobj(-15)
+    first = codec.encode(_snapshot())
+    second = codec.encode(_snapshot())
+    assert len(second) < len(first)
+    assert json.loads(_inflate(first, inflater))["event"] == "world.snapshot"
+    assert json.loads(_inflate(second, inflater))["event"] == "world.snapshot"
+
+
+def test_deflate_decodes_compressed_client_frame():
+    """Клиентский кадр со сжатием разбирается; неизвестный флаг — ошибка."""
+    codec = negotiate_codec(["gk.json.v1.deflate"], DeflateOptions())
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    body = compressor.compress(b'{"type": "ping", "nonce": "z"}')
+    body += compressor.flush(zlib.Z_SYNC_FLUSH)
+    frame = codec.decode(b"\x01" + body[:-4])
+    assert frame.type == "ping" and frame.nonce == "z"
+
+    with pytest.raises(ValueError):
+        codec.decode(b"\x07{}")
+
+
+def test_deflate_corrupt_body_is_value_error():
+    """Битое deflate-тело — ValueError (кадр ошибки клиенту), а не zlib.error."""
+    codec = negotiate_codec(["gk.json.v1.deflate"], DeflateOptions())
+    with pytest.raises(ValueError, match="Malformed deflate"):
+        codec.decode(b"\x01\xff\xff\xff\xff\xff")
+
+
+def test_msgpack_delta_frame_round_trip():
+    """Дельта уходит с короткими ключами и без потерь восстанавливается клиентом."""
+    frame = WSDeltaFrame(
+        event="movement.moved",
+        status="update",
+        key="char:7",
+        base_version=3,
+        state_version=4,
+        patch=[{"op": "replace", "path": "/x", "value": 2}],
+        tick=11,
+    )
+    data = msgpack.unpackb(MSGPACK_CODEC.encode(frame))
+    assert set(data) == {"t", "v", "ts", "e", "s", "k", "bv", "sv", "pt", "tk"}
+
+    restored = WSDeltaFrame.model_validate(
+        {EXPANDED_KEYS[k]: v for k, v in data.items()}
+    )
+    assert restored.model_dump(exclude={"ts"}) == frame.model_dump(exclude={"ts"})
+
+
+def test_compact_keys_cover_every_frame_field():
+    """Новое поле кадра без короткого ключа уйдёт в msgpack полным именем."""
+    for union in (ClientWSFrame, ServerWSFrame):
+        for model in typing.get_args(typing.get_args(union)[0]):
+            missing = set(model.model_fields) - set(COMPACT_KEYS)
+            assert not missing, f"{model.__name__}: {missing}"
+    assert len(set(COMPACT_KEYS.values())) == len(COMPACT_KEYS)
@@ -0,0 +1,56 @@
+# tests/unit/test_ws_commands.py
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from apps.gateway.gateway.client_connection_manager import (
+    ClientConnectionManager,
+    ConnectionRecord,
+)
+from libs.domain.dto.ws import CLIENT_WS_FRAME_ADAPTER, WSCommandFrame, WSPingFrame
+
+
+def test_frame_adapter_dispatches_by_type():
+    """Проверяет, что сырой JSON разбирается в нужный тип кадра."""
+    frame = CLIENT_WS_FRAME_ADAPTER.validate_json(
+        '{"type": "command", "domain": "movement", "command": "move", "payload": {"x": 1}}'
+    )
+    assert isinstance(frame, WSCommandFrame)
+    assert frame.payload == {"x": 1}
+
+    ping = CLIENT_WS_FRAME_ADAPTER.validate_json('{"type": "ping", "nonce": "n1"}')
+    assert isinstance(ping, WSPingFrame) and ping.nonce == "n1"
+
+
+def test_frame_adapter_rejects_unknown_type():
+    """Неизвестный тип кадра не проходит валидацию."""
+    with pytest.raises(ValidationError):
+        CLIENT_WS_FRAME_ADAPTER.validate_json('{"type": "teleport"}')
+
+
+def test_inflight_limit_and_completion():
+    """Проверяет лимит in-flight команд на соединение и освобождение слота."""
+    manager = ClientConnectionManager(max_inflight_commands=2)
+    record = ConnectionRecord(
+        websocket=None, client_type="PLAYER", last_activity=0.0, account_id=1
+    )
+    manager.active_connections["c1"] = record
+
+    assert manager.begin_command(record, "r1")
+    assert not manager.begin_command(record, "r1")  # дубль request_id
+    assert manager.begin_command(record, "r2")
+    assert not manager.begin_command(record, "r3")
+
+    manager.complete_command("c1", "r1")
+    assert manager.begin_command(record, "r3")
+
+
+def test_inflight_limit_drops_stale_commands():
+    """Зависшие (без final) команды не блокируют соединение навсегда."""
+    manager = ClientConnectionManager(max_inflight_commands=1, command_timeout=5.0)
+    record = ConnectionRecord(websocket=None, client_type="PLAYER", last_activity=0.0)
+    record.inflight["old"] = time.monotonic() - 10.0
+
+    assert manager.begin_command(record, "new")
+    assert "old" not in record.inflight